@@ -1,6 +1,31 @@
+import time
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.metrics import DB_POOL_CHECKOUT_WAIT
 from app.core.settings import Settings
 
-engine = create_async_engine(Settings.PG_URL)
-async_session = sessionmaker(engine, class_=AsyncSession)
\ No newline at end of file
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+connect_args = {}
+if Settings.PG_URL and Settings.PG_URL.startswith('postgresql+asyncpg'):
+    connect_args['prepared_statement_cache_size'] = Settings.DB_STATEMENT_CACHE_SIZE
+
+engine = create_async_engine(
+    Settings.PG_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=Settings.DB_POOL_SIZE,
+    max_overflow=Settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=Settings.DB_POOL_PRE_PING,
+    connect_args=connect_args,
+)
+async_session = sessionmaker(engine, class_=AsyncSession)
@@ -0,0 +1,297 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Optional
+from app.core.metrics import STAGE_LATENCY, metrics
+from app.core.settings import Settings
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class SolverTimeoutError(Exception):
+    pass
+
+
+class SolverResourceError(Exception):
+    pass
+
+
+class ExecutorSaturatedError(Exception):
+    pass
+
+
+def _worker_main(connection: Connection, memory_limit_mb: int) -> None:
+    if resource is not None and memory_limit_mb > 0:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    # os timers de estágio rodam aqui, mas são publicados pelo processo da API
+    metrics.forwarding = True
+
+    while True:
+        try:
+            func, args = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+
+        try:
+            result = func(*args)
+            connection.send(('ok', result, metrics.drain_forwarded()))
+        except MemoryError:
+            connection.send(('memory', None, []))
+            return
+        except ValueError as error:
+            connection.send(('value_error', str(error), metrics.drain_forwarded()))
+        except Exception as error:
+            connection.send(('error', f'{type(error).__name__}: {error}', metrics.drain_forwarded()))
+
+
+class KillableWorker:
+
+    def __init__(self, context: multiprocessing.context.BaseContext, memory_limit_mb: int):
+        self._connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection, memory_limit_mb), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    async def _wait_readable(self, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+
+        try:
+            loop.add_reader(self._connection.fileno(), lambda: ready.done() or ready.set_result(True))
+        except NotImplementedError:
+            return await asyncio.to_thread(self._connection.poll, timeout)
+
+        try:
+            return await asyncio.wait_for(ready, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(self._connection.fileno())
+
+    async def call(self, func: Callable, args: tuple, timeout: float) -> Any:
+        self._connection.send((func, args))
+
+        if not await self._wait_readable(timeout):
+            raise SolverTimeoutError(f"O cálculo excedeu o limite de {timeout:g} segundos")
+
+        try:
+            status, payload, samples = self._connection.recv()
+        except EOFError:
+            raise SolverResourceError("O cálculo excedeu os limites de recursos do servidor")
+
+        metrics.replay(samples)
+
+        if status == 'ok':
+            return payload
+        if status == 'value_error':
+            raise ValueError(payload)
+        if status == 'memory':
+            raise SolverResourceError("O cálculo excedeu o limite de memória")
+        raise RuntimeError(payload)
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self._connection.close()
+
+
+class SolverPool:
+
+    def __init__(self, workers: int, start_method: str, memory_limit_mb: int):
+        self.workers = workers
+        self.memory_limit_mb = memory_limit_mb
+        self._context = multiprocessing.get_context(start_method)
+        self._idle: Optional[asyncio.Queue] = None
+        self._all: set[KillableWorker] = set()
+        self.timeouts = 0
+        self.restarts = 0
+        self.waiting = 0
+
+        if start_method == 'forkserver':
+            # o servidor já sobe com sympy importado: novos workers nascem quentes
+            self._context.set_forkserver_preload(['app.services.optimization_calc'])
+
+    def _spawn(self) -> KillableWorker:
+        worker = KillableWorker(self._context, self.memory_limit_mb)
+        self._all.add(worker)
+        return worker
+
+    def _replace(self, worker: KillableWorker) -> KillableWorker:
+        self._all.discard(worker)
+        worker.kill()
+        self.restarts += 1
+        return self._spawn()
+
+    def _queue(self) -> asyncio.Queue:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for _ in range(self.workers):
+                self._idle.put_nowait(None)
+        return self._idle
+
+    async def prestart(self, func: Optional[Callable] = None, *args) -> None:
+        # sobe os workers antes do primeiro request; func (opcional) aquece cada um com um cálculo real
+        idle = self._queue()
+        workers = [idle.get_nowait() for _ in range(idle.qsize())]
+        try:
+            for index, worker in enumerate(workers):
+                if worker is None or not worker.process.is_alive():
+                    workers[index] = worker = self._spawn() if worker is None else self._replace(worker)
+                if func is not None:
+                    try:
+                        await worker.call(func, args, Settings.SOLVER_TIMEOUT_SECONDS)
+                    except (SolverTimeoutError, SolverResourceError, asyncio.CancelledError):
+                        workers[index] = self._replace(worker)
+                        raise
+        finally:
+            for worker in workers:
+                idle.put_nowait(worker)
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None) -> Any:
+        self._queue()
+
+        self.waiting += 1
+        try:
+            with STAGE_LATENCY.time(stage='solver_queue'):
+                worker = await self._idle.get()
+        finally:
+            self.waiting -= 1
+
+        try:
+            if worker is None:
+                worker = self._spawn()
+            elif not worker.process.is_alive():
+                worker = self._replace(worker)
+        except BaseException:
+            self._idle.put_nowait(None)
+            raise
+
+        try:
+            return await worker.call(func, args, timeout or Settings.SOLVER_TIMEOUT_SECONDS)
+        except SolverTimeoutError:
+            self.timeouts += 1
+            worker = self._replace(worker)
+            raise
+        except (SolverResourceError, asyncio.CancelledError):
+            # o worker pode estar no meio de um cálculo: só matar garante que ele pare
+            worker = self._replace(worker)
+            raise
+        finally:
+            self._idle.put_nowait(worker)
+
+    def shutdown(self) -> None:
+        for worker in list(self._all):
+            try:
+                worker.kill()
+            except Exception as error:
+                logging.error("Error stopping solver worker: %s", error)
+        self._all.clear()
+        self._idle = None
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'alive': sum(1 for worker in self._all if worker.process.is_alive()),
+            'waiting': self.waiting,
+            'timeouts': self.timeouts,
+            'restarts': self.restarts,
+        }
+
+
+class BoundedExecutor:
+
+    def __init__(self, workers: int, max_pending: int, thread_name_prefix: str):
+        self.workers = workers
+        self.max_pending = max(max_pending, workers)
+        # workers = 0 desliga o pool: a chamada roda inline, no event loop
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix) if workers > 0 else None
+        self.pending = 0
+        self.rejected = 0
+
+    async def run(self, func: Callable, *args) -> Any:
+        if self._executor is None:
+            return func(*args)
+
+        # backpressure: com a fila cheia, recusar na hora é melhor que acumular latência
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorSaturatedError("Fila do executor cheia")
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'pending': self.pending,
+            'rejected': self.rejected,
+        }
+
+
+_solver_pool: Optional[SolverPool] = None
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_password_pool: Optional[BoundedExecutor] = None
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    # instalado como executor padrão do loop: asyncio.to_thread passa por aqui e a fila fica observável
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=Settings.THREAD_POOL_WORKERS, thread_name_prefix='app')
+    return _thread_pool
+
+
+def thread_pool_queue_depth() -> int:
+    return _thread_pool._work_queue.qsize() if _thread_pool is not None else 0
+
+
+def get_solver_pool() -> SolverPool:
+    global _solver_pool
+    if _solver_pool is None:
+        _solver_pool = SolverPool(
+            workers=Settings.SOLVER_WORKERS,
+            start_method=Settings.SOLVER_START_METHOD,
+            memory_limit_mb=Settings.SOLVER_MEMORY_LIMIT_MB,
+        )
+    return _solver_pool
+
+
+def get_password_pool() -> BoundedExecutor:
+    # o bcrypt libera o GIL durante o hash: threads bastam para tirar o custo do event loop
+    global _password_pool
+    if _password_pool is None:
+        _password_pool = BoundedExecutor(
+            workers=Settings.PASSWORD_HASH_WORKERS,
+            max_pending=Settings.PASSWORD_HASH_MAX_PENDING,
+            thread_name_prefix='password',
+        )
+    return _password_pool
+
+
+def shutdown_executors() -> None:
+    global _solver_pool, _thread_pool, _password_pool
+    if _solver_pool is not None:
+        _solver_pool.shutdown()
+        _solver_pool = None
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+    if _password_pool is not None:
+        _password_pool.shutdown()
+        _password_pool = None
@@ -1,5 +1,37 @@
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
+from jose import jwt as jose_jwt, JWTError
+from app.core.settings import Settings
 
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
-oauth2_bearer = OAuth2PasswordBearer(tokenUrl='auth/login')
\ No newline at end of file
+try:
+    import jwt as pyjwt
+except ImportError:  # PyJWT é opcional: sem ele o backend python-jose é usado
+    pyjwt = None
+
+# min = max = rounds: hashes com outro custo (maior ou menor) são marcados para rehash no login
+bcrypt_context = CryptContext(
+    schemes=['bcrypt'],
+    deprecated='auto',
+    bcrypt__rounds=Settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=Settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=Settings.BCRYPT_ROUNDS,
+)
+oauth2_bearer = OAuth2PasswordBearer(tokenUrl='auth/login')
+
+
+class InvalidTokenError(Exception):
+    pass
+
+
+def decode_token(token: str) -> dict:
+    # PyJWT decodifica o mesmo HS256 emitido pelo python-jose com bem menos overhead por chamada
+    if Settings.JWT_BACKEND == 'pyjwt' and pyjwt is not None:
+        try:
+            return pyjwt.decode(token, Settings.SECRET_KEY, algorithms=[Settings.ALGORITHM])
+        except pyjwt.PyJWTError as error:
+            raise InvalidTokenError(str(error))
+
+    try:
+        return jose_jwt.decode(token=token, key=Settings.SECRET_KEY, algorithms=[Settings.ALGORITHM])
+    except JWTError as error:
+        raise InvalidTokenError(str(error))
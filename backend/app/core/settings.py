@@ -1,4 +1,4 @@
-from os import getenv
+from os import cpu_count, getenv
 from dotenv import load_dotenv
 
 class Settings:
@@ -8,7 +8,101 @@ class Settings:
     SECRET_KEY = getenv('SECRET_KEY')
     ALGORITHM = getenv('ALGORITHM')
     ACCESS_TOKEN_EXPIRE_MINUTES = int(getenv('ACCESS_TOKEN_EXPIRE_MINUTES', 600))   
+    JWT_BACKEND = getenv('JWT_BACKEND', 'jose')
+    AUTH_TOKEN_CACHE_SIZE = int(getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+    AUTH_TOKEN_CACHE_TTL_SECONDS = float(getenv('AUTH_TOKEN_CACHE_TTL_SECONDS', 300))
+    BCRYPT_ROUNDS = int(getenv('BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(getenv('PASSWORD_HASH_WORKERS', min(4, cpu_count() or 1)))
+    PASSWORD_HASH_MAX_PENDING = int(getenv('PASSWORD_HASH_MAX_PENDING', 32))
+
+    SERVER_HOST = getenv('SERVER_HOST', '0.0.0.0')
+    SERVER_PORT = int(getenv('SERVER_PORT', 8000))
+    SERVER_WORKERS = int(getenv('SERVER_WORKERS', 0)) or cpu_count() or 1
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS = int(getenv('SERVER_GRACEFUL_SHUTDOWN_SECONDS', 30))
+    SERVER_ACCESS_LOG = getenv('SERVER_ACCESS_LOG', 'false').lower() == 'true'
+    WARMUP_ON_STARTUP = getenv('WARMUP_ON_STARTUP', 'true').lower() == 'true'
 
     CLOUDINARY_CLOUD_NAME = getenv('CLOUDINARY_CLOUD_NAME')
     CLOUDINARY_API_KEY = getenv('CLOUDINARY_API_KEY')
-    CLOUDINARY_API_SECRET = getenv('CLOUDINARY_API_SECRET')
\ No newline at end of file
+    CLOUDINARY_API_SECRET = getenv('CLOUDINARY_API_SECRET')
+
+    OPTIMIZATION_CACHE_SIZE = int(getenv('OPTIMIZATION_CACHE_SIZE', 1024))
+    OPTIMIZATION_CACHE_TTL_SECONDS = int(getenv('OPTIMIZATION_CACHE_TTL_SECONDS', 3600))
+    OPTIMIZATION_CACHE_SQLITE_PATH = getenv('OPTIMIZATION_CACHE_SQLITE_PATH')
+
+    # respostas de GET /optimizations/{nome}: a camada local vale poucos segundos porque outros workers
+    # não conseguem invalidá-la; 'redis' (ou 'memory', o substituto local) adiciona a camada compartilhada
+    RESPONSE_CACHE_BACKEND = getenv('RESPONSE_CACHE_BACKEND', 'inprocess')
+    RESPONSE_CACHE_REDIS_URL = getenv('RESPONSE_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    RESPONSE_CACHE_SIZE = int(getenv('RESPONSE_CACHE_SIZE', 10000))
+    RESPONSE_CACHE_LOCAL_TTL_SECONDS = float(getenv('RESPONSE_CACHE_LOCAL_TTL_SECONDS', 5))
+    RESPONSE_CACHE_TTL_SECONDS = float(getenv('RESPONSE_CACHE_TTL_SECONDS', 300))
+
+    OPTIMIZATION_ENGINE = getenv('OPTIMIZATION_ENGINE', 'polynomial')
+    POLY_ENGINE_TOLERANCE = float(getenv('POLY_ENGINE_TOLERANCE', 1e-9))
+
+    SOLVER_WORKERS = int(getenv('SOLVER_WORKERS', 0)) or cpu_count() or 1
+    SOLVER_START_METHOD = getenv('SOLVER_START_METHOD', 'forkserver')
+    SOLVER_TIMEOUT_SECONDS = float(getenv('SOLVER_TIMEOUT_SECONDS', 10))
+    SOLVER_MEMORY_LIMIT_MB = int(getenv('SOLVER_MEMORY_LIMIT_MB', 1024))
+    THREAD_POOL_WORKERS = int(getenv('THREAD_POOL_WORKERS', 0)) or min(32, (cpu_count() or 1) + 4)
+    APPROXIMATION_TIMEOUT_SECONDS = float(getenv('APPROXIMATION_TIMEOUT_SECONDS', 5))
+
+    NUMERIC_MIN_PRICE = float(getenv('NUMERIC_MIN_PRICE', 1e-6))
+    NUMERIC_MAX_PRICE = float(getenv('NUMERIC_MAX_PRICE', 1e6))
+    NUMERIC_GRID_POINTS = int(getenv('NUMERIC_GRID_POINTS', 2048))
+    NUMERIC_CANDIDATES = int(getenv('NUMERIC_CANDIDATES', 8))
+    NUMERIC_TOLERANCE = float(getenv('NUMERIC_TOLERANCE', 1e-12))
+    NUMERIC_MAX_ITERATIONS = int(getenv('NUMERIC_MAX_ITERATIONS', 100))
+
+    EXPRESSION_MAX_LENGTH = int(getenv('EXPRESSION_MAX_LENGTH', 1000))
+    EXPRESSION_MAX_NODES = int(getenv('EXPRESSION_MAX_NODES', 400))
+    EXPRESSION_MAX_DEPTH = int(getenv('EXPRESSION_MAX_DEPTH', 40))
+    EXPRESSION_MAX_EXPONENT = int(getenv('EXPRESSION_MAX_EXPONENT', 50))
+    EXPRESSION_MAX_DEGREE = int(getenv('EXPRESSION_MAX_DEGREE', 60))
+    EXPRESSION_CACHE_SIZE = int(getenv('EXPRESSION_CACHE_SIZE', 4096))
+    BATCH_MAX_ITEMS = int(getenv('BATCH_MAX_ITEMS', 5000))
+
+    JOB_QUEUE_BACKEND = getenv('JOB_QUEUE_BACKEND', 'inprocess')
+    JOB_WORKERS = int(getenv('JOB_WORKERS', 2))
+    JOB_POLL_INTERVAL_SECONDS = float(getenv('JOB_POLL_INTERVAL_SECONDS', 1.0))
+    JOB_LEASE_SECONDS = float(getenv('JOB_LEASE_SECONDS', 120))
+    JOB_EVENTS_TIMEOUT_SECONDS = float(getenv('JOB_EVENTS_TIMEOUT_SECONDS', 300))
+
+    COMPILED_MODEL_CACHE_SIZE = int(getenv('COMPILED_MODEL_CACHE_SIZE', 256))
+
+    GRAPH_STORE_BACKEND = getenv('GRAPH_STORE_BACKEND', 'local')
+    GRAPH_STORE_DIR = getenv('GRAPH_STORE_DIR', 'graph_store')
+    GRAPH_CACHE_MAX_AGE_SECONDS = int(getenv('GRAPH_CACHE_MAX_AGE_SECONDS', 86400))
+    GRAPH_SERIES_POINTS = int(getenv('GRAPH_SERIES_POINTS', 256))
+    GRAPH_SERIES_SAMPLES = int(getenv('GRAPH_SERIES_SAMPLES', 4096))
+
+    UPLOAD_BACKEND = getenv('UPLOAD_BACKEND', 'cloudinary')
+    UPLOAD_DIR = getenv('UPLOAD_DIR', 'uploads')
+    UPLOAD_MAX_CONCURRENCY = int(getenv('UPLOAD_MAX_CONCURRENCY', 8))
+    UPLOAD_MAX_RETRIES = int(getenv('UPLOAD_MAX_RETRIES', 3))
+    UPLOAD_TIMEOUT_SECONDS = float(getenv('UPLOAD_TIMEOUT_SECONDS', 30))
+    UPLOAD_BACKOFF_SECONDS = float(getenv('UPLOAD_BACKOFF_SECONDS', 0.5))
+
+    DB_POOL_SIZE = int(getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_PRE_PING = getenv('DB_POOL_PRE_PING', 'false').lower() == 'true'
+    DB_STATEMENT_CACHE_SIZE = int(getenv('DB_STATEMENT_CACHE_SIZE', 100))
+
+    LIST_DEFAULT_LIMIT = int(getenv('LIST_DEFAULT_LIMIT', 50))
+    LIST_MAX_LIMIT = int(getenv('LIST_MAX_LIMIT', 500))
+
+    EXPORT_BATCH_SIZE = int(getenv('EXPORT_BATCH_SIZE', 1000))
+
+    SWEEP_DEFAULT_POINTS = int(getenv('SWEEP_DEFAULT_POINTS', 1000))
+    SWEEP_MAX_POINTS = int(getenv('SWEEP_MAX_POINTS', 2000000))
+
+    SCENARIO_MAX_SETS = int(getenv('SCENARIO_MAX_SETS', 1000000))
+    SCENARIO_BATCH_SIZE = int(getenv('SCENARIO_BATCH_SIZE', 65536))
+    SCENARIO_CACHE_SIZE = int(getenv('SCENARIO_CACHE_SIZE', 64))
+
+    MULTI_PRODUCT_MAX_PRODUCTS = int(getenv('MULTI_PRODUCT_MAX_PRODUCTS', 2000))
+    MULTI_PRODUCT_MAX_CONSTRAINTS = int(getenv('MULTI_PRODUCT_MAX_CONSTRAINTS', 16))
+    MULTI_PRODUCT_MAX_TEMPLATES = int(getenv('MULTI_PRODUCT_MAX_TEMPLATES', 16))
+    MULTI_PRODUCT_GRID_POINTS = int(getenv('MULTI_PRODUCT_GRID_POINTS', 256))
+    MULTI_PRODUCT_CACHE_SIZE = int(getenv('MULTI_PRODUCT_CACHE_SIZE', 256))
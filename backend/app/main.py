@@ -1,10 +1,48 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+import anyio.to_thread
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.database.connection import engine
+from app.core.executors import get_password_pool, get_solver_pool, get_thread_pool, shutdown_executors, thread_pool_queue_depth
+from app.core.metrics import MetricsMiddleware, metrics
+from app.core.settings import Settings
 from app.routers.auth_router import auth_router
-import uvicorn
 from app.routers.optimization_router import optimization_router
+from app.schemas import OptimizationRequest
+from app.services.compiled_model import compiled_models
+from app.services.file_service import FileService
+from app.services.optimization_calc import WARMUP_REQUEST, OptimizationCalc
+from app.services.optimization_cache import optimization_cache
+from app.services.optimization_service import job_queue
+from app.services.response_cache import response_cache
+from app.services.token_cache import token_cache
 
-app = FastAPI()
+async def warmup():
+    # o servidor só aceita conexões depois do startup: a primeira requisição já encontra tudo quente
+    try:
+        await asyncio.to_thread(OptimizationCalc.warmup)
+        await get_solver_pool().prestart(OptimizationCalc.calculate_optimal_price, OptimizationRequest(**WARMUP_REQUEST))
+    except Exception as error:
+        logging.error("Error warming up: %s", error)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    asyncio.get_running_loop().set_default_executor(get_thread_pool())
+    if Settings.WARMUP_ON_STARTUP:
+        await warmup()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await FileService.close()
+    await response_cache.close()
+    shutdown_executors()
+    await engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,7 +60,63 @@ def home():
 
 @app.get('/health')
 def health_check():
-    return {'status': 'healthy'}
+    return {
+        'status': 'healthy',
+        'caches': {
+            'compiled_models': compiled_models.stats(),
+            'optimizations': optimization_cache.stats(),
+            'auth_tokens': token_cache.stats(),
+            'responses': response_cache.stats(),
+        },
+        'solver': get_solver_pool().stats(),
+        'password_hashing': get_password_pool().stats()
+    }
+
+CACHE_HIT_RATE = metrics.gauge('cache_hit_rate', 'Hit rate of in-process caches', ('cache',))
+CACHE_ENTRIES = metrics.gauge('cache_entries', 'Entries held by in-process caches', ('cache',))
+CACHE_BYTES = metrics.gauge('cache_approximate_bytes', 'Approximate memory held by in-process caches', ('cache',))
+DB_POOL_CONNECTIONS = metrics.gauge('db_pool_connections', 'Database pool connections by state', ('state',))
+THREAD_POOL_QUEUE = metrics.gauge('thread_pool_queue_depth', 'Work items waiting for a worker thread', ('pool',))
+SOLVER_WORKERS = metrics.gauge('solver_workers', 'Solver worker processes by state', ('state',))
+SOLVER_EVENTS = metrics.gauge('solver_events', 'Solver worker timeouts and restarts since startup', ('event',))
+
+def collect_runtime_metrics():
+    compiled_stats = compiled_models.stats()
+    caches = (
+        ('compiled_models', compiled_stats),
+        ('optimizations', optimization_cache.stats()),
+        ('auth_tokens', token_cache.stats()),
+        ('responses', response_cache.stats()),
+    )
+    for name, stats in caches:
+        CACHE_HIT_RATE.set(stats['hit_rate'], cache=name)
+        CACHE_ENTRIES.set(stats['size'], cache=name)
+    CACHE_BYTES.set(compiled_stats['approximate_bytes'], cache='compiled_models')
+
+    pool = engine.sync_engine.pool
+    DB_POOL_CONNECTIONS.set(pool.checkedout(), state='checked_out')
+    DB_POOL_CONNECTIONS.set(pool.checkedin(), state='idle')
+    DB_POOL_CONNECTIONS.set(max(pool.overflow(), 0), state='overflow')
+
+    THREAD_POOL_QUEUE.set(thread_pool_queue_depth(), pool='default')
+    # dependências síncronas do FastAPI rodam no limiter do anyio, não no executor padrão
+    password_pool = get_password_pool()
+    THREAD_POOL_QUEUE.set(max(password_pool.pending - password_pool.workers, 0), pool='password_hash')
+    THREAD_POOL_QUEUE.set(anyio.to_thread.current_default_thread_limiter().statistics().tasks_waiting, pool='anyio')
+
+    solver = get_solver_pool().stats()
+    SOLVER_WORKERS.set(solver['alive'], state='alive')
+    SOLVER_WORKERS.set(solver['waiting'], state='waiting_requests')
+    SOLVER_EVENTS.set(solver['timeouts'], event='timeout')
+    SOLVER_EVENTS.set(solver['restarts'], event='restart')
+
+metrics.register_collector(collect_runtime_metrics)
+
+@app.get('/metrics')
+async def metrics_endpoint():
+    return Response(content=metrics.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
     
 if __name__ == "__main__":
+    # desenvolvimento (reload); em produção use python -m app.server
+    import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -1,11 +1,17 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Boolean, Column, String, Float, DateTime, ForeignKey, LargeBinary, Text, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.orm import declarative_base, deferred, relationship
 
 Base = declarative_base()
 
+class OptimizationStatus:
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
 class User(Base):
     __tablename__ = 'users'
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False, unique=True)
@@ -19,14 +25,28 @@ class User(Base):
 
 class PriceOptimization(Base):
     __tablename__ = 'price_optimizations'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'optimization_name', name='uq_price_optimizations_user_name'),
+        Index('ix_price_optimizations_user_created', 'user_id', 'created_at', 'id'),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False, unique=True)
     optimization_name = Column(String, nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
     cost_function = Column(Text, nullable=False)
     demand_function = Column(Text, nullable=False)
+    expression_hash = Column(String(64), nullable=True)
     optimal_price = Column(Float, nullable=True)
     max_profit = Column(Float, nullable=True)
     graph_image_url = Column(String, nullable=True)
+    # float32 (preço, custo, receita, lucro) x GRAPH_SERIES_POINTS; adiado: só o endpoint de dados do gráfico lê o blob
+    graph_series = deferred(Column(LargeBinary, nullable=True))
+    status = Column(String, nullable=False, default=OptimizationStatus.DONE)
+    error = Column(Text, nullable=True)
+    approximate = Column(Boolean, nullable=False, default=False)
+    # método pedido no cálculo (auto, symbolic, numeric): uma atualização com outro método recalcula
+    method = Column(String, nullable=False, default='auto')
+    # início do lease do job em execução: RUNNING com lease vencido volta para PENDING
+    started_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False) 
     user = relationship("User", back_populates="optimizations")
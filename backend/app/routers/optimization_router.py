@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
 from uuid import UUID
 import logging
 
-from app.schemas import OptimizationRequest, OptimizationResponse, StandartOutput
+from app.schemas import BatchOptimizationRequest, BatchOptimizationResponse, GraphDataResponse, JobAccepted, JobStatus, MultiProductRequest, MultiProductResponse, OptimizationPage, OptimizationPatch, OptimizationRequest, OptimizationResponse, ScenarioRequest, ScenarioResponse, StandartOutput, SweepRequest, SweepResponse
+from app.core.settings import Settings
 from app.services.auth_service import AuthService
 from app.services.optimization_service import OptimizationService
 
@@ -19,17 +22,136 @@ async def make_optimization(dto: OptimizationRequest, user_id: UUID = Depends(Au
         logging.error("Error in make_optimization: %s", error)
         raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
 
+@optimization_router.post('/batch', response_model=BatchOptimizationResponse)
+async def make_batch_optimization(dto: BatchOptimizationRequest, user_id: UUID = Depends(AuthService.validate_user_auth)):
+    try:
+        return await OptimizationService.make_batch_optimization(user_id, dto)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        logging.error("Error in make_batch_optimization: %s", error)
+        raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
+
+@optimization_router.post('/scenarios', response_model=ScenarioResponse)
+async def run_scenarios(dto: ScenarioRequest, user_id: UUID = Depends(AuthService.validate_user_auth)):
+    try:
+        return await OptimizationService.run_scenarios(dto)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        logging.error("Error in run_scenarios: %s", error)
+        raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
+
+@optimization_router.post('/multi-product', response_model=MultiProductResponse)
+async def run_multi_product(dto: MultiProductRequest, user_id: UUID = Depends(AuthService.validate_user_auth)):
+    try:
+        return await OptimizationService.run_multi_product(dto)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        logging.error("Error in run_multi_product: %s", error)
+        raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
+
+@optimization_router.post('/jobs', response_model=JobAccepted, status_code=202)
+async def submit_optimization_job(dto: OptimizationRequest, user_id: UUID = Depends(AuthService.validate_user_auth)):
+    try:
+        return await OptimizationService.submit_optimization_job(user_id, dto)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        logging.error("Error in submit_optimization_job: %s", error)
+        raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
+
+@optimization_router.get('/jobs/{job_id}', response_model=JobStatus)
+async def get_job_status(job_id: UUID, user_id: UUID = Depends(AuthService.validate_user_auth)):
+    try:
+        return await OptimizationService.get_job_status(user_id, job_id)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        logging.error("Error in get_job_status: %s", error)
+        raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
+
+@optimization_router.get('/jobs/{job_id}/events')
+async def stream_job_events(job_id: UUID, user_id: UUID = Depends(AuthService.validate_user_auth)):
+    try:
+        await OptimizationService.get_job_status(user_id, job_id)
+        return StreamingResponse(
+            OptimizationService.stream_job_events(user_id, job_id),
+            media_type='text/event-stream',
+            headers={'Cache-Control': 'no-cache'}
+        )
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        logging.error("Error in stream_job_events: %s", error)
+        raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
+
+@optimization_router.get('/export')
+async def export_optimizations(
+    export_format: Literal['ndjson', 'csv'] = Query(default='ndjson', alias='format'),
+    accept_encoding: Optional[str] = Header(default=None),
+    user_id: UUID = Depends(AuthService.validate_user_auth)
+):
+    try:
+        media_type = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+        headers = {
+            'Content-Disposition': f'attachment; filename="optimizations.{export_format}"',
+            'Vary': 'Accept-Encoding'
+        }
+        content = OptimizationService.export_optimizations(user_id, export_format)
+        
+        if OptimizationService.accepts_gzip(accept_encoding):
+            headers['Content-Encoding'] = 'gzip'
+            content = OptimizationService.gzip_stream(content)
+        
+        return StreamingResponse(content, media_type=media_type, headers=headers)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        logging.error("Error in export_optimizations: %s", error)
+        raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
+
 @optimization_router.get('/{optimization_name}', response_model=OptimizationResponse)
-async def get_optimization(optimization_name: str, user_id: UUID = Depends(AuthService.validate_user_auth)):
+async def get_optimization(optimization_name: str, if_none_match: Optional[str] = Header(default=None), user_id: UUID = Depends(AuthService.validate_user_auth)):
     try:
-        optimization = await OptimizationService.get_optimization(user_id, optimization_name)
-        return optimization
+        return await OptimizationService.get_optimization(user_id, optimization_name, if_none_match)
     except HTTPException as error:
         raise error
     except Exception as error:
         logging.error("Error in get_optimization: %s", error)
         raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
     
+@optimization_router.get('/{optimization_name}/graph')
+async def get_optimization_graph(optimization_name: str, if_none_match: Optional[str] = Header(default=None), user_id: UUID = Depends(AuthService.validate_user_auth)):
+    try:
+        return await OptimizationService.get_optimization_graph(user_id, optimization_name, if_none_match)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        logging.error("Error in get_optimization_graph: %s", error)
+        raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
+    
+@optimization_router.get('/{optimization_name}/graph/data', response_model=GraphDataResponse)
+async def get_optimization_graph_data(optimization_name: str, if_none_match: Optional[str] = Header(default=None), user_id: UUID = Depends(AuthService.validate_user_auth)):
+    try:
+        return await OptimizationService.get_optimization_graph_data(user_id, optimization_name, if_none_match)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        logging.error("Error in get_optimization_graph_data: %s", error)
+        raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
+    
+@optimization_router.post('/{optimization_name}/sweep', response_model=SweepResponse)
+async def sweep_optimization(optimization_name: str, dto: SweepRequest, user_id: UUID = Depends(AuthService.validate_user_auth)):
+    try:
+        return await OptimizationService.sweep_optimization(user_id, optimization_name, dto)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        logging.error("Error in sweep_optimization: %s", error)
+        raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
+    
 @optimization_router.put('/{optimization_name}', response_model=StandartOutput, status_code=201)
 async def update_optimization(optimization_name: str, dto: OptimizationRequest, user_id: UUID = Depends(AuthService.validate_user_auth)):
     try:
@@ -41,10 +163,30 @@ async def update_optimization(optimization_name: str, dto: OptimizationRequest,
         logging.error("Error in update_optimization: %s", error)
         raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
     
-@optimization_router.get('/', response_model=list[OptimizationRequest])
-async def list_optimizations(user_id: UUID = Depends(AuthService.validate_user_auth)):
+@optimization_router.patch('/{optimization_name}', response_model=StandartOutput)
+async def patch_optimization(optimization_name: str, dto: OptimizationPatch, user_id: UUID = Depends(AuthService.validate_user_auth)):
+    try:
+        return await OptimizationService.patch_optimization(user_id, optimization_name, dto)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        logging.error("Error in patch_optimization: %s", error)
+        raise HTTPException(status_code=500, detail='Something went wrong. Please try again later.')
+    
+@optimization_router.get('/', response_model=OptimizationPage)
+async def list_optimizations(
+    limit: int = Query(default=Settings.LIST_DEFAULT_LIMIT, ge=1, le=Settings.LIST_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    order: Literal['asc', 'desc'] = 'asc',
+    name_prefix: Optional[str] = None,
+    min_profit: Optional[float] = None,
+    max_profit: Optional[float] = None,
+    user_id: UUID = Depends(AuthService.validate_user_auth)
+):
     try:
-        optimizations = await OptimizationService.list_optimizations(user_id)
+        optimizations = await OptimizationService.list_optimizations(
+            user_id, limit, cursor, order, name_prefix, min_profit, max_profit
+        )
         return optimizations
     except HTTPException as error:
         raise error
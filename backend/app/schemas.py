@@ -1,7 +1,12 @@
 
-from pydantic import BaseModel, field_validator
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from datetime import datetime
+from typing import Literal, Optional
+from uuid import UUID
 import re
+from app.core.settings import Settings
+from app.services.expression_limits import ExpressionLimits
+from app.services.expression_parser import ExpressionParser
 
 
 class LoginRequest(BaseModel):
@@ -24,67 +29,255 @@ class OptimizationRequest(BaseModel):
     optimization_name: str
     cost_function: str
     demand_function: str
+    method: Literal['auto', 'symbolic', 'numeric'] = 'auto'
     
     @field_validator('cost_function')
     @classmethod
     def validate_cost_function(cls, v: str) -> str:
-        v_clean = v.replace(' ', '')
+        # tokenizer/parser próprio: sintaxe, identificadores e aninhamento, sem sympy nem eval
+        parsed = ExpressionParser.parse(v)
+        ExpressionParser.check_names(parsed, ('q',))
         
-        if not v_clean:
-            raise ValueError("A função não pode estar vazia")
-        
-        if 'q' not in v_clean.lower():
+        if 'q' not in parsed.names:
             raise ValueError("A função de custo deve conter a variável 'q'")
         
-        # números, q, operadores matemáticos básicos, parênteses
-        pattern = r'^[0-9q\+\-\*/\(\)\.\s\*\*]+$'
-        if not re.match(pattern, v_clean, re.IGNORECASE):
-            raise ValueError(
-                "A função contém caracteres inválidos. "
-                "Use apenas números, 'q', +, -, *, /, ** e parênteses"
-            )
-        
-        if v_clean.count('(') != v_clean.count(')'):
-            raise ValueError("Parênteses desbalanceados na função")
-        
         return v
     
     @field_validator('demand_function')
     @classmethod
     def validate_demand_function(cls, v: str) -> str:
-        v_clean = v.replace(' ', '')
-        
-        if not v_clean:
-            raise ValueError("A função não pode estar vazia")
+        # tokenizer/parser próprio: sintaxe, identificadores e aninhamento, sem sympy nem eval
+        parsed = ExpressionParser.parse(v)
+        ExpressionParser.check_names(parsed, ('p',))
         
-        if 'p' not in v_clean.lower():
+        if 'p' not in parsed.names:
             raise ValueError("A função de demanda deve conter a variável 'p'")
         
-        # números, p, operadores matemáticos básicos, parênteses
-        pattern = r'^[0-9p\+\-\*/\(\)\.\s\*\*]+$'
-        if not re.match(pattern, v_clean, re.IGNORECASE):
-            raise ValueError(
-                "A função contém caracteres inválidos. "
-                "Use apenas números, 'p', +, -, *, /, ** e parênteses"
-            )
-        
-        if v_clean.count('(') != v_clean.count(')'):
-            raise ValueError("Parênteses desbalanceados na função")
-        
         return v
+    
+    @model_validator(mode='after')
+    def validate_complexity(self) -> 'OptimizationRequest':
+        # limites estáticos baratos antes de qualquer trabalho simbólico
+        ExpressionLimits.check(self.cost_function, self.demand_function)
+        return self
+
+class OptimizationPatch(BaseModel):
+    # PATCH: só os campos enviados mudam; a validação completa roda sobre o resultado mesclado
+    optimization_name: Optional[str] = None
+    cost_function: Optional[str] = None
+    demand_function: Optional[str] = None
+    method: Optional[Literal['auto', 'symbolic', 'numeric']] = None
+    
+    @field_validator('cost_function')
+    @classmethod
+    def validate_cost_function(cls, v: Optional[str]) -> Optional[str]:
+        return v if v is None else OptimizationRequest.validate_cost_function(v)
+    
+    @field_validator('demand_function')
+    @classmethod
+    def validate_demand_function(cls, v: Optional[str]) -> Optional[str]:
+        return v if v is None else OptimizationRequest.validate_demand_function(v)
 
 class OptimizationInfo(BaseModel):
     optimal_price: float
     max_profit: float
     profit_function: Optional[str] = None
+    approximate: bool = False
 
 class OptimizationResponse(BaseModel):
     optimization_name: str
-    optimal_price: float
+    optimal_price: Optional[float] = None
     cost_function: str
     demand_function: str
+    max_profit: Optional[float] = None
+    graph_image_url: Optional[str] = None
+    graph_data_url: Optional[str] = None
+    status: str = 'done'
+    approximate: bool = False
+
+class GraphDataResponse(BaseModel):
+    # séries float32 little-endian em base64, alinhadas ponto a ponto: price[i], cost[i], revenue[i], profit[i]
+    points: int
+    dtype: str = 'float32'
+    encoding: str = 'base64'
+    optimal_price: float
     max_profit: float
+    series: dict[str, str]
+
+class OptimizationSummary(BaseModel):
+    optimization_name: str
+    cost_function: str
+    demand_function: str
+    optimal_price: Optional[float] = None
+    max_profit: Optional[float] = None
+    status: str
+    created_at: datetime
+
+class OptimizationPage(BaseModel):
+    items: list[OptimizationSummary]
+    next_cursor: Optional[str] = None
+
+class SweepRequest(BaseModel):
+    min_price: Optional[float] = Field(default=None, ge=0)
+    max_price: Optional[float] = Field(default=None, gt=0)
+    points: int = Field(default=Settings.SWEEP_DEFAULT_POINTS, ge=2, le=Settings.SWEEP_MAX_POINTS)
+    profit_tolerance_pct: float = Field(default=5.0, ge=0, le=100)
+    summary_only: bool = False
+
+class SweepSummary(BaseModel):
+    grid_optimal_price: float
+    grid_max_profit: float
+    elasticity_at_optimum: Optional[float] = None
+    profit_range_min_price: float
+    profit_range_max_price: float
+    min_profit: float
+    min_demand: float
+    max_demand: float
+
+class SweepResponse(BaseModel):
+    points: int
+    dtype: str = 'float32'
+    encoding: str = 'base64'
+    summary: SweepSummary
+    series: Optional[dict[str, str]] = None
+
+class ScenarioRequest(BaseModel):
+    cost_function: str
+    demand_function: str
+    parameters: dict[str, list[float]]
+    method: Literal['auto', 'closed_form', 'numeric'] = 'auto'
+    
+    @model_validator(mode='after')
+    def validate_template(self) -> 'ScenarioRequest':
+        for name in self.parameters:
+            if not re.fullmatch(r'[a-z][a-z0-9_]*', name) or name in ('p', 'q'):
+                raise ValueError(f"Nome de parâmetro inválido: '{name}'")
+        
+        sizes = {len(values) for values in self.parameters.values()}
+        if len(sizes) > 1:
+            raise ValueError("Todos os parâmetros devem ter a mesma quantidade de valores")
+        if sizes and max(sizes) > Settings.SCENARIO_MAX_SETS:
+            raise ValueError(f"No máximo {Settings.SCENARIO_MAX_SETS} combinações de parâmetros por requisição")
+        
+        for function, variable in ((self.cost_function, 'q'), (self.demand_function, 'p')):
+            # números, a variável, parâmetros declarados, operadores e parênteses
+            ExpressionParser.check_names(ExpressionParser.parse(function), {*self.parameters, variable}, required=variable)
+        
+        # mesmos limites estáticos das otimizações: tamanho, expoentes e grau em q e p
+        ExpressionLimits.check(self.cost_function, self.demand_function)
+        
+        return self
+
+class ScenarioResponse(BaseModel):
+    count: int
+    feasible: int
+    method: str
+    elapsed_ms: float
+    dtype: str = 'float32'
+    encoding: str = 'base64'
+    series: dict[str, str]
+
+class ProductSpec(BaseModel):
+    name: str
+    cost_function: str
+    demand_function: str
+    
+    @field_validator('cost_function')
+    @classmethod
+    def validate_cost_function(cls, v: str) -> str:
+        return OptimizationRequest.validate_cost_function(v)
+    
+    @field_validator('demand_function')
+    @classmethod
+    def validate_demand_function(cls, v: str) -> str:
+        return OptimizationRequest.validate_demand_function(v)
+    
+    @model_validator(mode='after')
+    def validate_complexity(self) -> 'ProductSpec':
+        ExpressionLimits.check(self.cost_function, self.demand_function)
+        return self
+
+class CapacityConstraint(BaseModel):
+    # soma ponderada de Q_i(p_i) (quantity) ou de C_i(Q_i(p_i)) (cost) limitada por limit
+    kind: Literal['quantity', 'cost']
+    limit: float = Field(ge=0)
+    weights: Optional[dict[str, float]] = None  # None: peso 1 para todos os produtos
+
+class MultiProductRequest(BaseModel):
+    products: list[ProductSpec] = Field(min_length=1)
+    constraints: list[CapacityConstraint] = Field(default_factory=list)
+    
+    @model_validator(mode='after')
+    def validate_references(self) -> 'MultiProductRequest':
+        if len(self.products) > Settings.MULTI_PRODUCT_MAX_PRODUCTS:
+            raise ValueError(f"No máximo {Settings.MULTI_PRODUCT_MAX_PRODUCTS} produtos por requisição")
+        if len(self.constraints) > Settings.MULTI_PRODUCT_MAX_CONSTRAINTS:
+            raise ValueError(f"No máximo {Settings.MULTI_PRODUCT_MAX_CONSTRAINTS} restrições por requisição")
+        
+        names = [product.name for product in self.products]
+        if len(set(names)) != len(names):
+            raise ValueError("Os nomes dos produtos devem ser únicos")
+        
+        for constraint in self.constraints:
+            unknown = set(constraint.weights or {}) - set(names)
+            if unknown:
+                raise ValueError(f"Produtos desconhecidos na restrição: {', '.join(sorted(unknown))}")
+            if any(weight < 0 for weight in (constraint.weights or {}).values()):
+                raise ValueError("Os pesos das restrições não podem ser negativos")
+        
+        return self
+
+class ProductResult(BaseModel):
+    name: str
+    optimal_price: float
+    quantity: float
+    cost: float
+    profit: float
+
+class ConstraintResult(BaseModel):
+    kind: str
+    limit: float
+    usage: float
+    shadow_price: float
+    binding: bool
+
+class MultiProductResponse(BaseModel):
+    total_profit: float
+    products: list[ProductResult]
+    constraints: list[ConstraintResult]
+    templates: int
+    elapsed_ms: float
+
+class JobAccepted(BaseModel):
+    job_id: UUID
+    status: str
+    status_url: str
+
+class JobStatus(BaseModel):
+    job_id: UUID
+    optimization_name: str
+    status: str
+    error: Optional[str] = None
+    optimal_price: Optional[float] = None
+    max_profit: Optional[float] = None
     graph_image_url: Optional[str] = None
+    approximate: bool = False
+
+class BatchOptimizationRequest(BaseModel):
+    items: list[OptimizationRequest] = Field(min_length=1, max_length=Settings.BATCH_MAX_ITEMS)
+
+class BatchItemResult(BaseModel):
+    optimization_name: str
+    status_code: int
+    detail: str
+    optimal_price: Optional[float] = None
+    max_profit: Optional[float] = None
+    approximate: bool = False
+
+class BatchOptimizationResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[BatchItemResult]
 
 class StandartOutput(BaseModel):
     status_code:int
@@ -0,0 +1,42 @@
+import argparse
+import os
+from importlib.util import find_spec
+from os import cpu_count
+import uvicorn
+from app.core.settings import Settings
+
+
+def _available(module: str) -> bool:
+    return find_spec(module) is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor de produção da API de otimização de preços')
+    parser.add_argument('--host', default=Settings.SERVER_HOST)
+    parser.add_argument('--port', type=int, default=Settings.SERVER_PORT)
+    parser.add_argument('--workers', type=int, default=Settings.SERVER_WORKERS)
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # cada worker da API sobe o próprio pool do solver: divide os núcleos em vez de multiplicá-los
+        os.environ.setdefault('SOLVER_WORKERS', str(max(1, (cpu_count() or 1) // args.workers)))
+
+    # uvloop e httptools são opcionais (uvicorn[standard]); sem eles ficam o asyncio e o h11
+    loop = 'uvloop' if _available('uvloop') else 'asyncio'
+    http = 'httptools' if _available('httptools') else 'h11'
+
+    uvicorn.run(
+        'app.main:app',
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        lifespan='on',
+        access_log=Settings.SERVER_ACCESS_LOG,
+        timeout_graceful_shutdown=Settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -2,15 +2,25 @@ from datetime import datetime, timedelta
 from app.core.database.connection import async_session
 from app.schemas import LoginRequest, Token, RegisterRequest
 from sqlalchemy.future import select
-from sqlalchemy import or_
+from sqlalchemy import or_, update
 from app.models import User
-from app.core.security import bcrypt_context, oauth2_bearer
+from app.core.executors import ExecutorSaturatedError, get_password_pool
+from app.core.security import InvalidTokenError, bcrypt_context, decode_token, oauth2_bearer
 from app.core.settings import Settings
 from fastapi import HTTPException, Depends
-from jose import jwt, JWTError
+from app.services.token_cache import token_cache
+from jose import jwt
 from uuid import UUID
 class AuthService:
 
+    @staticmethod
+    async def _password_task(func, *args):
+        try:
+            return await get_password_pool().run(func, *args)
+        except ExecutorSaturatedError:
+            raise HTTPException(status_code=503, detail='Too many authentication requests. Please try again later.', headers={'Retry-After': '1'})
+
+
     @staticmethod
     async def login(dto:LoginRequest):
         async with async_session() as session:
@@ -18,10 +28,22 @@ class AuthService:
             result = await session.execute(select(User).where(or_(User.username == dto.login, User.email == dto.login)))
             user = result.scalar_one_or_none()
 
-            if not user or not bcrypt_context.verify(dto.password, user.password):
-                raise HTTPException(status_code=404,detail='invalid credentials.')
+        # a verificação (100-300 ms de CPU) roda fora do event loop e sem segurar conexão do pool
+        if not user:
+            raise HTTPException(status_code=404,detail='invalid credentials.')
+
+        valid, new_hash = await AuthService._password_task(bcrypt_context.verify_and_update, dto.password, user.password)
+
+        if not valid:
+            raise HTTPException(status_code=404,detail='invalid credentials.')
+
+        if new_hash:
+            # BCRYPT_ROUNDS mudou desde o cadastro: regrava o hash com o custo atual
+            async with async_session() as session:
+                await session.execute(update(User).where(User.id == user.id).values(password=new_hash))
+                await session.commit()
             
-            return AuthService.build_JWT(str(user.id), user.username)
+        return AuthService.build_JWT(str(user.id), user.username)
 
 
     async def register(dto:RegisterRequest):
@@ -30,10 +52,14 @@ class AuthService:
             result = await session.execute(select(User).where(or_(User.username == dto.username, User.email == dto.email)))
             existing_user = result.scalar_one_or_none()
 
-            if existing_user:
-                raise HTTPException(status_code=409, detail='username or email are already been used')
+        if existing_user:
+            raise HTTPException(status_code=409, detail='username or email are already been used')
+
+        password = await AuthService._password_task(bcrypt_context.hash, dto.password)
+
+        async with async_session() as session:
             
-            user = User(username=dto.username, email=dto.email, password=bcrypt_context.hash(dto.password))
+            user = User(username=dto.username, email=dto.email, password=password)
             session.add(user)
 
             await session.commit()
@@ -43,19 +69,27 @@ class AuthService:
             return AuthService.build_JWT(str(user.id), user.username)
 
 
-    def validate_user_auth(token:str = Depends(oauth2_bearer)) -> UUID:
+    async def validate_user_auth(token:str = Depends(oauth2_bearer)) -> UUID:
+        # async: roda direto no event loop, sem passar pelo threadpool a cada requisição
+        user_id = token_cache.get(token)
+        if user_id is not None:
+            return user_id
+
         try:
 
-            payload = jwt.decode(token=token, key= Settings.SECRET_KEY, algorithms=[Settings.ALGORITHM])
-            user_id = payload.get('subject')
+            payload = decode_token(token)
+            subject = payload.get('subject')
 
-            if not user_id:
+            if not subject:
                 raise HTTPException(401, 'invalid token')
             
-            return UUID(user_id)
+            user_id = UUID(subject)
         
-        except JWTError:
+        except (InvalidTokenError, ValueError):
             raise HTTPException(401, 'invalid token')
+
+        token_cache.set(token, user_id, payload.get('exp'))
+        return user_id
      
         
     def build_JWT(user_id:str, username:str):
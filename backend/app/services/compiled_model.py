@@ -0,0 +1,151 @@
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from hashlib import sha256
+from typing import Callable
+import sympy as sp
+from app.core.settings import Settings
+from app.services.expression_limits import ExpressionLimits
+from app.services.expression_parser import ExpressionParser
+
+
+class CompiledModel:
+
+    p = sp.Symbol('p')  # preço
+    q = sp.Symbol('q')  # quantidade
+
+    def __init__(self, cost_function: str, demand_function: str):
+        self.cost_function = cost_function
+        self.demand_function = demand_function
+
+        ExpressionLimits.check(cost_function, demand_function)
+
+        self.cost_expr = ExpressionParser.to_sympy(cost_function, {'q': self.q})  # C(q)
+        self.demand = ExpressionParser.to_sympy(demand_function, {'p': self.p})   # Q(p)
+
+        # C(Q(p))
+        self.cost = self.cost_expr.subs(self.q, self.demand)
+
+        # Receita: R(p) = p · Q(p)
+        self.revenue = self.p * self.demand
+
+        # Lucro: L(p) = R(p) - C(Q(p))
+        self.profit = self.revenue - self.cost
+
+    @cached_property
+    def canonical_key(self) -> str:
+        # a forma canônica do sympy ordena os termos: '2*q + 10' e '10+2*q' geram a mesma árvore
+        canonical = f'{sp.srepr(self.cost_expr)}|{sp.srepr(self.demand)}'
+        return sha256(canonical.encode()).hexdigest()
+
+    @cached_property
+    def profit_derivative(self) -> sp.Expr:
+        return sp.diff(self.profit, self.p)
+
+    @cached_property
+    def second_derivative(self) -> sp.Expr:
+        return sp.diff(self.profit_derivative, self.p)
+
+    @cached_property
+    def numeric_functions(self) -> tuple[Callable, Callable, Callable]:
+        return (
+            sp.lambdify(self.p, self.cost, 'numpy'),
+            sp.lambdify(self.p, self.revenue, 'numpy'),
+            sp.lambdify(self.p, self.profit, 'numpy'),
+        )
+
+    @cached_property
+    def demand_functions(self) -> tuple[Callable, Callable]:
+        return (
+            sp.lambdify(self.p, self.demand, 'numpy'),
+            sp.lambdify(self.p, sp.diff(self.demand, self.p), 'numpy'),
+        )
+
+    @cached_property
+    def derivative_functions(self) -> tuple[Callable, Callable]:
+        return (
+            sp.lambdify(self.p, self.profit_derivative, 'numpy'),
+            sp.lambdify(self.p, self.second_derivative, 'numpy'),
+        )
+
+    def approximate_size(self) -> int:
+        # estimativa: tamanho das árvores serializadas e do bytecode das funções já geradas.
+        # O cache a calcula uma vez, na inserção; derivadas e funções geradas depois não entram na conta
+        size = 0
+        for name in ('cost_expr', 'demand', 'cost', 'revenue', 'profit', 'profit_derivative', 'second_derivative'):
+            expression = self.__dict__.get(name)
+            if expression is not None:
+                size += len(sp.srepr(expression))
+        for name in ('numeric_functions', 'demand_functions', 'derivative_functions'):
+            for function in self.__dict__.get(name, ()):
+                size += len(function.__code__.co_code) + sum(len(repr(c)) for c in function.__code__.co_consts)
+        return size
+
+
+class CompiledModelCache:
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        # cada entrada guarda o tamanho estimado na inserção: stats() só lê o total, sem srepr por scrape
+        self._entries: "OrderedDict[tuple[str, str], tuple[CompiledModel, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(function: str) -> str:
+        # forma canônica do parser: espaços, parênteses redundantes e grafias de número ('.50', '007') não duplicam entradas
+        return ExpressionParser.parse(function).canonical
+
+    def get(self, cost_function: str, demand_function: str) -> CompiledModel:
+        key = (self.normalize(cost_function), self.normalize(demand_function))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # parse e estimativa de tamanho fora do lock: duas threads podem compilar o mesmo par, a última vence
+        model = CompiledModel(*key)
+        size = model.approximate_size()
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (model, size)
+            self._bytes += size
+            while len(self._entries) > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+        return model
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+            approximate_bytes = self._bytes
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'approximate_bytes': approximate_bytes,
+        }
+
+
+compiled_models = CompiledModelCache(Settings.COMPILED_MODEL_CACHE_SIZE)
@@ -0,0 +1,115 @@
+import math
+from dataclasses import dataclass
+from app.core.settings import Settings
+from app.services.expression_parser import ExpressionParser, ExpressionTooComplexError, Node
+
+
+@dataclass
+class ExpressionProfile:
+    nodes: int
+    depth: int
+    degree: int
+
+
+class ExpressionLimits:
+
+    @staticmethod
+    def _constant(node: Node) -> float:
+        # avalia subárvores sem variáveis em float: overflow vira inf e é rejeitado
+        kind = node[0]
+        if kind == 'number':
+            return float(node[1])
+        if kind in ('neg', 'pos'):
+            value = ExpressionLimits._constant(node[1])
+            return -value if kind == 'neg' else value
+        if kind == 'name':
+            raise ExpressionTooComplexError("Expressão com construção não suportada")
+
+        left = ExpressionLimits._constant(node[1])
+        right = ExpressionLimits._constant(node[2])
+        try:
+            if kind == '+':
+                return left + right
+            if kind == '-':
+                return left - right
+            if kind == '*':
+                return left * right
+            if kind == '/':
+                return left / right if right else math.inf
+            ExpressionLimits._check_exponent(right)
+            return math.pow(left, right)
+        except (OverflowError, ValueError):
+            return math.inf
+
+    @staticmethod
+    def _check_exponent(exponent: float) -> None:
+        if not math.isfinite(exponent) or abs(exponent) > Settings.EXPRESSION_MAX_EXPONENT:
+            raise ExpressionTooComplexError(
+                f"Expoentes devem ter módulo no máximo {Settings.EXPRESSION_MAX_EXPONENT}"
+            )
+
+    @staticmethod
+    def _degree(node: Node, variable: str) -> int:
+        # limite superior do grau na variável como função racional: N/D conta grau(N) + grau(D);
+        # outros identificadores (parâmetros de cenário) são constantes
+        kind = node[0]
+        if kind == 'name':
+            return 1 if node[1] == variable else 0
+        if kind == 'number':
+            return 0
+        if kind in ('neg', 'pos'):
+            return ExpressionLimits._degree(node[1], variable)
+        if kind == '**':
+            names = set(ExpressionParser.names(node[2]))
+            # 2**p ou p**p não têm grau: o lucro pode crescer sem limite e estourar float antes de qualquer máximo
+            if variable in names:
+                raise ExpressionTooComplexError(f"A variável '{variable}' não pode aparecer em expoentes")
+            base = ExpressionLimits._degree(node[1], variable)
+            if names:
+                # expoente com parâmetro fica simbólico no sympy: não expande, e o solve roda no pool com timeout
+                return base
+            exponent = ExpressionLimits._constant(node[2])
+            ExpressionLimits._check_exponent(exponent)
+            return base * math.ceil(abs(exponent))
+        left = ExpressionLimits._degree(node[1], variable)
+        right = ExpressionLimits._degree(node[2], variable)
+        if kind in ('+', '-'):
+            return max(left, right)
+        return left + right
+
+    @staticmethod
+    def _size(node: Node) -> tuple[int, int]:
+        # (nós, profundidade) contados como no ast do Python (operador e contexto Load são nós):
+        # EXPRESSION_MAX_NODES e EXPRESSION_MAX_DEPTH mantêm o significado de antes do parser próprio
+        kind = node[0]
+        if kind == 'number':
+            return 1, 1
+        if kind == 'name':
+            return 2, 2
+        sizes = [ExpressionLimits._size(child) for child in node[1:]]
+        return 2 + sum(nodes for nodes, _ in sizes), 1 + max(1, *(depth for _, depth in sizes))
+
+    @staticmethod
+    def profile(function: str, variable: str) -> ExpressionProfile:
+        tree = ExpressionParser.parse(function).tree
+
+        nodes, depth = ExpressionLimits._size(tree)
+        if nodes > Settings.EXPRESSION_MAX_NODES:
+            raise ExpressionTooComplexError(f"A função deve ter no máximo {Settings.EXPRESSION_MAX_NODES} termos")
+
+        if depth > Settings.EXPRESSION_MAX_DEPTH:
+            raise ExpressionTooComplexError(f"A função deve ter no máximo {Settings.EXPRESSION_MAX_DEPTH} níveis de aninhamento")
+
+        return ExpressionProfile(nodes=nodes, depth=depth, degree=ExpressionLimits._degree(tree, variable))
+
+    @staticmethod
+    def check(cost_function: str, demand_function: str) -> None:
+        cost = ExpressionLimits.profile(cost_function, 'q')
+        demand = ExpressionLimits.profile(demand_function, 'p')
+
+        # C(Q(p)): o grau da composição é o produto dos graus
+        degree = max(cost.degree * max(demand.degree, 1), demand.degree + 1)
+        if degree > Settings.EXPRESSION_MAX_DEGREE:
+            raise ExpressionTooComplexError(
+                f"O lucro resultante teria grau {degree}; o máximo é {Settings.EXPRESSION_MAX_DEGREE}"
+            )
@@ -0,0 +1,196 @@
+import operator
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Optional
+import sympy as sp
+from app.core.settings import Settings
+
+# ('number', texto) | ('name', nome) | ('neg' | 'pos', operando) | ('+' | '-' | '*' | '/' | '**', esquerda, direita)
+Node = tuple
+
+
+class ExpressionTooComplexError(ValueError):
+    pass
+
+
+class ExpressionSyntaxError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class ParsedExpression:
+    tree: Node
+    names: frozenset[str]
+    canonical: str
+
+
+class ExpressionParser:
+
+    TOKEN = re.compile(r'\s*(?:(\d+\.?\d*|\.\d+)|([A-Za-z_][A-Za-z0-9_]*)|(\*\*|[-+*/()]))')
+    BINDING = {'+': 10, '-': 10, '*': 20, '/': 20, '**': 40}
+    PREFIX = 30
+    ATOM = 100
+    OPERATIONS = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv, '**': operator.pow}
+
+    @staticmethod
+    def tokenize(function: str) -> list[tuple[str, str, int]]:
+        tokens = []
+        position = 0
+        end = len(function.rstrip())
+
+        while position < end:
+            match = ExpressionParser.TOKEN.match(function, position)
+            if not match:
+                offset = len(function) - len(function[position:].lstrip())
+                raise ExpressionSyntaxError(f"Caractere inválido '{function[offset]}' na posição {offset + 1}")
+
+            number, name, symbol = match.groups()
+            kind = 'number' if number else 'name' if name else 'operator'
+            tokens.append((kind, number or name or symbol, match.start(match.lastindex)))
+            position = match.end()
+
+        tokens.append(('end', '', end))
+        return tokens
+
+    @staticmethod
+    def _tree(tokens: list[tuple[str, str, int]]) -> Node:
+        # Pratt: cadeias de mesma precedência são um laço; só parênteses, prefixos e lados direitos recursam
+        position = 0
+
+        def unexpected(text: str, offset: int) -> ExpressionSyntaxError:
+            if text in ('', ')'):
+                return ExpressionSyntaxError("Parênteses desbalanceados na função" if text == ')' else "Expressão incompleta")
+            return ExpressionSyntaxError(f"Expressão inválida: '{text}' inesperado na posição {offset + 1}")
+
+        def expression(binding: int, depth: int) -> Node:
+            nonlocal position
+            if depth > Settings.EXPRESSION_MAX_DEPTH:
+                raise ExpressionTooComplexError(
+                    f"A função deve ter no máximo {Settings.EXPRESSION_MAX_DEPTH} níveis de aninhamento"
+                )
+
+            kind, text, offset = tokens[position]
+            position += 1
+
+            if kind in ('number', 'name'):
+                left = (kind, text)
+            elif text in ('-', '+'):
+                left = ('neg' if text == '-' else 'pos', expression(ExpressionParser.PREFIX, depth + 1))
+            elif text == '(':
+                left = expression(0, depth + 1)
+                kind, text, offset = tokens[position]
+                if text != ')':
+                    raise ExpressionSyntaxError("Parênteses desbalanceados na função") if kind == 'end' else unexpected(text, offset)
+                position += 1
+            else:
+                raise unexpected(text, offset)
+
+            while True:
+                kind, text, offset = tokens[position]
+                power = ExpressionParser.BINDING.get(text) if kind == 'operator' else None
+                if power is None or power <= binding:
+                    return left
+                position += 1
+                # ** associa à direita: o lado direito aceita outro ** com a mesma precedência
+                left = (text, left, expression(power - 1 if text == '**' else power, depth + 1))
+
+        tree = expression(0, 0)
+        kind, text, offset = tokens[position]
+        if kind != 'end':
+            raise unexpected(text, offset)
+        return tree
+
+    @staticmethod
+    def _number(text: str) -> str:
+        # '007' -> '7', '.50' -> '0.5', '2.' -> '2.0': inteiro e float continuam distintos, como no sympy
+        if '.' not in text:
+            return str(int(text))
+        integer, fraction = text.split('.')
+        return f"{integer.lstrip('0') or '0'}.{fraction.rstrip('0') or '0'}"
+
+    @staticmethod
+    def _render(node: Node) -> tuple[str, int]:
+        kind = node[0]
+        if kind == 'number':
+            return ExpressionParser._number(node[1]), ExpressionParser.ATOM
+        if kind == 'name':
+            return node[1], ExpressionParser.ATOM
+
+        if kind in ('neg', 'pos'):
+            text, power = ExpressionParser._render(node[1])
+            if power < ExpressionParser.PREFIX:
+                text = f'({text})'
+            return ('-' if kind == 'neg' else '+') + text, ExpressionParser.PREFIX
+
+        binding = ExpressionParser.BINDING[kind]
+        left, left_power = ExpressionParser._render(node[1])
+        right, right_power = ExpressionParser._render(node[2])
+
+        # parênteses só onde a árvore não seria reconstruída sem eles; prefixo à direita dispensa parênteses
+        if left_power < binding or (kind == '**' and left_power == binding):
+            left = f'({left})'
+        if right_power != ExpressionParser.PREFIX and (right_power < binding or (kind != '**' and right_power == binding)):
+            right = f'({right})'
+        return f'{left}{kind}{right}', binding
+
+    @staticmethod
+    def render(node: Node) -> str:
+        return ExpressionParser._render(node)[0]
+
+    @staticmethod
+    def names(node: Node) -> Iterable[str]:
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current[0] == 'name':
+                yield current[1]
+            elif current[0] != 'number':
+                stack.extend(current[1:])
+
+    @staticmethod
+    @lru_cache(maxsize=Settings.EXPRESSION_CACHE_SIZE)
+    def parse(function: str) -> ParsedExpression:
+        if len(function) > Settings.EXPRESSION_MAX_LENGTH:
+            raise ExpressionTooComplexError(
+                f"A função deve ter no máximo {Settings.EXPRESSION_MAX_LENGTH} caracteres"
+            )
+
+        tokens = ExpressionParser.tokenize(function)
+        if tokens[0][0] == 'end':
+            raise ExpressionSyntaxError("A função não pode estar vazia")
+
+        tree = ExpressionParser._tree(tokens)
+        return ParsedExpression(
+            tree=tree,
+            names=frozenset(ExpressionParser.names(tree)),
+            canonical=ExpressionParser.render(tree),
+        )
+
+    @staticmethod
+    def check_names(parsed: ParsedExpression, allowed: Iterable[str], required: Optional[str] = None) -> None:
+        unknown = parsed.names - set(allowed)
+        if unknown:
+            raise ExpressionSyntaxError(f"Identificadores não declarados: {', '.join(sorted(unknown))}")
+        if required is not None and required not in parsed.names:
+            raise ExpressionSyntaxError(f"A função deve conter a variável '{required}'")
+
+    @staticmethod
+    def to_sympy(function: str, symbols: dict[str, sp.Symbol]) -> sp.Expr:
+        # mesmos operadores Python sobre átomos do sympy que o eval do parse_expr aplicaria: mesma árvore, sem eval
+        parsed = ExpressionParser.parse(function)
+        ExpressionParser.check_names(parsed, symbols)
+
+        def build(node: Node) -> sp.Expr:
+            kind = node[0]
+            if kind == 'number':
+                return sp.Float(node[1]) if '.' in node[1] else sp.Integer(node[1])
+            if kind == 'name':
+                return symbols[node[1]]
+            if kind == 'neg':
+                return -build(node[1])
+            if kind == 'pos':
+                return +build(node[1])
+            return ExpressionParser.OPERATIONS[kind](build(node[1]), build(node[2]))
+
+        return build(parsed.tree)
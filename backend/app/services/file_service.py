@@ -1,26 +1,216 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
 from io import BytesIO
+from pathlib import Path
+from typing import Awaitable, Optional
+from uuid import uuid4
+import httpx
 from app.core.settings import Settings
-import cloudinary
-from cloudinary.uploader import upload
 
-cloudinary.config(
-    cloud_name=Settings.CLOUDINARY_CLOUD_NAME,      
-    api_key=Settings.CLOUDINARY_API_KEY,
-    api_secret=Settings.CLOUDINARY_API_SECRET,
-    secure=True
-)
+
+def write_atomically(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # escreve num arquivo temporário e renomeia: leitores nunca veem um arquivo parcial
+    temporary = path.with_suffix(f'.{uuid4().hex}.tmp')
+    temporary.write_bytes(data)
+    temporary.replace(path)
+
+
+class ImageUploader(ABC):
+
+    @abstractmethod
+    async def upload(self, image: bytes, folder: str, public_id: str) -> str:
+        ...
+
+    @abstractmethod
+    async def download(self, folder: str, public_id: str) -> Optional[bytes]:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class CloudinaryUploader(ImageUploader):
+
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(self, max_concurrency: int, max_retries: int, timeout: float, backoff: float):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._utils = None
+
+    def _sdk(self):
+        # o SDK da Cloudinary é importado e configurado no primeiro upload/download, não na importação do app
+        if self._utils is None:
+            import cloudinary
+            import cloudinary.utils
+
+            cloudinary.config(
+                cloud_name=Settings.CLOUDINARY_CLOUD_NAME,
+                api_key=Settings.CLOUDINARY_API_KEY,
+                api_secret=Settings.CLOUDINARY_API_SECRET,
+                secure=True
+            )
+            self._utils = cloudinary.utils
+        return self._utils
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # um único cliente por processo reaproveita as conexões TLS com a Cloudinary
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        client = self._get_client()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    response = await client.request(method, url, **kwargs)
+                if response.status_code not in self.RETRY_STATUS_CODES:
+                    return response
+                error: Exception = httpx.HTTPStatusError(
+                    f'Cloudinary returned {response.status_code}', request=response.request, response=response
+                )
+            except httpx.TransportError as transport_error:
+                error = transport_error
+
+            if attempt == self.max_retries:
+                raise error
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def upload(self, image: bytes, folder: str, public_id: str) -> str:
+        params = {
+            'folder': folder,
+            'public_id': public_id,
+            'overwrite': 'true',
+            'format': 'png',
+            'timestamp': str(int(time.time())),
+        }
+        params['signature'] = self._sdk().api_sign_request(params, Settings.CLOUDINARY_API_SECRET)
+        params['api_key'] = Settings.CLOUDINARY_API_KEY
+
+        response = await self._request(
+            'POST',
+            f'https://api.cloudinary.com/v1_1/{Settings.CLOUDINARY_CLOUD_NAME}/image/upload',
+            data=params,
+            files={'file': (f'{public_id}.png', image, 'image/png')}
+        )
+        response.raise_for_status()
+
+        return response.json()['secure_url']
+
+    async def download(self, folder: str, public_id: str) -> Optional[bytes]:
+        url, _ = self._sdk().cloudinary_url(f'{folder}/{public_id}', format='png', secure=True)
+
+        response = await self._request('GET', url)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        return response.content
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class LocalDiskUploader(ImageUploader):
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def _path(self, folder: str, public_id: str) -> Path:
+        return self.directory / folder / f'{public_id}.png'
+
+    async def upload(self, image: bytes, folder: str, public_id: str) -> str:
+        path = self._path(folder, public_id)
+        await asyncio.to_thread(write_atomically, path, image)
+        return path.resolve().as_uri()
+
+    async def download(self, folder: str, public_id: str) -> Optional[bytes]:
+        path = self._path(folder, public_id)
+
+        def read() -> Optional[bytes]:
+            return path.read_bytes() if path.exists() else None
+
+        return await asyncio.to_thread(read)
+
+
+class InMemoryUploader(ImageUploader):
+
+    def __init__(self):
+        self.images: dict[str, bytes] = {}
+
+    async def upload(self, image: bytes, folder: str, public_id: str) -> str:
+        self.images[f'{folder}/{public_id}'] = image
+        return f'memory://{folder}/{public_id}.png'
+
+    async def download(self, folder: str, public_id: str) -> Optional[bytes]:
+        return self.images.get(f'{folder}/{public_id}')
+
+
+def create_uploader() -> ImageUploader:
+    if Settings.UPLOAD_BACKEND == 'local':
+        return LocalDiskUploader(Settings.UPLOAD_DIR)
+    if Settings.UPLOAD_BACKEND == 'memory':
+        return InMemoryUploader()
+    return CloudinaryUploader(
+        max_concurrency=Settings.UPLOAD_MAX_CONCURRENCY,
+        max_retries=Settings.UPLOAD_MAX_RETRIES,
+        timeout=Settings.UPLOAD_TIMEOUT_SECONDS,
+        backoff=Settings.UPLOAD_BACKOFF_SECONDS
+    )
+
 
 class FileService:
+
+    uploader: ImageUploader = create_uploader()
+    _background_uploads: set[asyncio.Task] = set()
+
     @staticmethod
     async def upload_graph_image(image_buffer: BytesIO, user_id: str, optimization_id: str) -> str:
 
-        result = upload(
-            image_buffer,
+        return await FileService.uploader.upload(
+            image_buffer.getvalue(),
             folder=f'optimization_graphs/{user_id}',
-            public_id=optimization_id,  
-            overwrite=True,
-            resource_type="image",
-            format="png"
+            public_id=optimization_id
         )
-        
-        return result['secure_url']
\ No newline at end of file
+
+    @staticmethod
+    async def download_graph_image(user_id: str, optimization_id: str) -> Optional[bytes]:
+
+        return await FileService.uploader.download(
+            folder=f'optimization_graphs/{user_id}',
+            public_id=optimization_id
+        )
+
+    @staticmethod
+    def upload_in_background(upload: Awaitable) -> None:
+        # para uploads disparados depois do commit: a resposta não espera a rede
+        async def run():
+            try:
+                await upload
+            except Exception as error:
+                logging.error("Error in background upload: %s", error)
+
+        task = asyncio.create_task(run())
+        FileService._background_uploads.add(task)
+        task.add_done_callback(FileService._background_uploads.discard)
+
+    @staticmethod
+    async def close() -> None:
+        if FileService._background_uploads:
+            await asyncio.gather(*FileService._background_uploads, return_exceptions=True)
+        await FileService.uploader.close()
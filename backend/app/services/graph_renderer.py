@@ -0,0 +1,93 @@
+import threading
+from io import BytesIO
+from types import SimpleNamespace
+from typing import Callable
+import numpy as np
+
+NumericFunction = Callable[[np.ndarray], np.ndarray]
+
+
+class GraphRenderer:
+
+    FULL_POINTS = 1000
+    FULL_DPI = 150
+    PREVIEW_POINTS = 200
+    PREVIEW_DPI = 72
+
+    _local = threading.local()
+
+    @staticmethod
+    def _template() -> SimpleNamespace:
+        # uma figura pré-estilizada por thread: só os dados mudam entre renderizações
+        template = getattr(GraphRenderer._local, 'template', None)
+        if template is not None:
+            return template
+
+        # matplotlib só entra na primeira renderização: workers do solver e a importação do app não pagam por ele
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        figure = Figure(figsize=(12, 8))
+        FigureCanvasAgg(figure)
+        axes = figure.add_subplot()
+
+        cost_line, = axes.plot([], [], label='Custo', color='red', linewidth=2)
+        revenue_line, = axes.plot([], [], label='Receita', color='green', linewidth=2)
+        profit_line, = axes.plot([], [], label='Lucro', color='blue', linewidth=2)
+        optimum = axes.scatter([0], [0], color='gold', s=200, zorder=5, edgecolors='black', linewidth=2)
+        price_line = axes.axvline(x=0, color='gray', linestyle='--', alpha=0.7)
+        profit_level = axes.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
+
+        axes.set_xlabel('Preço (x)', fontsize=12, fontweight='bold')
+        axes.set_ylabel('Valor ($)', fontsize=12, fontweight='bold')
+        axes.set_title('Otimização de Preço - Análise de Custo, Receita e Lucro', fontsize=14, fontweight='bold')
+        axes.grid(True, alpha=0.3)
+        figure.tight_layout()
+
+        template = SimpleNamespace(
+            figure=figure,
+            axes=axes,
+            cost_line=cost_line,
+            revenue_line=revenue_line,
+            profit_line=profit_line,
+            optimum=optimum,
+            price_line=price_line,
+            profit_level=profit_level,
+        )
+        GraphRenderer._local.template = template
+        return template
+
+    @staticmethod
+    def render(
+        cost_func: NumericFunction,
+        revenue_func: NumericFunction,
+        profit_func: NumericFunction,
+        optimal_price: float,
+        max_profit: float,
+        image_format: str = 'png',
+        preview: bool = False,
+    ) -> BytesIO:
+        points = GraphRenderer.PREVIEW_POINTS if preview else GraphRenderer.FULL_POINTS
+        dpi = GraphRenderer.PREVIEW_DPI if preview else GraphRenderer.FULL_DPI
+
+        x_range = np.linspace(0, optimal_price * 2, points)
+
+        template = GraphRenderer._template()
+        template.cost_line.set_data(x_range, np.broadcast_to(cost_func(x_range), x_range.shape))
+        template.revenue_line.set_data(x_range, np.broadcast_to(revenue_func(x_range), x_range.shape))
+        template.profit_line.set_data(x_range, np.broadcast_to(profit_func(x_range), x_range.shape))
+
+        template.optimum.set_offsets([[optimal_price, max_profit]])
+        template.optimum.set_label(f'Ponto Ótimo ({optimal_price:.2f}, {max_profit:.2f})')
+        template.price_line.set_xdata([optimal_price, optimal_price])
+        template.profit_level.set_ydata([max_profit, max_profit])
+
+        template.axes.relim()
+        template.axes.autoscale_view()
+        template.axes.legend(fontsize=10, loc='best')
+
+        img_buffer = BytesIO()
+        template.figure.savefig(img_buffer, format=image_format, dpi=dpi)
+        img_buffer.seek(0)
+
+        return img_buffer
@@ -0,0 +1,80 @@
+from base64 import b64encode
+from typing import Optional
+import numpy as np
+from app.core.settings import Settings
+from app.services.compiled_model import CompiledModel
+
+
+class GraphSeries:
+
+    SERIES = ('price', 'cost', 'revenue', 'profit')
+    DTYPE = '<f4'
+
+    @staticmethod
+    def downsample(x: np.ndarray, ys: np.ndarray, threshold: int, keep: Optional[int] = None) -> np.ndarray:
+        # Largest-Triangle-Three-Buckets com várias curvas: a área é somada com cada curva normalizada pela própria amplitude
+        size = x.size
+        if threshold >= size or threshold < 3:
+            return np.arange(size)
+
+        span = np.ptp(ys, axis=1, keepdims=True)
+        ys = (ys - ys.min(axis=1, keepdims=True)) / np.where(span > 0, span, 1.0)
+        x = (x - x[0]) / ((x[-1] - x[0]) or 1.0)
+
+        # threshold - 2 buckets internos; o primeiro e o último ponto sempre ficam
+        every = (size - 2) / (threshold - 2)
+        edges = np.append((np.arange(threshold - 1) * every).astype(int) + 1, size)
+
+        selected = np.empty(threshold, dtype=int)
+        selected[0], selected[-1] = 0, size - 1
+        previous = 0
+
+        for bucket in range(threshold - 2):
+            start, end = edges[bucket], edges[bucket + 1]
+
+            if keep is not None and start <= keep < end:
+                previous = selected[bucket + 1] = keep
+                continue
+
+            following = slice(edges[bucket + 1], edges[bucket + 2])
+            next_x = x[following].mean()
+            next_y = ys[:, following].mean(axis=1, keepdims=True)
+
+            area = np.abs(
+                (x[previous] - next_x) * (ys[:, start:end] - ys[:, previous:previous + 1])
+                - (x[previous] - x[start:end]) * (next_y - ys[:, previous:previous + 1])
+            ).sum(axis=0)
+
+            previous = selected[bucket + 1] = start + int(np.argmax(area))
+
+        return selected
+
+    @staticmethod
+    def compute(model: CompiledModel, optimal_price: float) -> bytes:
+        cost_func, revenue_func, profit_func = model.numeric_functions
+
+        # quantidade ímpar de amostras: o ótimo cai exatamente no ponto do meio e é mantido na série
+        samples = Settings.GRAPH_SERIES_SAMPLES | 1
+        price = np.linspace(0, optimal_price * 2, samples)
+
+        with np.errstate(all='ignore'):
+            values = np.vstack([
+                np.broadcast_to(np.asarray(func(price), dtype=float), price.shape)
+                for func in (cost_func, revenue_func, profit_func)
+            ])
+        finite = np.isfinite(values)
+
+        indices = GraphSeries.downsample(price, np.where(finite, values, 0.0), Settings.GRAPH_SERIES_POINTS, keep=samples // 2)
+
+        series = np.vstack([price[indices], np.where(finite, values, np.nan)[:, indices]])
+        return np.ascontiguousarray(series, dtype=GraphSeries.DTYPE).tobytes()
+
+    @staticmethod
+    def encode(blob: bytes) -> tuple[int, dict[str, str]]:
+        # linhas contíguas de float32: cada série é uma fatia do blob, sem decodificar os valores
+        points = len(blob) // (len(GraphSeries.SERIES) * np.dtype(GraphSeries.DTYPE).itemsize)
+        row = points * np.dtype(GraphSeries.DTYPE).itemsize
+        return points, {
+            name: b64encode(blob[index * row:(index + 1) * row]).decode()
+            for index, name in enumerate(GraphSeries.SERIES)
+        }
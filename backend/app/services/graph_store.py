@@ -0,0 +1,60 @@
+import asyncio
+from abc import ABC, abstractmethod
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+from app.core.settings import Settings
+from app.services.file_service import FileService, write_atomically
+
+
+class GraphStore(ABC):
+
+    @abstractmethod
+    async def get(self, user_id: str, graph_id: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def put(self, user_id: str, graph_id: str, image: bytes) -> None:
+        ...
+
+
+class LocalGraphStore(GraphStore):
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def _path(self, user_id: str, graph_id: str) -> Path:
+        return self.directory / user_id / f'{graph_id}.png'
+
+    async def get(self, user_id: str, graph_id: str) -> Optional[bytes]:
+        path = self._path(user_id, graph_id)
+
+        def read() -> Optional[bytes]:
+            return path.read_bytes() if path.exists() else None
+
+        return await asyncio.to_thread(read)
+
+    async def put(self, user_id: str, graph_id: str, image: bytes) -> None:
+        await asyncio.to_thread(write_atomically, self._path(user_id, graph_id), image)
+
+
+class CloudinaryGraphStore(GraphStore):
+
+    async def get(self, user_id: str, graph_id: str) -> Optional[bytes]:
+        return await FileService.download_graph_image(user_id=user_id, optimization_id=graph_id)
+
+    async def put(self, user_id: str, graph_id: str, image: bytes) -> None:
+        await FileService.upload_graph_image(
+            image_buffer=BytesIO(image),
+            user_id=user_id,
+            optimization_id=graph_id
+        )
+
+
+def create_graph_store() -> GraphStore:
+    if Settings.GRAPH_STORE_BACKEND == 'cloudinary':
+        return CloudinaryGraphStore()
+    return LocalGraphStore(Settings.GRAPH_STORE_DIR)
+
+
+graph_store = create_graph_store()
@@ -0,0 +1,203 @@
+import math
+from typing import Optional
+import numpy as np
+import sympy as sp
+from app.core.settings import Settings
+from app.schemas import OptimizationInfo
+from app.services.compiled_model import CompiledModel
+
+
+class IntervalOptimizer:
+
+    INVERSE_GOLDEN = (math.sqrt(5) - 1) / 2
+    UNBOUNDED = "O lucro cresce sem limite com o preço: verifique a função de demanda"
+
+    @staticmethod
+    def _objective(model: CompiledModel):
+        demand_func = model.demand_functions[0]
+        profit_func = model.numeric_functions[2]
+
+        def objective(prices: np.ndarray) -> np.ndarray:
+            # fora do intervalo viável (demanda negativa ou indefinida) o lucro vale -inf;
+            # demanda válida com lucro estourando float vale +inf: é crescimento sem limite, não borda do intervalo
+            with np.errstate(all='ignore'):
+                demand = np.broadcast_to(np.asarray(demand_func(prices), dtype=float), prices.shape)
+                profit = np.broadcast_to(np.asarray(profit_func(prices), dtype=float), prices.shape)
+
+            valid_demand = np.isfinite(demand) & (demand >= 0)
+            overflow = valid_demand & (np.isnan(profit) | (profit == np.inf))
+            return np.where(valid_demand & np.isfinite(profit), profit, np.where(overflow, np.inf, -np.inf))
+
+        return objective
+
+    @staticmethod
+    def _demand_breakpoints(model: CompiledModel) -> np.ndarray:
+        # raízes positivas do numerador da demanda: onde Q(p) cruza zero
+        numerator = sp.fraction(sp.together(model.demand))[0]
+        try:
+            coefficients = np.array([float(c) for c in sp.Poly(numerator, model.p).all_coeffs()])
+        except (sp.PolynomialError, TypeError):
+            return np.array([])
+
+        coefficients = np.trim_zeros(coefficients, 'f')
+        if coefficients.size < 2 or not np.all(np.isfinite(coefficients)):
+            return np.array([])
+
+        roots = np.roots(coefficients)
+        real = roots[np.abs(roots.imag) <= 1e-9 * np.maximum(1.0, np.abs(roots.real))].real
+        return np.sort(real[(real > Settings.NUMERIC_MIN_PRICE) & (real < Settings.NUMERIC_MAX_PRICE)])
+
+    @staticmethod
+    def _sign_changes(objective, prices: np.ndarray, values: np.ndarray) -> np.ndarray:
+        # demanda não polinomial: refina por bisseção as transições viável -> inviável da grade
+        feasible = np.isfinite(values)
+        edges = np.flatnonzero(feasible[:-1] != feasible[1:])
+        if edges.size == 0:
+            return np.array([])
+
+        low, high = prices[edges], prices[edges + 1]
+        low_feasible = feasible[edges]
+        for _ in range(60):
+            middle = (low + high) / 2
+            middle_feasible = np.isfinite(objective(middle))
+            moves_low = middle_feasible == low_feasible
+            low = np.where(moves_low, middle, low)
+            high = np.where(moves_low, high, middle)
+
+        return np.where(low_feasible, low, high)
+
+    @staticmethod
+    def feasible_interval(model: CompiledModel) -> tuple[float, float, np.ndarray]:
+        breakpoints = IntervalOptimizer._demand_breakpoints(model)
+        low = Settings.NUMERIC_MIN_PRICE
+        high = Settings.NUMERIC_MAX_PRICE
+
+        if breakpoints.size:
+            demand_func = model.demand_functions[0]
+            with np.errstate(all='ignore'):
+                beyond = np.asarray(demand_func(np.array([breakpoints[-1] * 1.001 + 1e-9])), dtype=float)
+            # além da última raiz a demanda fica negativa: o intervalo termina nela
+            if beyond.size and beyond[0] < 0:
+                high = float(breakpoints[-1])
+
+        return low, high, breakpoints
+
+    @staticmethod
+    def golden_section(objective, low: np.ndarray, high: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # seção áurea vetorizada: todos os intervalos candidatos avançam juntos
+        ratio = IntervalOptimizer.INVERSE_GOLDEN
+        c = high - ratio * (high - low)
+        d = low + ratio * (high - low)
+        fc = objective(c)
+        fd = objective(d)
+
+        for _ in range(Settings.NUMERIC_MAX_ITERATIONS):
+            keep_left = fc >= fd
+            high = np.where(keep_left, d, high)
+            low = np.where(keep_left, low, c)
+
+            new_c = high - ratio * (high - low)
+            new_d = low + ratio * (high - low)
+            probe = np.where(keep_left, new_c, new_d)
+            f_probe = objective(probe)
+
+            c, fc, d, fd = (
+                np.where(keep_left, probe, d),
+                np.where(keep_left, f_probe, fd),
+                np.where(keep_left, c, probe),
+                np.where(keep_left, fc, f_probe),
+            )
+
+            scale = np.maximum(1.0, np.abs(low))
+            if np.all(high - low <= Settings.NUMERIC_TOLERANCE * scale):
+                break
+
+        x = (low + high) / 2
+        return x, objective(x)
+
+    @staticmethod
+    def newton_polish(model: CompiledModel, objective, prices: np.ndarray, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # a seção áurea para em ~sqrt(eps); alguns passos de Newton em L'(p) = 0 levam à precisão de máquina
+        first, second = model.derivative_functions
+        polished = prices
+        with np.errstate(all='ignore'):
+            for _ in range(3):
+                slope = np.broadcast_to(np.asarray(first(polished), dtype=float), polished.shape)
+                curvature = np.broadcast_to(np.asarray(second(polished), dtype=float), polished.shape)
+                step = np.where(curvature < 0, slope / np.where(curvature == 0, 1.0, curvature), 0.0)
+                polished = np.where(np.isfinite(step), polished - step, polished)
+
+        polished_values = objective(polished)
+        better = polished_values >= values
+        return np.where(better, polished, prices), np.where(better, polished_values, values)
+
+    @staticmethod
+    def optimize(model: CompiledModel, low: Optional[float] = None, high: Optional[float] = None) -> OptimizationInfo:
+        derived_low, derived_high, breakpoints = IntervalOptimizer.feasible_interval(model)
+        low = derived_low if low is None else max(low, derived_low)
+        high = derived_high if high is None else min(high, derived_high)
+
+        if high <= low:
+            raise ValueError("Intervalo de preços viável vazio")
+
+        objective = IntervalOptimizer._objective(model)
+
+        # grade grossa linear + geométrica: cobre tanto preços pequenos quanto a escala do intervalo
+        points = Settings.NUMERIC_GRID_POINTS
+        prices = np.unique(np.concatenate([
+            np.linspace(low, high, points),
+            np.geomspace(low, high, points),
+            breakpoints[(breakpoints >= low) & (breakpoints <= high)],
+        ]))
+        values = objective(prices)
+
+        if np.any(values == np.inf):
+            raise ValueError(IntervalOptimizer.UNBOUNDED)
+
+        if not np.any(np.isfinite(values)):
+            raise ValueError("Nenhum preço viável encontrado")
+
+        edges = IntervalOptimizer._sign_changes(objective, prices, values)
+        # a grade pode pular a faixa estreita em que só o lucro estoura: o lado de fora de cada borda decide
+        if edges.size and np.any(np.concatenate([
+            objective(np.nextafter(edges, np.inf)), objective(np.nextafter(edges, -np.inf))
+        ]) == np.inf):
+            raise ValueError(IntervalOptimizer.UNBOUNDED)
+
+        boundaries = np.concatenate([breakpoints, edges])
+
+        # máximos locais da grade: cada um vira um intervalo para a seção áurea
+        padded = np.concatenate([[-np.inf], values, [-np.inf]])
+        local_maxima = np.flatnonzero(
+            np.isfinite(values) & (padded[1:-1] >= padded[:-2]) & (padded[1:-1] >= padded[2:])
+        )
+        local_maxima = local_maxima[np.argsort(values[local_maxima])[::-1][:Settings.NUMERIC_CANDIDATES]]
+
+        left = prices[np.maximum(local_maxima - 1, 0)]
+        right = prices[np.minimum(local_maxima + 1, prices.size - 1)]
+        refined, refined_values = IntervalOptimizer.golden_section(objective, left, right)
+        refined, refined_values = IntervalOptimizer.newton_polish(model, objective, refined, refined_values)
+
+        candidates = np.concatenate([refined, prices[local_maxima], boundaries, [low, high]])
+        candidate_values = np.concatenate([
+            refined_values, values[local_maxima], objective(boundaries), objective(np.array([low, high]))
+        ])
+        best = int(np.argmax(candidate_values))
+
+        optimal_price = float(candidates[best])
+        max_profit_value = float(candidate_values[best])
+
+        if max_profit_value == math.inf:
+            raise ValueError(IntervalOptimizer.UNBOUNDED)
+
+        if not math.isfinite(max_profit_value):
+            raise ValueError("Nenhum preço viável encontrado")
+
+        if high == Settings.NUMERIC_MAX_PRICE and optimal_price >= high * (1 - 1e-6):
+            raise ValueError(IntervalOptimizer.UNBOUNDED)
+
+        return OptimizationInfo(
+            optimal_price=optimal_price,
+            max_profit=max_profit_value,
+            profit_function=str(model.profit),
+        )
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+from sqlalchemy import or_, update
+from sqlalchemy.future import select
+from app.core.database.connection import async_session
+from app.core.settings import Settings
+from app.models import OptimizationStatus, PriceOptimization
+
+JobHandler = Callable[[UUID], Awaitable[None]]
+
+
+class JobQueue(ABC):
+
+    def __init__(self, handler: JobHandler, workers: int, lease_seconds: float):
+        self.handler = handler
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self._tasks: list[asyncio.Task] = []
+        self._updates: Optional[asyncio.Condition] = None
+
+    async def start(self) -> None:
+        self._updates = asyncio.Condition()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @abstractmethod
+    async def enqueue(self, job_id: UUID) -> None:
+        ...
+
+    @abstractmethod
+    async def _worker(self) -> None:
+        ...
+
+    async def _requeue_expired(self) -> list[UUID]:
+        # worker que morreu no meio do job deixa a linha RUNNING: lease vencido devolve o job para a fila
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        async with async_session() as session:
+            result = await session.execute(
+                update(PriceOptimization)
+                .where(
+                    PriceOptimization.status == OptimizationStatus.RUNNING,
+                    or_(PriceOptimization.started_at.is_(None), PriceOptimization.started_at < cutoff)
+                )
+                .values(status=OptimizationStatus.PENDING, started_at=None)
+                .returning(PriceOptimization.id)
+            )
+            job_ids = list(result.scalars().all())
+            await session.commit()
+
+        if job_ids:
+            logging.warning("Requeued %d optimization jobs with expired leases", len(job_ids))
+        return job_ids
+
+    async def _run(self, job_id: UUID) -> None:
+        try:
+            await self.handler(job_id)
+        except Exception as error:
+            logging.error("Error processing optimization job %s: %s", job_id, error)
+        await self._notify()
+
+    async def _notify(self) -> None:
+        if self._updates:
+            async with self._updates:
+                self._updates.notify_all()
+
+    async def wait_for_update(self, timeout: float) -> None:
+        if not self._updates:
+            await asyncio.sleep(timeout)
+            return
+        async with self._updates:
+            try:
+                await asyncio.wait_for(self._updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+class InProcessJobQueue(JobQueue):
+
+    def __init__(self, handler: JobHandler, workers: int, lease_seconds: float):
+        super().__init__(handler, workers, lease_seconds)
+        self._queue: Optional[asyncio.Queue] = None
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        await super().start()
+
+        # a fila em memória some num restart: jobs aceitos antes dele continuam PENDING no banco
+        try:
+            await self._requeue_expired()
+            async with async_session() as session:
+                result = await session.execute(
+                    select(PriceOptimization.id)
+                    .where(PriceOptimization.status == OptimizationStatus.PENDING)
+                    .order_by(PriceOptimization.created_at)
+                )
+                for job_id in result.scalars().all():
+                    await self._queue.put(job_id)
+        except Exception as error:
+            logging.error("Error recovering pending optimization jobs: %s", error)
+
+    async def enqueue(self, job_id: UUID) -> None:
+        await self._queue.put(job_id)
+
+    async def _claim(self, job_id: UUID) -> bool:
+        # cada worker do servidor tem a própria fila e todos recuperam os PENDING no start:
+        # só quem troca PENDING -> RUNNING processa o job
+        async with async_session() as session:
+            result = await session.execute(
+                update(PriceOptimization)
+                .where(PriceOptimization.id == job_id, PriceOptimization.status == OptimizationStatus.PENDING)
+                .values(status=OptimizationStatus.RUNNING, started_at=datetime.utcnow())
+                .returning(PriceOptimization.id)
+            )
+            claimed = result.scalar_one_or_none() is not None
+            await session.commit()
+        return claimed
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                if await self._claim(job_id):
+                    await self._run(job_id)
+            except Exception as error:
+                logging.error("Error claiming optimization job %s: %s", job_id, error)
+            finally:
+                self._queue.task_done()
+
+
+class PostgresJobQueue(JobQueue):
+
+    def __init__(self, handler: JobHandler, workers: int, lease_seconds: float, poll_interval: float):
+        super().__init__(handler, workers, lease_seconds)
+        self.poll_interval = poll_interval
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        await super().start()
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+
+    async def _sweeper(self) -> None:
+        while True:
+            try:
+                if await self._requeue_expired():
+                    self._wakeup.set()
+            except Exception as error:
+                logging.error("Error sweeping optimization job leases: %s", error)
+            await asyncio.sleep(max(self.lease_seconds / 2, self.poll_interval))
+
+    async def enqueue(self, job_id: UUID) -> None:
+        # a linha pendente já é a fila; só acorda os workers locais
+        self._wakeup.set()
+
+    async def _claim(self) -> Optional[UUID]:
+        async with async_session() as session:
+            result = await session.execute(
+                select(PriceOptimization.id)
+                .where(PriceOptimization.status == OptimizationStatus.PENDING)
+                .order_by(PriceOptimization.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            job_id = result.scalar_one_or_none()
+
+            if job_id:
+                await session.execute(
+                    update(PriceOptimization)
+                    .where(PriceOptimization.id == job_id)
+                    .values(status=OptimizationStatus.RUNNING, started_at=datetime.utcnow())
+                )
+                await session.commit()
+
+            return job_id
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                job_id = await self._claim()
+            except Exception as error:
+                logging.error("Error claiming optimization job: %s", error)
+                job_id = None
+
+            if job_id:
+                await self._run(job_id)
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+def create_job_queue(handler: JobHandler) -> JobQueue:
+    if Settings.JOB_QUEUE_BACKEND == 'postgres':
+        return PostgresJobQueue(handler, Settings.JOB_WORKERS, Settings.JOB_LEASE_SECONDS, Settings.JOB_POLL_INTERVAL_SECONDS)
+    return InProcessJobQueue(handler, Settings.JOB_WORKERS, Settings.JOB_LEASE_SECONDS)
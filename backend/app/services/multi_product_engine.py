@@ -0,0 +1,364 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+import numpy as np
+import sympy as sp
+from app.core.settings import Settings
+from app.schemas import ConstraintResult, MultiProductRequest, MultiProductResponse, ProductResult, ProductSpec
+from app.services.compiled_model import CompiledModel
+from app.services.expression_parser import ExpressionParser, Node
+
+
+ProductKey = tuple[str, str, int]  # templates de custo e demanda, número de coeficientes
+ProductShapes = dict[ProductKey, tuple[list[int], list[list[float]]]]  # forma -> (linhas do pedido, coeficientes)
+
+
+@dataclass(frozen=True)
+class ProductDerivation:
+    # derivadas já reduzidas por cse: só expressões do sympy, serializável para voltar do pool de solvers
+    values: tuple       # (subexpressões, (L, Q, C(Q)))
+    derivatives: tuple  # (subexpressões, (L', L'', Q', Q'', C', C''))
+
+
+@dataclass(frozen=True)
+class ProductTemplate:
+    values: Callable       # (p, *k) -> L, Q, C(Q)
+    derivatives: Callable  # (p, *k) -> L', L'', Q', Q'', C', C''
+
+
+@dataclass(frozen=True)
+class ProductGroup:
+    template: ProductTemplate
+    rows: np.ndarray               # índices dos produtos do pedido que usam o template
+    constants: tuple[np.ndarray, ...]  # uma coluna (n, 1) por coeficiente
+
+
+class MultiProductEngine:
+
+    NEWTON_STEPS = 4
+    BISECTION_STEPS = 60
+    MAX_DOUBLINGS = 200
+    MAX_ROUNDS = 50
+    LAMBDA_TOLERANCE = 1e-9
+    USAGE_TOLERANCE = 1e-9
+    TIGHTNESS = 1e-7
+
+    _compiled: "OrderedDict[ProductKey, ProductTemplate]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _templatize(function: str, constants: list[float]) -> str:
+        # coeficientes viram k0, k1, ...; expoentes ficam inteiros, pois definem a forma da expressão
+        def replace(node: Node) -> Node:
+            kind = node[0]
+            if kind == 'number':
+                constants.append(float(node[1]))
+                return ('name', f'k{len(constants) - 1}')
+            if kind == 'name':
+                return node
+            if kind == '**':
+                return (kind, replace(node[1]), node[2])
+            return (kind, *(replace(child) for child in node[1:]))
+
+        return ExpressionParser.render(replace(ExpressionParser.parse(function).tree))
+
+    @staticmethod
+    def derive(keys: tuple[ProductKey, ...]) -> tuple[ProductDerivation, ...]:
+        # diff e cse de cada forma de expressão: roda no pool de solvers, com um timeout para o pedido inteiro
+        p, q = CompiledModel.p, CompiledModel.q
+        derivations = []
+        for cost_template, demand_template, constants in keys:
+            coefficients = {f'k{index}': sp.Symbol(f'k{index}') for index in range(constants)}
+
+            cost_expr = ExpressionParser.to_sympy(cost_template, {**coefficients, 'q': q})  # C(q)
+            demand = ExpressionParser.to_sympy(demand_template, {**coefficients, 'p': p})   # Q(p)
+
+            cost = cost_expr.subs(q, demand)    # C(Q(p))
+            profit = p * demand - cost          # L(p)
+
+            profit_derivative = sp.diff(profit, p)
+            demand_derivative = sp.diff(demand, p)
+            cost_derivative = sp.diff(cost, p)
+
+            derivations.append(ProductDerivation(
+                values=sp.cse((profit, demand, cost), list=False),
+                derivatives=sp.cse((
+                    profit_derivative, sp.diff(profit_derivative, p),
+                    demand_derivative, sp.diff(demand_derivative, p),
+                    cost_derivative, sp.diff(cost_derivative, p),
+                ), list=False),
+            ))
+        return tuple(derivations)
+
+    @staticmethod
+    def cached(key: ProductKey) -> Optional[ProductTemplate]:
+        with MultiProductEngine._lock:
+            template = MultiProductEngine._compiled.get(key)
+            if template is not None:
+                MultiProductEngine._compiled.move_to_end(key)
+            return template
+
+    @staticmethod
+    def lambdify(key: ProductKey, derivation: ProductDerivation) -> ProductTemplate:
+        # só gera o código numpy a partir da derivação (o cse já veio pronto do pool); guardado por forma
+        arguments = [CompiledModel.p, *(sp.Symbol(f'k{index}') for index in range(key[2]))]
+        template = ProductTemplate(
+            values=sp.lambdify(arguments, derivation.values[1], 'numpy', cse=lambda _: derivation.values),
+            derivatives=sp.lambdify(arguments, derivation.derivatives[1], 'numpy', cse=lambda _: derivation.derivatives),
+        )
+
+        with MultiProductEngine._lock:
+            MultiProductEngine._compiled[key] = template
+            MultiProductEngine._compiled.move_to_end(key)
+            while len(MultiProductEngine._compiled) > Settings.MULTI_PRODUCT_CACHE_SIZE:
+                MultiProductEngine._compiled.popitem(last=False)
+
+        return template
+
+    @staticmethod
+    def compile(key: ProductKey) -> ProductTemplate:
+        # derivação no próprio processo, para chamadas diretas (benchmarks); a API usa derive no pool
+        return MultiProductEngine.cached(key) or MultiProductEngine.lambdify(key, MultiProductEngine.derive((key,))[0])
+
+    @staticmethod
+    def clear() -> None:
+        with MultiProductEngine._lock:
+            MultiProductEngine._compiled.clear()
+
+    @staticmethod
+    def shapes(products: list[ProductSpec]) -> ProductShapes:
+        # produtos com a mesma forma (só os coeficientes mudam) são avaliados juntos, vetorizados
+        members: ProductShapes = {}
+        for index, product in enumerate(products):
+            constants: list[float] = []
+            key = (
+                MultiProductEngine._templatize(product.cost_function, constants),
+                MultiProductEngine._templatize(product.demand_function, constants),
+            )
+            rows, table = members.setdefault((*key, len(constants)), ([], []))
+            rows.append(index)
+            table.append(constants)
+
+            # cada forma nova custa uma derivação simbólica: o número delas por pedido é limitado
+            if len(members) > Settings.MULTI_PRODUCT_MAX_TEMPLATES:
+                raise ValueError(
+                    f"No máximo {Settings.MULTI_PRODUCT_MAX_TEMPLATES} formas de expressão distintas por requisição"
+                )
+        return members
+
+    @staticmethod
+    def group(
+        shapes: ProductShapes,
+        templates: Optional[dict[ProductKey, ProductTemplate]] = None
+    ) -> list[ProductGroup]:
+        groups = []
+        for key, (rows, table) in shapes.items():
+            values = np.array(table, dtype=float).reshape(len(rows), -1)
+            template = templates[key] if templates is not None else MultiProductEngine.compile(key)
+            groups.append(ProductGroup(
+                template=template,
+                rows=np.array(rows),
+                constants=tuple(values[:, [column]] for column in range(values.shape[1])),
+            ))
+        return groups
+
+    @staticmethod
+    def _evaluate(groups: list[ProductGroup], prices: np.ndarray, derivatives: bool = False) -> list[np.ndarray]:
+        # prices: (N, M), um preço candidato por coluna; uma chamada por template
+        outputs: list[np.ndarray] = []
+        for group in groups:
+            function = group.template.derivatives if derivatives else group.template.values
+            with np.errstate(all='ignore'):
+                results = function(prices[group.rows], *group.constants)
+
+            if not outputs:
+                outputs = [np.empty(prices.shape) for _ in results]
+            for output, result in zip(outputs, results):
+                output[group.rows] = np.broadcast_to(np.asarray(result, dtype=float), (group.rows.size, prices.shape[1]))
+        return outputs
+
+    @staticmethod
+    def solve(
+        request: MultiProductRequest,
+        shapes: Optional[ProductShapes] = None,
+        templates: Optional[dict[ProductKey, ProductTemplate]] = None
+    ) -> MultiProductResponse:
+        start = time.perf_counter()
+
+        try:
+            products = request.products
+            constraints = request.constraints
+            names = [product.name for product in products]
+            count = len(products)
+
+            groups = MultiProductEngine.group(MultiProductEngine.shapes(products) if shapes is None else shapes, templates)
+
+            weights = np.array([
+                [1.0] * count if constraint.weights is None else [constraint.weights.get(name, 0.0) for name in names]
+                for constraint in constraints
+            ]).reshape(len(constraints), count)
+            limits = np.array([constraint.limit for constraint in constraints])
+            uses_cost = np.array([constraint.kind == 'cost' for constraint in constraints], dtype=bool)
+
+            grid = np.geomspace(Settings.NUMERIC_MIN_PRICE, Settings.NUMERIC_MAX_PRICE, Settings.MULTI_PRODUCT_GRID_POINTS)
+            grid_profit, grid_demand, grid_cost = MultiProductEngine._evaluate(groups, np.broadcast_to(grid, (count, grid.size)))
+            feasible = np.isfinite(grid_profit) & np.isfinite(grid_demand) & np.isfinite(grid_cost) & (grid_demand >= 0)
+
+            infeasible = np.flatnonzero(~np.any(feasible, axis=1))
+            if infeasible.size:
+                raise ValueError(f"Nenhum preço viável para o produto '{names[infeasible[0]]}'")
+
+            def usage(demand: np.ndarray, cost: np.ndarray) -> np.ndarray:
+                return np.where(uses_cost, weights @ cost, weights @ demand) if constraints else np.zeros(0)
+
+            def lagrangian(multipliers: np.ndarray, profit: np.ndarray, demand: np.ndarray, cost: np.ndarray) -> np.ndarray:
+                # L_i(p) - Σ_k λ_k w_ki U_ki(p): separável por produto para λ fixo
+                value = profit.copy()
+                for k in np.flatnonzero(multipliers):
+                    value -= multipliers[k] * weights[k][:, None] * (cost if uses_cost[k] else demand)
+                return value
+
+            def respond(multipliers: np.ndarray) -> tuple[np.ndarray, ...]:
+                # máximo global de cada produto na grade, refinado por Newton vetorizado em d/dp do lagrangiano
+                objective = np.where(feasible, lagrangian(multipliers, grid_profit, grid_demand, grid_cost), -np.inf)
+                best = np.argmax(objective, axis=1)
+                rows = np.arange(count)
+                prices = grid[best][:, None]
+                base = (grid_profit[rows, best][:, None], grid_demand[rows, best][:, None], grid_cost[rows, best][:, None])
+                base_value = objective[rows, best][:, None]
+
+                polished, values = prices, base
+                for _ in range(MultiProductEngine.NEWTON_STEPS):
+                    profit_1, profit_2, demand_1, demand_2, cost_1, cost_2 = MultiProductEngine._evaluate(groups, polished, True)
+                    gradient = lagrangian(multipliers, profit_1, demand_1, cost_1)
+                    curvature = lagrangian(multipliers, profit_2, demand_2, cost_2)
+                    with np.errstate(all='ignore'):
+                        step = np.where(curvature < 0, gradient / np.where(curvature == 0, 1.0, curvature), 0.0)
+                        # passo até Q = 0 pela tangente da demanda: o ótimo pode estar na borda em que o produto deixa de vender
+                        boundary = polished - (1 - 1e-12) * values[1] / np.where(demand_1 == 0, np.nan, demand_1)
+                    target = np.clip(np.where(np.isfinite(step), polished - step, polished), grid[0], grid[-1])
+                    candidate = MultiProductEngine._evaluate(groups, target)
+
+                    outside = ~(candidate[1] >= 0)
+                    if np.any(outside):
+                        between = np.isfinite(boundary) & ((boundary - polished) * (target - boundary) >= 0)
+                        target = np.where(outside, np.where(between, boundary, polished), target)
+                        candidate = MultiProductEngine._evaluate(groups, target)
+                        target = np.where(candidate[1] >= 0, target, polished)
+                        candidate = tuple(np.where(candidate[1] >= 0, value, current) for value, current in zip(candidate, values))
+                    polished, values = target, candidate
+
+                polished_value = lagrangian(multipliers, *values)
+                better = (
+                    np.isfinite(polished_value) & np.isfinite(values[1]) & np.isfinite(values[2])
+                    & (values[1] >= 0) & (polished_value >= base_value)
+                )
+                prices = np.where(better, polished, prices)[:, 0]
+                profit, demand, cost = (np.where(better, value, fallback)[:, 0] for value, fallback in zip(values, base))
+                return prices, profit, demand, cost
+
+            def within(used: np.ndarray, k: int) -> bool:
+                return used[k] <= limits[k] + MultiProductEngine.USAGE_TOLERANCE * max(1.0, limits[k])
+
+            multipliers = np.zeros(len(constraints))
+            state = respond(multipliers)
+
+            # decomposição dual: λ_k é o menor multiplicador que respeita a restrição k (bisseção cíclica)
+            for _ in range(MultiProductEngine.MAX_ROUNDS if constraints else 0):
+                used = usage(state[2], state[3])
+                if all(within(used, k) for k in range(len(constraints))) and not np.any(multipliers):
+                    break
+
+                previous = multipliers.copy()
+                for k in range(len(constraints)):
+                    trial = multipliers.copy()
+
+                    def evaluate(value: float):
+                        trial[k] = value
+                        candidate = respond(trial)
+                        return candidate, usage(candidate[2], candidate[3])
+
+                    low_state, low_used = evaluate(0.0)
+                    if within(low_used, k):
+                        multipliers[k], state = 0.0, low_state
+                        continue
+
+                    # chute de escala: lucro por unidade do recurso na solução sem a restrição
+                    low, low_gap = 0.0, low_used[k] - limits[k]
+                    high = multipliers[k] or max(abs(float(np.sum(low_state[1]))), 1.0) / max(low_used[k], 1e-12)
+                    high_state, high_used = evaluate(high)
+                    for _ in range(MultiProductEngine.MAX_DOUBLINGS):
+                        if within(high_used, k):
+                            break
+                        low, low_gap, high = high, high_used[k] - limits[k], high * 2
+                        high_state, high_used = evaluate(high)
+                    else:
+                        raise ValueError(f"Restrição {k + 1} ({constraints[k].kind} <= {constraints[k].limit:g}) é inviável")
+
+                    # regula falsi (Illinois): perto da solução o uso varia quase linearmente com λ
+                    high_gap = high_used[k] - limits[k]
+                    slope_low, slope_high, side = low_gap, high_gap, 0
+                    for _ in range(MultiProductEngine.BISECTION_STEPS):
+                        if (high - low <= MultiProductEngine.LAMBDA_TOLERANCE * max(1.0, high)
+                                or high_gap >= -MultiProductEngine.TIGHTNESS * max(1.0, limits[k])):
+                            break
+
+                        middle = high - slope_high * (high - low) / (slope_high - slope_low)
+                        if not low < middle < high:
+                            middle = (low + high) / 2
+
+                        middle_state, middle_used = evaluate(middle)
+                        gap = middle_used[k] - limits[k]
+                        if within(middle_used, k):
+                            high, high_state, high_gap, slope_high = middle, middle_state, gap, gap
+                            slope_low = slope_low / 2 if side == 1 else slope_low
+                            side = 1
+                        else:
+                            low, slope_low = middle, gap
+                            slope_high = slope_high / 2 if side == -1 else slope_high
+                            side = -1
+
+                    multipliers[k], state = high, high_state
+
+                if np.all(np.abs(multipliers - previous) <= MultiProductEngine.LAMBDA_TOLERANCE * np.maximum(1.0, multipliers)):
+                    break
+
+            prices, profit, demand, cost = state
+            used = usage(demand, cost)
+
+            unbounded = np.flatnonzero(prices >= grid[-1] * (1 - 1e-6))
+            if unbounded.size:
+                raise ValueError(f"O lucro do produto '{names[unbounded[0]]}' cresce sem limite com o preço")
+
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Erro ao otimizar produtos: {str(e)}")
+
+        return MultiProductResponse(
+            total_profit=float(np.sum(profit)),
+            products=[
+                ProductResult(
+                    name=name,
+                    optimal_price=float(prices[index]),
+                    quantity=float(demand[index]),
+                    cost=float(cost[index]),
+                    profit=float(profit[index]),
+                )
+                for index, name in enumerate(names)
+            ],
+            constraints=[
+                ConstraintResult(
+                    kind=constraint.kind,
+                    limit=constraint.limit,
+                    usage=float(used[k]),
+                    shadow_price=float(multipliers[k]),
+                    binding=bool(multipliers[k] > 0),
+                )
+                for k, constraint in enumerate(constraints)
+            ],
+            templates=len(groups),
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+        )
@@ -0,0 +1,102 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.core.settings import Settings
+from app.schemas import OptimizationInfo
+from app.services.compiled_model import compiled_models
+
+
+class OptimizationCache:
+
+    def __init__(self, max_size: int, ttl_seconds: int, sqlite_path: Optional[str] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_path = sqlite_path
+        self._entries: "OrderedDict[str, tuple[float, OptimizationInfo]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if sqlite_path:
+            self._disk = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._disk.execute(
+                'CREATE TABLE IF NOT EXISTS optimization_cache ('
+                'key TEXT PRIMARY KEY, payload TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            self._disk.commit()
+
+    @staticmethod
+    def canonical_key(cost_function: str, demand_function: str) -> str:
+        return compiled_models.get(cost_function, demand_function).canonical_key
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[OptimizationInfo]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                created_at, info = entry
+                if not self._is_expired(created_at):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return info
+                del self._entries[key]
+
+            if self._disk:
+                row = self._disk.execute(
+                    'SELECT payload, created_at FROM optimization_cache WHERE key = ?', (key,)
+                ).fetchone()
+                if row and not self._is_expired(row[1]):
+                    info = OptimizationInfo.model_validate_json(row[0])
+                    self._store_in_memory(key, row[1], info)
+                    self.disk_hits += 1
+                    return info
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, info: OptimizationInfo) -> None:
+        created_at = time.time()
+        with self._lock:
+            self._store_in_memory(key, created_at, info)
+            if self._disk:
+                self._disk.execute(
+                    'INSERT OR REPLACE INTO optimization_cache (key, payload, created_at) VALUES (?, ?, ?)',
+                    (key, info.model_dump_json(), created_at)
+                )
+                self._disk.commit()
+
+    def _store_in_memory(self, key: str, created_at: float, info: OptimizationInfo) -> None:
+        self._entries[key] = (created_at, info)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._disk:
+                self._disk.execute('DELETE FROM optimization_cache')
+                self._disk.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+optimization_cache = OptimizationCache(
+    max_size=Settings.OPTIMIZATION_CACHE_SIZE,
+    ttl_seconds=Settings.OPTIMIZATION_CACHE_TTL_SECONDS,
+    sqlite_path=Settings.OPTIMIZATION_CACHE_SQLITE_PATH,
+)
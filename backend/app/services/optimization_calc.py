@@ -1,137 +1,161 @@
 from io import BytesIO
+from typing import Optional
 import sympy as sp
-import numpy as np
-import matplotlib
-matplotlib.use('Agg')  
-import matplotlib.pyplot as plt
-from sympy.parsing.sympy_parser import parse_expr
+from app.core.metrics import STAGE_LATENCY
+from app.core.settings import Settings
 from app.schemas import OptimizationRequest, OptimizationInfo
+from app.services.compiled_model import CompiledModel, compiled_models
+from app.services.expression_parser import ExpressionParser
+from app.services.graph_renderer import GraphRenderer
+from app.services.graph_series import GraphSeries
+from app.services.interval_optimizer import IntervalOptimizer
+from app.services.polynomial_engine import PolynomialEngine, UnsupportedExpressionError
+
+WARMUP_REQUEST = {'optimization_name': 'warmup', 'cost_function': '100 + 50*q', 'demand_function': '200 - 2*p'}
 
 
 class OptimizationCalc:
     
     @staticmethod
-    def calculate_optimal_price(dto: OptimizationRequest) -> OptimizationInfo:
-       
-        p = sp.Symbol('p')  # preço
-        q = sp.Symbol('q')  # quantidade
+    def calculate_optimal_price(dto: OptimizationRequest, engine: Optional[str] = None, model: Optional[CompiledModel] = None) -> OptimizationInfo:
         
         try:
-           
-            cost_expr = parse_expr(dto.cost_function, local_dict={'q': q})  # C(q)
-            demand = parse_expr(dto.demand_function, local_dict={'p': p})   # Q(p)
-            
-            # C(Q(p))
-            cost = cost_expr.subs(q, demand)
-            
-            # Receita: R(p) = p · Q(p)
-            revenue = p * demand
-            
-            # Lucro: L(p) = R(p) - C(Q(p))
-            profit = revenue - cost
-            
-            profit_derivative = sp.diff(profit, p)
-            critical_points = sp.solve(profit_derivative, p)
-            
-            valid_points = [
-                float(point) for point in critical_points 
-                if point.is_real and float(point) > 0
-            ]
-            
-            if not valid_points:
-                raise ValueError("Nenhum ponto crítico válido encontrado")
-            
-            second_derivative = sp.diff(profit_derivative, p)
-            
-            optimal_price = None
-            max_profit_value = float('-inf')
-            
-            for point in valid_points:
-                second_deriv_value = float(second_derivative.subs(p, point))
-                if second_deriv_value < 0:
-                    profit_value = float(profit.subs(p, point))
-                    if profit_value > max_profit_value:
-                        max_profit_value = profit_value
-                        optimal_price = point
-            
-            if optimal_price is None:
-                optimal_price = max(valid_points, key=lambda price: float(profit.subs(p, price)))
-                max_profit_value = float(profit.subs(p, optimal_price))
-            
-            return OptimizationInfo(
-                optimal_price=optimal_price,
-                max_profit=max_profit_value,
-                profit_function=str(profit),
-            )
+            # parse, lucro e funções numéricas vêm do modelo compilado, compartilhado com o gráfico
+            with STAGE_LATENCY.time(stage='parse'):
+                model = model or compiled_models.get(dto.cost_function, dto.demand_function)
+            method = dto.method or 'auto'
+            
+            with STAGE_LATENCY.time(stage='solve'):
+                if method == 'numeric':
+                    return IntervalOptimizer.optimize(model)
+                
+                try:
+                    return OptimizationCalc._symbolic_optimal_price(model, engine)
+                except Exception:
+                    if method == 'symbolic':
+                        raise
+                    # sem máximo local simbólico (ou sem solução): otimização no intervalo viável
+                    return IntervalOptimizer.optimize(model)
         
         except Exception as e:
             raise ValueError(f"Erro ao calcular otimização: {str(e)}")
     
     @staticmethod
-    def generate_graph_image(dto: OptimizationRequest, optimization: OptimizationInfo) -> BytesIO:
+    def _symbolic_optimal_price(model: CompiledModel, engine: Optional[str] = None) -> OptimizationInfo:
+        p = model.p
+        profit = model.profit
         
-        p = sp.Symbol('p')  # preço
-        q = sp.Symbol('q')  # quantidade
+        if (engine or Settings.OPTIMIZATION_ENGINE) == 'polynomial':
+            try:
+                return PolynomialEngine.optimize(profit, p)
+            except UnsupportedExpressionError:
+                pass
+        
+        critical_points = sp.solve(model.profit_derivative, p)
+        
+        valid_points = [
+            float(point) for point in critical_points 
+            if point.is_real and float(point) > 0
+        ]
+        
+        if not valid_points:
+            raise ValueError("Nenhum ponto crítico válido encontrado")
+        
+        second_derivative = model.second_derivative
+        
+        optimal_price = None
+        max_profit_value = float('-inf')
+        
+        for point in valid_points:
+            second_deriv_value = float(second_derivative.subs(p, point))
+            if second_deriv_value < 0:
+                profit_value = float(profit.subs(p, point))
+                if profit_value > max_profit_value:
+                    max_profit_value = profit_value
+                    optimal_price = point
+        
+        if optimal_price is None:
+            raise ValueError("Nenhum máximo local encontrado entre os pontos críticos")
+        
+        return OptimizationInfo(
+            optimal_price=optimal_price,
+            max_profit=max_profit_value,
+            profit_function=str(profit),
+        )
+    
+    @staticmethod
+    def approximate_optimal_price(dto: OptimizationRequest, model: Optional[CompiledModel] = None) -> OptimizationInfo:
+        # melhor esforço quando a solução exata estoura o tempo: otimizador numérico no intervalo viável
         try:
-            cost_expr = parse_expr(dto.cost_function, local_dict={'q': q})  # C(q)
-            demand = parse_expr(dto.demand_function, local_dict={'p': p})   # Q(p)
-            
-            # C(Q(p))
-            cost = cost_expr.subs(q, demand)
-            
-            # Receita e lucro
-            revenue = p * demand
-            profit = revenue - cost
-            
-            cost_func = sp.lambdify(p, cost, 'numpy')
-            revenue_func = sp.lambdify(p, revenue, 'numpy')
-            profit_func = sp.lambdify(p, profit, 'numpy')
-            
-            x_range = np.linspace(0, optimization.optimal_price * 2, 1000)
-            
-            cost_values = cost_func(x_range)
-            revenue_values = revenue_func(x_range)
-            profit_values = profit_func(x_range)
-            
-            plt.figure(figsize=(12, 8))
-            
-            plt.plot(x_range, cost_values, label='Custo', color='red', linewidth=2)
-            plt.plot(x_range, revenue_values, label='Receita', color='green', linewidth=2)
-            plt.plot(x_range, profit_values, label='Lucro', color='blue', linewidth=2)
-            
-            plt.scatter([optimization.optimal_price], [optimization.max_profit], color='gold', s=200, zorder=5, 
-                       label=f'Ponto Ótimo ({optimization.optimal_price:.2f}, {optimization.max_profit:.2f})',
-                       edgecolors='black', linewidth=2)
-            
-            plt.axvline(x=optimization.optimal_price, color='gray', linestyle='--', alpha=0.7)
-            plt.axhline(y=optimization.max_profit, color='gray', linestyle='--', alpha=0.7)
-            
-            plt.xlabel('Preço (x)', fontsize=12, fontweight='bold')
-            plt.ylabel('Valor ($)', fontsize=12, fontweight='bold')
-            plt.title('Otimização de Preço - Análise de Custo, Receita e Lucro', 
-                     fontsize=14, fontweight='bold')
-            plt.legend(fontsize=10, loc='best')
-            plt.grid(True, alpha=0.3)
-            plt.tight_layout()
+            with STAGE_LATENCY.time(stage='approximate'):
+                model = model or compiled_models.get(dto.cost_function, dto.demand_function)
+                optimization = IntervalOptimizer.optimize(model)
+            optimization.approximate = True
+            return optimization
+        
+        except Exception as e:
+            raise ValueError(f"Erro ao aproximar otimização: {str(e)}")
+    
+    @staticmethod
+    def generate_graph_image(
+        dto: OptimizationRequest,
+        optimization: OptimizationInfo,
+        image_format: str = 'png',
+        preview: bool = False,
+        model: Optional[CompiledModel] = None
+    ) -> BytesIO:
+        
+        try:
+            with STAGE_LATENCY.time(stage='parse'):
+                model = model or compiled_models.get(dto.cost_function, dto.demand_function)
+                cost_func, revenue_func, profit_func = model.numeric_functions
+            
+            with STAGE_LATENCY.time(stage='render'):
+                return GraphRenderer.render(
+                    cost_func,
+                    revenue_func,
+                    profit_func,
+                    optimization.optimal_price,
+                    optimization.max_profit,
+                    image_format=image_format,
+                    preview=preview,
+                )
             
-            img_buffer = BytesIO()
-            plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
-            img_buffer.seek(0)
-            plt.close()
+        except Exception as e:
+            raise ValueError(f"Erro ao gerar gráfico: {str(e)}")
+    
+    @staticmethod
+    def generate_graph_series(
+        dto: OptimizationRequest,
+        optimization: OptimizationInfo,
+        model: Optional[CompiledModel] = None
+    ) -> bytes:
+        
+        try:
+            with STAGE_LATENCY.time(stage='parse'):
+                model = model or compiled_models.get(dto.cost_function, dto.demand_function)
             
-            return img_buffer
+            with STAGE_LATENCY.time(stage='series'):
+                return GraphSeries.compute(model, optimization.optimal_price)
             
         except Exception as e:
-            plt.close()
-            raise ValueError(f"Erro ao gerar gráfico: {str(e)}")
+            raise ValueError(f"Erro ao gerar série do gráfico: {str(e)}")
     
     @staticmethod
-    def validate_functions(cost_function: str, demand_function: str) -> bool:
+    def warmup() -> None:
+        # primeira compilação, solução e renderização fora do caminho da primeira requisição
+        dto = OptimizationRequest(**WARMUP_REQUEST)
+        optimization = OptimizationCalc.calculate_optimal_price(dto)
+        OptimizationCalc.generate_graph_image(dto, optimization)
+        OptimizationCalc.generate_graph_image(dto, optimization, preview=True)
+        OptimizationCalc.generate_graph_series(dto, optimization)
     
-        x = sp.Symbol('x')
+    @staticmethod
+    def validate_functions(cost_function: str, demand_function: str) -> bool:
+        # as mesmas variáveis do modelo: q no custo, p na demanda
         try:
-            parse_expr(cost_function, local_dict={'x': x})
-            parse_expr(demand_function, local_dict={'x': x})
+            ExpressionParser.check_names(ExpressionParser.parse(cost_function), ('q',), required='q')
+            ExpressionParser.check_names(ExpressionParser.parse(demand_function), ('p',), required='p')
             return True
-        except Exception:
+        except ValueError:
             return False
@@ -1,77 +1,476 @@
-from typing import List
+from typing import AsyncIterator, Optional
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from hashlib import sha256
+from io import StringIO
+import csv
+import json
+import re
+import zlib
+from urllib.parse import quote
 from uuid import UUID
 import asyncio
-from app.schemas import OptimizationInfo, OptimizationRequest, OptimizationResponse, StandartOutput
+import logging
+from app.schemas import BatchItemResult, BatchOptimizationRequest, BatchOptimizationResponse, GraphDataResponse, JobAccepted, JobStatus, MultiProductRequest, MultiProductResponse, OptimizationInfo, OptimizationPage, OptimizationPatch, OptimizationRequest, OptimizationResponse, OptimizationSummary, ScenarioRequest, ScenarioResponse, StandartOutput, SweepRequest, SweepResponse
 from app.core.database.connection import async_session
+from app.core.metrics import STAGE_LATENCY
+from app.core.executors import SolverResourceError, SolverTimeoutError, get_solver_pool
+from app.core.settings import Settings
+from sqlalchemy import and_, insert, or_, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
-from app.models import PriceOptimization, User
-from fastapi import HTTPException
+from sqlalchemy.orm import undefer
+from app.models import OptimizationStatus, PriceOptimization
+from fastapi import HTTPException, Response
+from pydantic import ValidationError
 from app.services.optimization_calc import OptimizationCalc
 from app.services.file_service import FileService
+from app.services.graph_series import GraphSeries
+from app.services.graph_store import graph_store
+from app.services.job_queue import create_job_queue
+from app.services.multi_product_engine import MultiProductEngine
+from app.services.optimization_cache import optimization_cache
+from app.services.price_sweep import PriceSweep
+from app.services.response_cache import ResponseCache, response_cache
+from app.services.scenario_engine import ScenarioEngine
 
 class OptimizationService:
    
+    @staticmethod
+    def graph_url(optimization_name: str, graph_id: Optional[str] = None) -> str:
+        # com o graph_id na URL, um novo ótimo vira uma nova URL e o PNG antigo no cache do navegador deixa de valer
+        url = f"/optimizations/{quote(optimization_name, safe='')}/graph"
+        return f"{url}?v={graph_id}" if graph_id else url
+    
+    @staticmethod
+    def graph_data_url(optimization_name: str, graph_id: Optional[str] = None) -> str:
+        url = f"{OptimizationService.graph_url(optimization_name)}/data"
+        return f"{url}?v={graph_id}" if graph_id else url
+    
+    @staticmethod
+    def graph_id(optimization: PriceOptimization) -> str:
+        # o gráfico depende das funções (hash canônico: reordenar ou reespaçar mantém o gráfico) e do ótimo marcado nele;
+        # método e aproximação também entram, para que todo recálculo do _apply_update troque a chave no graph_store
+        functions_hash = optimization.expression_hash or sha256(
+            f'{optimization.cost_function}|{optimization.demand_function}'.encode()
+        ).hexdigest()
+        solution_hash = sha256((
+            f'{functions_hash}|{optimization.optimal_price!r}|{optimization.max_profit!r}'
+            f'|{optimization.method}|{bool(optimization.approximate)}'
+        ).encode()).hexdigest()
+        return f'{optimization.id}-{solution_hash[:16]}'
+    
+    @staticmethod
+    def _integrity_error(error: IntegrityError) -> HTTPException:
+        # a FK de user_id substitui a consulta prévia ao usuário; a constraint única, a de nome
+        if 'foreign key' in str(error.orig).lower():
+            return HTTPException(status_code=404, detail="User not found")
+        return HTTPException(status_code=400, detail="Optimization name already exists for this user")
+    
+    @staticmethod
+    async def _expression_hash(cost_function: str, demand_function: str) -> str:
+        # o parse já passou pelos limites estáticos: barato o bastante para uma thread
+        try:
+            return await asyncio.to_thread(optimization_cache.canonical_key, cost_function, demand_function)
+        except Exception as error:
+            raise ValueError(f"Erro ao calcular otimização: {str(error)}")
+    
+    @staticmethod
+    async def _solve(dto: OptimizationRequest) -> OptimizationInfo:
+        return (await OptimizationService._solve_keyed(dto))[1]
+    
+    @staticmethod
+    async def _solve_keyed(dto: OptimizationRequest) -> tuple[str, OptimizationInfo]:
+        expression_hash = await OptimizationService._expression_hash(dto.cost_function, dto.demand_function)
+        key = expression_hash
+        
+        if dto.method != 'auto':
+            key = f'{key}:{dto.method}'
+        
+        cached = optimization_cache.get(key)
+        if cached:
+            return expression_hash, cached
+        
+        # diff/solve rodam em workers que podem ser mortos: timeout, limite de memória e cancelamento
+        pool = get_solver_pool()
+        try:
+            try:
+                optimization = await pool.run(OptimizationCalc.calculate_optimal_price, dto)
+            except SolverTimeoutError:
+                optimization = await pool.run(
+                    OptimizationCalc.approximate_optimal_price, dto, timeout=Settings.APPROXIMATION_TIMEOUT_SECONDS
+                )
+        except (SolverTimeoutError, SolverResourceError) as error:
+            raise ValueError(str(error))
+        
+        # aproximação por timeout fica fora do cache: a próxima requisição tenta de novo a solução exata
+        if not optimization.approximate:
+            optimization_cache.set(key, optimization)
+        return expression_hash, optimization
+    
+    @staticmethod
+    async def _graph_series(dto: OptimizationRequest, optimization: OptimizationInfo) -> Optional[bytes]:
+        # a série é acessória: se falhar, a otimização é salva sem ela e o endpoint de dados a recalcula
+        try:
+            return await asyncio.to_thread(OptimizationCalc.generate_graph_series, dto, optimization)
+        except ValueError as error:
+            logging.error("Error generating graph series for %s: %s", dto.optimization_name, error)
+            return None
+    
     @staticmethod
     async def make_optimization(user_id: UUID, dto: OptimizationRequest) -> StandartOutput:
+        try:
+            expression_hash, optimization = await OptimizationService._solve_keyed(dto)
+        except ValueError as error:
+            raise HTTPException(status_code=422, detail=str(error))
+        
+        graph_series = await OptimizationService._graph_series(dto, optimization)
+        
         async with async_session() as session:
-            result = await session.execute(select(User).where(User.id == user_id))
-            user = result.scalar_one_or_none()
+            try:
+                await session.execute(
+                    insert(PriceOptimization).values(
+                        optimization_name=dto.optimization_name,
+                        user_id=user_id,
+                        cost_function=dto.cost_function,
+                        demand_function=dto.demand_function,
+                        expression_hash=expression_hash,
+                        optimal_price=optimization.optimal_price,
+                        max_profit=optimization.max_profit,
+                        approximate=optimization.approximate,
+                        method=dto.method,
+                        graph_image_url=OptimizationService.graph_url(dto.optimization_name),
+                        graph_series=graph_series
+                    )
+                )
+                with STAGE_LATENCY.time(stage='commit'):
+                    await session.commit()
+            except IntegrityError as error:
+                raise OptimizationService._integrity_error(error)
             
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
+            await response_cache.invalidate(user_id, dto.optimization_name)
+
+            if optimization.approximate:
+                return StandartOutput(status_code=201, detail="Optimization created with an approximate result.")
+            return StandartOutput(status_code=201, detail="Optimization created successfully.")
+        
+    @staticmethod
+    async def _insert_batch(rows: list[dict]) -> set[str]:
+        # um INSERT para o lote; se um nome colidir com uma escrita concorrente, refaz item a item
+        # para que só o item em conflito falhe. Devolve os nomes rejeitados
+        async with async_session() as session:
+            try:
+                await session.execute(insert(PriceOptimization), rows)
+                with STAGE_LATENCY.time(stage='commit'):
+                    await session.commit()
+                return set()
+            except IntegrityError as error:
+                await session.rollback()
+                http_error = OptimizationService._integrity_error(error)
+                if http_error.status_code == 404:
+                    raise http_error
             
-            existing_optimization = await session.execute(
-                select(PriceOptimization).where(
-                    PriceOptimization.optimization_name == dto.optimization_name,
-                    PriceOptimization.user_id == user_id
+            rejected = set()
+            for row in rows:
+                try:
+                    await session.execute(insert(PriceOptimization).values(**row))
+                    with STAGE_LATENCY.time(stage='commit'):
+                        await session.commit()
+                except IntegrityError as error:
+                    await session.rollback()
+                    http_error = OptimizationService._integrity_error(error)
+                    if http_error.status_code == 404:
+                        raise http_error
+                    rejected.add(row['optimization_name'])
+            return rejected
+    
+    @staticmethod
+    async def make_batch_optimization(user_id: UUID, dto: BatchOptimizationRequest) -> BatchOptimizationResponse:
+        # a sessão só fica aberta na checagem de nomes e no INSERT: os solves não seguram conexão do pool
+        async with async_session() as session:
+            existing_names_result = await session.execute(
+                select(PriceOptimization.optimization_name).where(
+                    PriceOptimization.user_id == user_id,
+                    PriceOptimization.optimization_name.in_({item.optimization_name for item in dto.items})
+                )
+            )
+            taken_names = set(existing_names_result.scalars().all())
+        
+        results: dict[int, BatchItemResult] = {}
+        pending: list[tuple[int, OptimizationRequest]] = []
+        
+        for index, item in enumerate(dto.items):
+            if item.optimization_name in taken_names:
+                results[index] = BatchItemResult(
+                    optimization_name=item.optimization_name,
+                    status_code=400,
+                    detail="Optimization name already exists for this user"
+                )
+                continue
+            taken_names.add(item.optimization_name)
+            pending.append((index, item))
+        
+        solved = await asyncio.gather(*[
+            OptimizationService._solve_keyed(item) for _, item in pending
+        ], return_exceptions=True)
+        
+        succeeded: list[tuple[int, OptimizationRequest, str, OptimizationInfo]] = []
+        
+        for (index, item), outcome in zip(pending, solved):
+            if isinstance(outcome, Exception):
+                if not isinstance(outcome, ValueError):
+                    logging.error("Error in make_batch_optimization for %s: %s", item.optimization_name, outcome)
+                results[index] = BatchItemResult(
+                    optimization_name=item.optimization_name,
+                    status_code=422 if isinstance(outcome, ValueError) else 500,
+                    detail=str(outcome) if isinstance(outcome, ValueError) else 'Something went wrong. Please try again later.'
+                )
+                continue
+            succeeded.append((index, item, *outcome))
+        
+        graph_series = await asyncio.gather(*[
+            OptimizationService._graph_series(item, optimization) for _, item, _, optimization in succeeded
+        ])
+        
+        rows = [
+            {
+                'optimization_name': item.optimization_name,
+                'user_id': user_id,
+                'cost_function': item.cost_function,
+                'demand_function': item.demand_function,
+                'expression_hash': expression_hash,
+                'optimal_price': optimization.optimal_price,
+                'max_profit': optimization.max_profit,
+                'approximate': optimization.approximate,
+                'method': item.method,
+                'graph_image_url': OptimizationService.graph_url(item.optimization_name),
+                'graph_series': series,
+            }
+            for (_, item, expression_hash, optimization), series in zip(succeeded, graph_series)
+        ]
+        
+        rejected = await OptimizationService._insert_batch(rows) if rows else set()
+        created = 0
+        
+        for index, item, _, optimization in succeeded:
+            if item.optimization_name in rejected:
+                results[index] = BatchItemResult(
+                    optimization_name=item.optimization_name,
+                    status_code=400,
+                    detail="Optimization name already exists for this user"
                 )
+                continue
+            created += 1
+            results[index] = BatchItemResult(
+                optimization_name=item.optimization_name,
+                status_code=201,
+                detail="Optimization created successfully.",
+                optimal_price=optimization.optimal_price,
+                max_profit=optimization.max_profit,
+                approximate=optimization.approximate
+            )
+        
+        if created:
+            await response_cache.invalidate(
+                user_id, *(row['optimization_name'] for row in rows if row['optimization_name'] not in rejected)
             )
+        
+        return BatchOptimizationResponse(
+            created=created,
+            failed=len(dto.items) - created,
+            results=[results[index] for index in range(len(dto.items))]
+        )
+        
+    @staticmethod
+    async def submit_optimization_job(user_id: UUID, dto: OptimizationRequest) -> JobAccepted:
+        async with async_session() as session:
+            try:
+                result = await session.execute(
+                    insert(PriceOptimization).values(
+                        optimization_name=dto.optimization_name,
+                        user_id=user_id,
+                        cost_function=dto.cost_function,
+                        demand_function=dto.demand_function,
+                        method=dto.method,
+                        status=OptimizationStatus.PENDING
+                    ).returning(PriceOptimization.id)
+                )
+                job_id = result.scalar_one()
+                with STAGE_LATENCY.time(stage='commit'):
+                    await session.commit()
+            except IntegrityError as error:
+                raise OptimizationService._integrity_error(error)
             
-            if existing_optimization.scalar_one_or_none():
-                raise HTTPException(status_code=400, detail="Optimization name already exists for this user")
+            await response_cache.invalidate(user_id, dto.optimization_name)
+            await job_queue.enqueue(job_id)
             
-            optimization = await asyncio.to_thread(
-                OptimizationCalc.calculate_optimal_price, dto
+            return JobAccepted(
+                job_id=job_id,
+                status=OptimizationStatus.PENDING,
+                status_url=f"/optimizations/jobs/{job_id}"
             )
+    
+    @staticmethod
+    async def process_optimization_job(job_id: UUID) -> None:
+        async with async_session() as session:
+            optimization = await session.get(PriceOptimization, job_id)
             
-            new_optimization = PriceOptimization(
-                optimization_name=dto.optimization_name,
-                user_id=user_id,
-                cost_function=dto.cost_function,
-                demand_function=dto.demand_function,
-                optimal_price=optimization.optimal_price,
-                max_profit=optimization.max_profit
+            # a fila já trocou PENDING -> RUNNING; outro estado é job encerrado ou reivindicado por outro worker
+            if not optimization or optimization.status != OptimizationStatus.RUNNING:
+                return
+            
+            dto = OptimizationRequest.model_construct(
+                optimization_name=optimization.optimization_name,
+                cost_function=optimization.cost_function,
+                demand_function=optimization.demand_function,
+                method=optimization.method
             )
-
-            session.add(new_optimization)
-            await session.flush() 
+            user_id = optimization.user_id
+            started_at = optimization.started_at
+        
+        await response_cache.invalidate(user_id, dto.optimization_name)
+        
+        try:
+            expression_hash, result = await OptimizationService._solve_keyed(dto)
+            graph_series = await OptimizationService._graph_series(dto, result)
             
-            image_buffer = await asyncio.to_thread(
-                OptimizationCalc.generate_graph_image, dto, optimization
+            values = dict(
+                expression_hash=expression_hash,
+                optimal_price=result.optimal_price,
+                max_profit=result.max_profit,
+                approximate=result.approximate,
+                graph_image_url=OptimizationService.graph_url(dto.optimization_name),
+                graph_series=graph_series,
+                status=OptimizationStatus.DONE
             )
+        except Exception as error:
+            if not isinstance(error, ValueError):
+                logging.error("Error in optimization job %s: %s", job_id, error)
+            values = dict(
+                status=OptimizationStatus.FAILED,
+                error=str(error) if isinstance(error, ValueError) else 'Something went wrong. Please try again later.'
+            )
+        
+        # só grava se o job ainda é deste worker: lease vencido e reivindicado de novo, ou um PUT/PATCH
+        # que recalculou a linha no meio, descartam o resultado atrasado
+        async with async_session() as session:
+            result = await session.execute(
+                update(PriceOptimization).where(
+                    PriceOptimization.id == job_id,
+                    PriceOptimization.status == OptimizationStatus.RUNNING,
+                    PriceOptimization.started_at == started_at
+                ).values(**values).returning(PriceOptimization.id)
+            )
+            stale = result.scalar_one_or_none() is None
+            with STAGE_LATENCY.time(stage='commit'):
+                await session.commit()
+        
+        if stale:
+            logging.warning("Discarded stale result of optimization job %s", job_id)
+            return
+        await response_cache.invalidate(user_id, dto.optimization_name)
+    
+    @staticmethod
+    async def get_job_status(user_id: UUID, job_id: UUID) -> JobStatus:
+        async with async_session() as session:
+            result = await session.execute(
+                select(PriceOptimization).where(
+                    PriceOptimization.id == job_id,
+                    PriceOptimization.user_id == user_id
+                ))
+            
+            optimization = result.scalar_one_or_none()
+            
+            if not optimization:
+                raise HTTPException(status_code=404, detail="Job not found")
             
-            graph_url = await FileService.upload_graph_image(
-                image_buffer=image_buffer,
-                user_id=str(user_id),
-                optimization_id=str(new_optimization.id)
+            return JobStatus(
+                job_id=optimization.id,
+                optimization_name=optimization.optimization_name,
+                status=optimization.status,
+                error=optimization.error,
+                optimal_price=optimization.optimal_price,
+                max_profit=optimization.max_profit,
+                graph_image_url=(
+                    OptimizationService.graph_url(optimization.optimization_name, OptimizationService.graph_id(optimization))
+                    if optimization.status == OptimizationStatus.DONE else None
+                ),
+                approximate=bool(optimization.approximate)
             )
+    
+    @staticmethod
+    async def stream_job_events(user_id: UUID, job_id: UUID) -> AsyncIterator[str]:
+        job = await OptimizationService.get_job_status(user_id, job_id)
+        deadline = asyncio.get_running_loop().time() + Settings.JOB_EVENTS_TIMEOUT_SECONDS
+        last_status = None
+        
+        while True:
+            if job.status != last_status:
+                last_status = job.status
+                yield f"event: status\ndata: {job.model_dump_json()}\n\n"
+            
+            if job.status in (OptimizationStatus.DONE, OptimizationStatus.FAILED):
+                return
             
-            new_optimization.graph_image_url = graph_url
-            await session.commit()
-            await session.refresh(new_optimization)
+            if asyncio.get_running_loop().time() > deadline:
+                yield "event: timeout\ndata: {}\n\n"
+                return
+            
+            await job_queue.wait_for_update(Settings.JOB_POLL_INTERVAL_SECONDS)
+            job = await OptimizationService.get_job_status(user_id, job_id)
+        
+    @staticmethod
+    async def get_optimization(user_id: UUID, optimization_name: str, if_none_match: Optional[str] = None) -> Response:
+        # geração lida antes do banco: se uma escrita invalidar a chave no meio, o preenchimento é descartado
+        generation = response_cache.generation()
+        cached = await response_cache.get(user_id, optimization_name)
+        
+        if cached is None:
+            async with async_session() as session:
+                optimization_result = await session.execute(
+                    select(PriceOptimization).where(
+                        PriceOptimization.optimization_name == optimization_name,
+                        PriceOptimization.user_id == user_id
+                    ))
+                
+                optimization = optimization_result.scalar_one_or_none()
+                
+                if not optimization:
+                    raise HTTPException(status_code=404, detail="Optimization not found")
 
-            return StandartOutput(status_code=201, detail="Optimization created successfully.")
+                graph_id = OptimizationService.graph_id(optimization) if optimization.status == OptimizationStatus.DONE else None
+                body = OptimizationResponse(
+                    optimization_name=optimization.optimization_name,
+                    optimal_price=optimization.optimal_price,
+                    cost_function=optimization.cost_function,
+                    demand_function=optimization.demand_function,
+                    max_profit=optimization.max_profit,
+                    graph_image_url=OptimizationService.graph_url(optimization.optimization_name, graph_id) if graph_id else None,
+                    graph_data_url=OptimizationService.graph_data_url(optimization.optimization_name, graph_id) if graph_id else None,
+                    status=optimization.status,
+                    approximate=bool(optimization.approximate)
+                ).model_dump_json().encode()
+            
+            cached = ResponseCache.etag(body), body
+            await response_cache.set(user_id, optimization_name, *cached, generation)
+        
+        etag, body = cached
+        # no-cache: o cliente sempre revalida, e a revalidação com ETag igual não toca o banco
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        
+        if OptimizationService.etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
         
+        return Response(content=body, media_type='application/json', headers=headers)
+    
+    @staticmethod
+    async def _store_graph(user_id: str, graph_id: str, image: bytes) -> None:
+        with STAGE_LATENCY.time(stage='upload'):
+            await graph_store.put(user_id, graph_id, image)
+    
     @staticmethod
-    async def get_optimization(user_id: UUID, optimization_name:str) -> OptimizationResponse:
+    async def get_optimization_graph(user_id: UUID, optimization_name: str, if_none_match: Optional[str] = None) -> Response:
         async with async_session() as session:
-            result = await session.execute(select(User).where(User.id == user_id))         
-
-            user = result.scalar_one_or_none()
-
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-
             optimization_result = await session.execute(
                 select(PriceOptimization).where(
                     PriceOptimization.optimization_name == optimization_name,
@@ -82,27 +481,43 @@ class OptimizationService:
             
             if not optimization:
                 raise HTTPException(status_code=404, detail="Optimization not found")
-
-            return OptimizationResponse(
+            
+            if optimization.status != OptimizationStatus.DONE:
+                raise HTTPException(status_code=404, detail="Graph not available")
+        
+        # a conexão já voltou ao pool: renderização e upload não seguram a sessão
+        graph_id = OptimizationService.graph_id(optimization)
+        headers = {
+            'ETag': f'"{graph_id}"',
+            'Cache-Control': f'private, max-age={Settings.GRAPH_CACHE_MAX_AGE_SECONDS}'
+        }
+        
+        if OptimizationService.etag_matches(if_none_match, headers['ETag']):
+            return Response(status_code=304, headers=headers)
+        
+        image = await graph_store.get(str(user_id), graph_id)
+        
+        if image is None:
+            dto = OptimizationRequest.model_construct(
                 optimization_name=optimization.optimization_name,
-                optimal_price=optimization.optimal_price,
                 cost_function=optimization.cost_function,
-                demand_function=optimization.demand_function,
-                max_profit=optimization.max_profit,
-                graph_image_url=optimization.graph_image_url
+                demand_function=optimization.demand_function
             )
+            info = OptimizationInfo(optimal_price=optimization.optimal_price, max_profit=optimization.max_profit)
+            
+            image_buffer = await asyncio.to_thread(OptimizationCalc.generate_graph_image, dto, info)
+            image = image_buffer.getvalue()
+            FileService.upload_in_background(OptimizationService._store_graph(str(user_id), graph_id, image))
+        
+        return Response(content=image, media_type='image/png', headers=headers)
     
     @staticmethod
-    async def update_optimization(user_id: UUID, optimization_name: str, dto: OptimizationRequest) -> StandartOutput:
+    async def get_optimization_graph_data(user_id: UUID, optimization_name: str, if_none_match: Optional[str] = None) -> Response:
         async with async_session() as session:
-            result = await session.execute(select(User).where(User.id == user_id))
-            user = result.scalar_one_or_none()
-            
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            
             optimization_result = await session.execute(
-                select(PriceOptimization).where(
+                select(PriceOptimization)
+                .options(undefer(PriceOptimization.graph_series))
+                .where(
                     PriceOptimization.optimization_name == optimization_name,
                     PriceOptimization.user_id == user_id
                 ))
@@ -112,70 +527,448 @@ class OptimizationService:
             if not optimization:
                 raise HTTPException(status_code=404, detail="Optimization not found")
             
-            available_name_result = await session.execute(
-                select(PriceOptimization).where(PriceOptimization.optimization_name == dto.optimization_name,
-                PriceOptimization.user_id == user_id)
+            if optimization.status != OptimizationStatus.DONE:
+                raise HTTPException(status_code=404, detail="Graph not available")
+        
+        # mesma identidade do PNG: a série também depende das funções e do ótimo
+        etag = f'"{OptimizationService.graph_id(optimization)}-data"'
+        headers = {
+            'ETag': etag,
+            'Cache-Control': f'private, max-age={Settings.GRAPH_CACHE_MAX_AGE_SECONDS}'
+        }
+        
+        if OptimizationService.etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        
+        graph_series = optimization.graph_series
+        
+        if graph_series is None:
+            # linhas anteriores à coluna (ou cuja série falhou): calcula uma vez e grava
+            dto = OptimizationRequest.model_construct(
+                optimization_name=optimization.optimization_name,
+                cost_function=optimization.cost_function,
+                demand_function=optimization.demand_function
             )
-
-            available_name_optimization = available_name_result.scalar_one_or_none()
-
-            if dto.optimization_name != optimization_name and available_name_optimization:
-                raise HTTPException(status_code=400, detail="Optimization name already exists for this user")
+            info = OptimizationInfo(optimal_price=optimization.optimal_price, max_profit=optimization.max_profit)
             
-            if dto.cost_function != optimization.cost_function or dto.demand_function != optimization.demand_function:
+            try:
+                graph_series = await asyncio.to_thread(OptimizationCalc.generate_graph_series, dto, info)
+            except ValueError as error:
+                raise HTTPException(status_code=422, detail=str(error))
             
-                updated_optimization = await asyncio.to_thread(
-                    OptimizationCalc.calculate_optimal_price, dto
-                )
-                
-                image_buffer = await asyncio.to_thread(
-                    OptimizationCalc.generate_graph_image, dto, updated_optimization
-                )
-                
-                graph_url = await FileService.upload_graph_image(
-                    image_buffer=image_buffer,
-                    user_id=str(user_id),
-                    optimization_id=str(optimization.id)
+            async with async_session() as session:
+                await session.execute(
+                    update(PriceOptimization)
+                    .where(
+                        PriceOptimization.id == optimization.id,
+                        PriceOptimization.expression_hash.is_not_distinct_from(optimization.expression_hash)
+                    )
+                    .values(graph_series=graph_series)
                 )
+                await session.commit()
+        
+        points, series = GraphSeries.encode(graph_series)
+        body = GraphDataResponse(
+            points=points,
+            optimal_price=optimization.optimal_price,
+            max_profit=optimization.max_profit,
+            series=series
+        ).model_dump_json()
+        
+        return Response(content=body, media_type='application/json', headers=headers)
+    
+    @staticmethod
+    async def sweep_optimization(user_id: UUID, optimization_name: str, request: SweepRequest) -> SweepResponse:
+        async with async_session() as session:
+            optimization_result = await session.execute(
+                select(
+                    PriceOptimization.optimization_name,
+                    PriceOptimization.cost_function,
+                    PriceOptimization.demand_function,
+                    PriceOptimization.optimal_price,
+                    PriceOptimization.status
+                ).where(
+                    PriceOptimization.optimization_name == optimization_name,
+                    PriceOptimization.user_id == user_id
+                ))
+            
+            optimization = optimization_result.one_or_none()
+        
+        if not optimization:
+            raise HTTPException(status_code=404, detail="Optimization not found")
+        
+        if optimization.status != OptimizationStatus.DONE:
+            raise HTTPException(status_code=409, detail="Optimization is not finished yet")
+        
+        dto = OptimizationRequest.model_construct(
+            optimization_name=optimization.optimization_name,
+            cost_function=optimization.cost_function,
+            demand_function=optimization.demand_function
+        )
+        
+        try:
+            return await asyncio.to_thread(PriceSweep.sweep, dto, optimization.optimal_price, request)
+        except ValueError as error:
+            raise HTTPException(status_code=422, detail=str(error))
+    
+    @staticmethod
+    async def run_scenarios(request: ScenarioRequest) -> ScenarioResponse:
+        key = ScenarioEngine.key(request)
+        
+        try:
+            compiled = ScenarioEngine.cached(key)
+            if compiled is None:
+                # templates são entrada do usuário: diff/solve no pool de solvers, como no _solve_keyed
+                try:
+                    template = await get_solver_pool().run(ScenarioEngine.derive, *key, timeout=Settings.SOLVER_TIMEOUT_SECONDS)
+                except (SolverTimeoutError, SolverResourceError) as error:
+                    raise ValueError(str(error))
+                compiled = await asyncio.to_thread(ScenarioEngine.lambdify, key, template)
+            
+            return await asyncio.to_thread(ScenarioEngine.run, request, compiled)
+        except ValueError as error:
+            raise HTTPException(status_code=422, detail=str(error))
 
-                optimization.cost_function = dto.cost_function
-                optimization.demand_function = dto.demand_function
-                optimization.optimal_price = updated_optimization.optimal_price
-                optimization.max_profit = updated_optimization.max_profit
-                optimization.graph_image_url = graph_url
+    @staticmethod
+    async def run_multi_product(request: MultiProductRequest) -> MultiProductResponse:
+        try:
+            shapes = await asyncio.to_thread(MultiProductEngine.shapes, request.products)
+            templates = {key: MultiProductEngine.cached(key) for key in shapes}
+            missing = tuple(key for key, template in templates.items() if template is None)
+            
+            if missing:
+                # formas novas são entrada do usuário: diff/cse no pool de solvers, como em run_scenarios
+                try:
+                    derivations = await get_solver_pool().run(MultiProductEngine.derive, missing, timeout=Settings.SOLVER_TIMEOUT_SECONDS)
+                except (SolverTimeoutError, SolverResourceError) as error:
+                    raise ValueError(str(error))
+                
+                for key, derivation in zip(missing, derivations):
+                    templates[key] = await asyncio.to_thread(MultiProductEngine.lambdify, key, derivation)
             
-            optimization.optimization_name = dto.optimization_name
+            return await asyncio.to_thread(MultiProductEngine.solve, request, shapes, templates)
+        except ValueError as error:
+            raise HTTPException(status_code=422, detail=str(error))
+    
+    @staticmethod
+    async def update_optimization(user_id: UUID, optimization_name: str, dto: OptimizationRequest) -> StandartOutput:
+        return await OptimizationService._apply_update(user_id, optimization_name, dto.optimization_name, dto)
+    
+    @staticmethod
+    async def patch_optimization(user_id: UUID, optimization_name: str, dto: OptimizationPatch) -> StandartOutput:
+        new_name = dto.optimization_name or optimization_name
+        
+        if dto.cost_function is None and dto.demand_function is None and dto.method is None:
+            return await OptimizationService._apply_update(user_id, optimization_name, new_name, None)
+        
+        cost_function, demand_function, method = dto.cost_function, dto.demand_function, dto.method
+        if cost_function is None or demand_function is None or method is None:
+            # campos ausentes no PATCH saem da linha atual
+            async with async_session() as session:
+                stored_result = await session.execute(
+                    select(
+                        PriceOptimization.cost_function,
+                        PriceOptimization.demand_function,
+                        PriceOptimization.method
+                    ).where(
+                        PriceOptimization.optimization_name == optimization_name,
+                        PriceOptimization.user_id == user_id
+                    ))
+                stored = stored_result.one_or_none()
             
-            session.add(optimization)
-            await session.commit()
-            await session.refresh(optimization)
+            if not stored:
+                raise HTTPException(status_code=404, detail="Optimization not found")
             
-            return StandartOutput(
-                status_code=200,
-                detail="Optimization updated successfully"
+            cost_function = cost_function or stored.cost_function
+            demand_function = demand_function or stored.demand_function
+            method = method or stored.method
+        
+        try:
+            request = OptimizationRequest(
+                optimization_name=new_name,
+                cost_function=cost_function,
+                demand_function=demand_function,
+                method=method
             )
+        except ValidationError as error:
+            raise HTTPException(status_code=422, detail='; '.join(item['msg'] for item in error.errors()))
         
+        return await OptimizationService._apply_update(user_id, optimization_name, new_name, request)
+    
     @staticmethod
-    async def list_optimizations(user_id: UUID) -> List[OptimizationRequest]:
-        async with async_session() as session:
-            result = await session.execute(select(User).where(User.id == user_id))
-            user = result.scalar_one_or_none()
-            
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
+    async def _apply_update(user_id: UUID, optimization_name: str, new_name: str, dto: Optional[OptimizationRequest]) -> StandartOutput:
+        target = (
+            update(PriceOptimization)
+            .where(
+                PriceOptimization.optimization_name == optimization_name,
+                PriceOptimization.user_id == user_id
+            )
+            .returning(PriceOptimization.id)
+        )
+        values = {
+            'optimization_name': new_name,
+            'graph_image_url': OptimizationService.graph_url(new_name),
+        }
+        
+        if dto is not None:
+            try:
+                expression_hash = await OptimizationService._expression_hash(dto.cost_function, dto.demand_function)
+            except ValueError as error:
+                raise HTTPException(status_code=422, detail=str(error))
             
-            optimizations_result = await session.execute(
-                select(PriceOptimization).where(PriceOptimization.user_id == user_id)
+            values.update(
+                cost_function=dto.cost_function,
+                demand_function=dto.demand_function,
+                expression_hash=expression_hash,
+                method=dto.method
             )
+            # mesmas expressões (hash canônico; texto idêntico em linhas sem hash) e mesmo método, com resultado
+            # exato já calculado: ótimo e gráfico continuam valendo. Jobs pendentes, falhos ou aproximações recalculam
+            target_unchanged = target.where(
+                or_(
+                    PriceOptimization.expression_hash == expression_hash,
+                    and_(
+                        PriceOptimization.cost_function == dto.cost_function,
+                        PriceOptimization.demand_function == dto.demand_function
+                    )
+                ),
+                PriceOptimization.status == OptimizationStatus.DONE,
+                PriceOptimization.approximate.is_(False),
+                PriceOptimization.method == dto.method
+            )
+        else:
+            # só o nome: um único UPDATE condicional
+            target_unchanged = target
+        
+        async with async_session() as session:
+            try:
+                result = await session.execute(target_unchanged.values(**values))
+                
+                if result.scalar_one_or_none() is not None:
+                    with STAGE_LATENCY.time(stage='commit'):
+                        await session.commit()
+                    
+                    await response_cache.invalidate(user_id, optimization_name, new_name)
+                    return StandartOutput(status_code=200, detail="Optimization updated successfully")
+            except IntegrityError as error:
+                raise OptimizationService._integrity_error(error)
             
-            optimizations = optimizations_result.scalars().all()
+            # nada atualizado: ou a linha não existe, ou é preciso recalcular. O 404 vem antes do solve
+            exists_result = await session.execute(
+                select(PriceOptimization.id).where(
+                    PriceOptimization.optimization_name == optimization_name,
+                    PriceOptimization.user_id == user_id
+                ))
+            if exists_result.scalar_one_or_none() is None or dto is None:
+                raise HTTPException(status_code=404, detail="Optimization not found")
+        
+        # expressões novas: o solve passa pelo cache de resultados e roda sem segurar conexão nem lock da linha
+        try:
+            updated_optimization = await OptimizationService._solve(dto)
+        except ValueError as error:
+            raise HTTPException(status_code=422, detail=str(error))
+        
+        graph_series = await OptimizationService._graph_series(dto, updated_optimization)
+        
+        async with async_session() as session:
+            try:
+                result = await session.execute(
+                    target.values(
+                        **values,
+                        optimal_price=updated_optimization.optimal_price,
+                        max_profit=updated_optimization.max_profit,
+                        approximate=updated_optimization.approximate,
+                        graph_series=graph_series,
+                        status=OptimizationStatus.DONE,
+                        error=None
+                    )
+                )
+                
+                if result.scalar_one_or_none() is None:
+                    raise HTTPException(status_code=404, detail="Optimization not found")
+                
+                with STAGE_LATENCY.time(stage='commit'):
+                    await session.commit()
+            except IntegrityError as error:
+                raise OptimizationService._integrity_error(error)
             
-            optimization_list = [
-                OptimizationRequest(
-                    optimization_name=opt.optimization_name,
-                    cost_function=opt.cost_function,
-                    demand_function=opt.demand_function
-                ) for opt in optimizations
-            ]
+            await response_cache.invalidate(user_id, optimization_name, new_name)
+            return StandartOutput(
+                status_code=200,
+                detail="Optimization updated successfully"
+            )
+        
+    @staticmethod
+    def _encode_cursor(created_at: datetime, optimization_id: UUID) -> str:
+        return urlsafe_b64encode(json.dumps([created_at.isoformat(), str(optimization_id)]).encode()).decode()
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+        try:
+            created_at, optimization_id = json.loads(urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(created_at), UUID(optimization_id)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    @staticmethod
+    async def list_optimizations(
+        user_id: UUID,
+        limit: int = Settings.LIST_DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+        order: str = 'asc',
+        name_prefix: Optional[str] = None,
+        min_profit: Optional[float] = None,
+        max_profit: Optional[float] = None
+    ) -> OptimizationPage:
+        # paginação por keyset em (user_id, created_at, id), coberta pelo índice composto
+        query = select(
+            PriceOptimization.id,
+            PriceOptimization.optimization_name,
+            PriceOptimization.cost_function,
+            PriceOptimization.demand_function,
+            PriceOptimization.optimal_price,
+            PriceOptimization.max_profit,
+            PriceOptimization.status,
+            PriceOptimization.created_at
+        ).where(PriceOptimization.user_id == user_id)
+        
+        if name_prefix:
+            query = query.where(PriceOptimization.optimization_name.startswith(name_prefix, autoescape=True))
+        if min_profit is not None:
+            query = query.where(PriceOptimization.max_profit >= min_profit)
+        if max_profit is not None:
+            query = query.where(PriceOptimization.max_profit <= max_profit)
+        
+        position = tuple_(PriceOptimization.created_at, PriceOptimization.id)
+        
+        if cursor:
+            cursor_position = tuple_(*OptimizationService._decode_cursor(cursor))
+            query = query.where(position < cursor_position if order == 'desc' else position > cursor_position)
+        
+        if order == 'desc':
+            query = query.order_by(PriceOptimization.created_at.desc(), PriceOptimization.id.desc())
+        else:
+            query = query.order_by(PriceOptimization.created_at, PriceOptimization.id)
+        
+        async with async_session() as session:
+            result = await session.execute(query.limit(limit + 1))
+            rows = result.all()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = OptimizationService._encode_cursor(rows[-1].created_at, rows[-1].id)
+        
+        # as linhas já foram validadas na escrita: model_construct evita revalidar cada item
+        items = [
+            OptimizationSummary.model_construct(
+                optimization_name=row.optimization_name,
+                cost_function=row.cost_function,
+                demand_function=row.demand_function,
+                optimal_price=row.optimal_price,
+                max_profit=row.max_profit,
+                status=row.status,
+                created_at=row.created_at
+            ) for row in rows
+        ]
+        
+        return OptimizationPage.model_construct(items=items, next_cursor=next_cursor)
+    
+    EXPORT_COLUMNS = (
+        'optimization_name',
+        'cost_function',
+        'demand_function',
+        'optimal_price',
+        'max_profit',
+        'graph_image_url',
+        'status',
+        'created_at',
+    )
+    
+    @staticmethod
+    async def export_optimizations(user_id: UUID, export_format: str) -> AsyncIterator[bytes]:
+        query = (
+            select(*[getattr(PriceOptimization, column) for column in OptimizationService.EXPORT_COLUMNS])
+            .where(PriceOptimization.user_id == user_id)
+            .order_by(PriceOptimization.created_at, PriceOptimization.id)
+            .execution_options(yield_per=Settings.EXPORT_BATCH_SIZE)
+        )
+        
+        if export_format == 'csv':
+            header = StringIO()
+            csv.writer(header).writerow(OptimizationService.EXPORT_COLUMNS)
+            yield header.getvalue().encode()
+        
+        # cursor do lado do servidor: a memória fica limitada a um lote, qualquer que seja o total
+        async with async_session() as session:
+            result = await session.stream(query)
             
-            return optimization_list
\ No newline at end of file
+            async for partition in result.partitions():
+                chunk = StringIO()
+                
+                if export_format == 'csv':
+                    writer = csv.writer(chunk)
+                    for row in partition:
+                        writer.writerow([
+                            value.isoformat() if isinstance(value, datetime) else value
+                            for value in row
+                        ])
+                else:
+                    for row in partition:
+                        record = row._asdict()
+                        record['created_at'] = record['created_at'].isoformat()
+                        chunk.write(json.dumps(record))
+                        chunk.write('\n')
+                
+                yield chunk.getvalue().encode()
+    
+    ENTITY_TAG = re.compile(r'\*|(?:W/)?"[^"]*"')
+    
+    @staticmethod
+    def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        # lista de entity-tags separadas por vírgula (fortes ou W/) ou '*'; GET compara de forma fraca,
+        # ignorando o prefixo W/, e sempre a tag inteira com aspas
+        if not if_none_match:
+            return False
+        
+        opaque_tag = etag.removeprefix('W/')
+        for match in OptimizationService.ENTITY_TAG.finditer(if_none_match):
+            tag = match.group()
+            if tag == '*' or tag.removeprefix('W/') == opaque_tag:
+                return True
+        return False
+    
+    @staticmethod
+    def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+        # codificações com q-values: 'gzip;q=0' recusa; '*' vale para gzip quando ele não aparece na lista
+        preferences = {}
+        for entry in (accept_encoding or '').split(','):
+            coding, *params = [part.strip() for part in entry.split(';')]
+            if not coding:
+                continue
+            quality = 1.0
+            for param in params:
+                name, _, value = param.partition('=')
+                if name.strip().lower() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            preferences[coding.lower()] = quality
+        
+        quality = preferences.get('gzip', preferences.get('x-gzip', preferences.get('*', 0.0)))
+        return quality > 0
+    
+    @staticmethod
+    async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        compressor = zlib.compressobj(wbits=31)
+        
+        async for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        
+        yield compressor.flush()
+
+
+job_queue = create_job_queue(OptimizationService.process_optimization_job)
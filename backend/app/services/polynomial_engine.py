@@ -0,0 +1,85 @@
+import numpy as np
+import sympy as sp
+from app.core.settings import Settings
+from app.schemas import OptimizationInfo
+
+
+class UnsupportedExpressionError(Exception):
+    pass
+
+
+class PolynomialEngine:
+
+    NEWTON_STEPS = 3
+
+    @staticmethod
+    def to_coefficients(profit: sp.Expr, p: sp.Symbol) -> tuple[np.ndarray, np.ndarray]:
+        # L(p) = N(p) / D(p), com N e D polinomiais em p
+        numerator, denominator = sp.fraction(sp.together(profit))
+        try:
+            numerator_coeffs = np.array([float(c) for c in sp.Poly(numerator, p).all_coeffs()])
+            denominator_coeffs = np.array([float(c) for c in sp.Poly(denominator, p).all_coeffs()])
+        except (sp.PolynomialError, TypeError) as e:
+            raise UnsupportedExpressionError(str(e))
+
+        if not np.all(np.isfinite(numerator_coeffs)) or not np.all(np.isfinite(denominator_coeffs)):
+            raise UnsupportedExpressionError("Coeficientes não finitos")
+
+        return np.trim_zeros(numerator_coeffs, 'f'), np.trim_zeros(denominator_coeffs, 'f')
+
+    @staticmethod
+    def critical_points(numerator: np.ndarray, denominator: np.ndarray, tolerance: float) -> tuple[np.ndarray, np.ndarray]:
+        # L'(p) = G(p) / D(p)², com G = N'D - ND'
+        gradient = np.polysub(
+            np.polymul(np.polyder(numerator), denominator),
+            np.polymul(numerator, np.polyder(denominator))
+        )
+        gradient = np.trim_zeros(gradient, 'f')
+
+        if gradient.size < 2:
+            return np.array([]), gradient
+
+        roots = np.roots(gradient)
+        real_mask = np.abs(roots.imag) <= tolerance * np.maximum(1.0, np.abs(roots.real))
+        points = roots[real_mask].real
+
+        # refina as raízes do companion matrix com alguns passos de Newton
+        gradient_derivative = np.polyder(gradient)
+        for _ in range(PolynomialEngine.NEWTON_STEPS):
+            slope = np.polyval(gradient_derivative, points)
+            safe_slope = np.where(slope == 0, 1.0, slope)
+            points = np.where(slope == 0, points, points - np.polyval(gradient, points) / safe_slope)
+
+        points = points[points > 0]
+        points = points[np.abs(np.polyval(denominator, points)) > tolerance]
+        return np.unique(points), gradient
+
+    @staticmethod
+    def optimize(profit: sp.Expr, p: sp.Symbol, tolerance: float = Settings.POLY_ENGINE_TOLERANCE) -> OptimizationInfo:
+        numerator, denominator = PolynomialEngine.to_coefficients(profit, p)
+
+        if denominator.size == 0:
+            raise UnsupportedExpressionError("Denominador nulo")
+
+        points, gradient = PolynomialEngine.critical_points(numerator, denominator, tolerance)
+
+        if points.size == 0:
+            raise UnsupportedExpressionError("Nenhum ponto crítico válido encontrado")
+
+        denominator_values = np.polyval(denominator, points)
+        profit_values = np.polyval(numerator, points) / denominator_values
+
+        # em um ponto crítico G(p) = 0, então L''(p) = G'(p) / D(p)²
+        second_derivative_values = np.polyval(np.polyder(gradient), points) / denominator_values ** 2
+
+        maxima = second_derivative_values < 0
+        if not np.any(maxima):
+            # sem máximo local o ótimo está na fronteira: decide o otimizador de intervalo
+            raise ValueError("Nenhum máximo local encontrado entre os pontos críticos")
+        best = int(np.argmax(np.where(maxima, profit_values, -np.inf)))
+
+        return OptimizationInfo(
+            optimal_price=float(points[best]),
+            max_profit=float(profit_values[best]),
+            profit_function=str(profit),
+        )
@@ -0,0 +1,90 @@
+from base64 import b64encode
+from typing import Optional
+import numpy as np
+from app.schemas import OptimizationRequest, SweepRequest, SweepResponse, SweepSummary
+from app.services.compiled_model import compiled_models
+
+
+class PriceSweep:
+
+    SERIES = ('price', 'demand', 'cost', 'revenue', 'profit', 'elasticity')
+
+    @staticmethod
+    def _finite_or_none(value: float) -> Optional[float]:
+        return float(value) if np.isfinite(value) else None
+
+    @staticmethod
+    def _profit_range(profit: np.ndarray, best: int, tolerance_pct: float) -> tuple[int, int]:
+        # maior intervalo contínuo em torno do ótimo com lucro >= máximo - X%
+        threshold = profit[best] - abs(profit[best]) * tolerance_pct / 100
+        outside = ~(profit >= threshold)
+
+        left_outside = np.flatnonzero(outside[:best])
+        right_outside = np.flatnonzero(outside[best:])
+
+        left = left_outside[-1] + 1 if left_outside.size else 0
+        right = best + right_outside[0] - 1 if right_outside.size else profit.size - 1
+        return int(left), int(right)
+
+    @staticmethod
+    def sweep(dto: OptimizationRequest, optimal_price: float, request: SweepRequest) -> SweepResponse:
+
+        try:
+            model = compiled_models.get(dto.cost_function, dto.demand_function)
+            cost_func, revenue_func, profit_func = model.numeric_functions
+            demand_func, demand_slope_func = model.demand_functions
+
+            min_price = request.min_price if request.min_price is not None else 0.0
+            max_price = request.max_price if request.max_price is not None else optimal_price * 2
+
+            if max_price <= min_price:
+                raise ValueError("O preço máximo deve ser maior que o preço mínimo")
+
+            price = np.linspace(min_price, max_price, request.points)
+
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                demand = np.broadcast_to(demand_func(price), price.shape)
+                cost = np.broadcast_to(cost_func(price), price.shape)
+                revenue = np.broadcast_to(revenue_func(price), price.shape)
+                profit = np.broadcast_to(profit_func(price), price.shape)
+                elasticity = np.broadcast_to(demand_slope_func(price), price.shape) * price / demand
+
+            elasticity = np.where(np.isfinite(elasticity), elasticity, np.nan)
+
+            best = int(np.nanargmax(np.where(np.isfinite(profit), profit, -np.inf)))
+            left, right = PriceSweep._profit_range(profit, best, request.profit_tolerance_pct)
+
+            summary = SweepSummary(
+                grid_optimal_price=float(price[best]),
+                grid_max_profit=float(profit[best]),
+                elasticity_at_optimum=PriceSweep._finite_or_none(elasticity[best]),
+                profit_range_min_price=float(price[left]),
+                profit_range_max_price=float(price[right]),
+                min_profit=float(np.nanmin(profit)),
+                max_demand=float(np.nanmax(demand)),
+                min_demand=float(np.nanmin(demand)),
+            )
+
+            if request.summary_only:
+                return SweepResponse(points=request.points, summary=summary)
+
+            arrays = {
+                'price': price,
+                'demand': demand,
+                'cost': cost,
+                'revenue': revenue,
+                'profit': profit,
+                'elasticity': elasticity,
+            }
+
+            return SweepResponse(
+                points=request.points,
+                summary=summary,
+                series={
+                    name: b64encode(np.ascontiguousarray(values, dtype='<f4').tobytes()).decode()
+                    for name, values in arrays.items()
+                }
+            )
+
+        except Exception as e:
+            raise ValueError(f"Erro ao calcular varredura de preços: {str(e)}")
@@ -0,0 +1,233 @@
+import logging
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Optional
+from uuid import UUID
+from app.core.settings import Settings
+
+CachedResponse = tuple[str, bytes]
+
+
+class SharedResponseBackend(ABC):
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisResponseBackend(SharedResponseBackend):
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client = None
+
+    def _get_client(self):
+        # redis é opcional: só é importado quando o backend compartilhado está configurado
+        if self._client is None:
+            import redis.asyncio
+
+            self._client = redis.asyncio.Redis.from_url(self.url)
+        return self._client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._get_client().get(key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        await self._get_client().set(key, value, px=max(int(ttl_seconds * 1000), 1))
+
+    async def delete(self, *keys: str) -> None:
+        await self._get_client().delete(*keys)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class InMemoryResponseBackend(SharedResponseBackend):
+
+    def __init__(self):
+        self.entries: dict[str, tuple[bytes, float]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self.entries[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self.entries[key] = (value, time.time() + ttl_seconds)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.entries.pop(key, None)
+
+
+class ResponseCache:
+
+    KEY_PREFIX = 'optimization_response:'
+
+    def __init__(self, max_size: int, local_ttl_seconds: float, shared_ttl_seconds: float, shared: Optional[SharedResponseBackend] = None):
+        self.max_size = max_size
+        self.local_ttl_seconds = local_ttl_seconds
+        self.shared_ttl_seconds = shared_ttl_seconds
+        self.shared = shared
+        # (user_id, nome) -> (etag, corpo serializado, instante em que a entrada deixa de valer)
+        self._entries: "OrderedDict[str, tuple[str, bytes, float]]" = OrderedDict()
+        # geração da última invalidação por chave: um preenchimento que leu o banco antes dela é descartado
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._generation = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(user_id: UUID, optimization_name: str) -> str:
+        return f'{ResponseCache.KEY_PREFIX}{user_id}:{optimization_name}'
+
+    @staticmethod
+    def etag(body: bytes) -> str:
+        return f'"{sha256(body).hexdigest()[:32]}"'
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def _store_locally(self, key: str, etag: str, body: bytes) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (etag, body, time.time() + self.local_ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, user_id: UUID, optimization_name: str) -> Optional[CachedResponse]:
+        key = ResponseCache.key(user_id, optimization_name)
+        generation = self.generation()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                etag, body, expires_at = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return etag, body
+                del self._entries[key]
+
+        if self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception as error:
+                # backend compartilhado fora do ar degrada para o banco, não para erro
+                logging.error("Error reading shared response cache: %s", error)
+                value = None
+
+            if value is not None:
+                etag, _, body = value.partition(b'\n')
+                with self._lock:
+                    if self._is_current(key, generation):
+                        self._store_locally(key, etag.decode(), body)
+                    self.shared_hits += 1
+                return etag.decode(), body
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _is_current(self, key: str, generation: int) -> bool:
+        return generation >= self._floor and self._invalidated.get(key, -1) <= generation
+
+    async def set(self, user_id: UUID, optimization_name: str, etag: str, body: bytes, generation: int) -> None:
+        key = ResponseCache.key(user_id, optimization_name)
+
+        with self._lock:
+            if not self._is_current(key, generation):
+                return
+            self._store_locally(key, etag, body)
+
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, etag.encode() + b'\n' + body, self.shared_ttl_seconds)
+            except Exception as error:
+                logging.error("Error writing shared response cache: %s", error)
+
+    async def invalidate(self, user_id: UUID, *optimization_names: str) -> None:
+        keys = [ResponseCache.key(user_id, name) for name in optimization_names]
+
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+                self._invalidated[key] = self._generation
+                self._invalidated.move_to_end(key)
+            while len(self._invalidated) > max(self.max_size, 1024):
+                _, generation = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, generation)
+
+        if self.shared is not None and keys:
+            try:
+                await self.shared.delete(*keys)
+            except Exception as error:
+                logging.error("Error invalidating shared response cache: %s", error)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    async def close(self) -> None:
+        if self.shared is not None:
+            await self.shared.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            'size': size,
+            'max_size': self.max_size,
+            'backend': Settings.RESPONSE_CACHE_BACKEND,
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+        }
+
+
+def create_shared_backend() -> Optional[SharedResponseBackend]:
+    if Settings.RESPONSE_CACHE_BACKEND == 'redis':
+        return RedisResponseBackend(Settings.RESPONSE_CACHE_REDIS_URL)
+    if Settings.RESPONSE_CACHE_BACKEND == 'memory':
+        return InMemoryResponseBackend()
+    return None
+
+
+response_cache = ResponseCache(
+    Settings.RESPONSE_CACHE_SIZE,
+    Settings.RESPONSE_CACHE_LOCAL_TTL_SECONDS,
+    Settings.RESPONSE_CACHE_TTL_SECONDS,
+    create_shared_backend()
+)
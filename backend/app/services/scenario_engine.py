@@ -0,0 +1,263 @@
+import threading
+import time
+from base64 import b64encode
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+import numpy as np
+import sympy as sp
+from app.core.settings import Settings
+from app.schemas import ScenarioRequest, ScenarioResponse
+from app.services.expression_parser import ExpressionParser
+
+
+ScenarioKey = tuple[str, str, tuple[str, ...], str]
+
+
+@dataclass(frozen=True)
+class ScenarioTemplate:
+    # resultado simbólico da derivação: só expressões do sympy, serializável para voltar do pool de solvers
+    parameters: tuple[str, ...]
+    method: str
+    profit: sp.Expr
+    second_derivative: sp.Expr
+    critical_points: tuple[sp.Expr, ...] = ()
+    gradient_coefficients: Optional[tuple[sp.Expr, ...]] = None
+
+
+@dataclass(frozen=True)
+class CompiledScenario:
+    parameters: tuple[str, ...]
+    method: str
+    profit: Callable
+    second_derivative: Callable
+    critical_points: tuple[Callable, ...] = ()
+    gradient_coefficients: tuple[Callable, ...] = ()
+
+
+class ScenarioEngine:
+
+    IMAGINARY_TOLERANCE = 1e-7
+    LEADING_TOLERANCE = 1e-12
+
+    _compiled: "OrderedDict[ScenarioKey, CompiledScenario]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def key(request: ScenarioRequest) -> ScenarioKey:
+        return request.cost_function, request.demand_function, tuple(request.parameters), request.method
+
+    @staticmethod
+    def derive(cost_function: str, demand_function: str, parameters: tuple[str, ...], method: str = 'auto') -> ScenarioTemplate:
+        # diff/solve do template: roda no pool de solvers, com timeout e limite de memória
+        try:
+            p = sp.Symbol('p')  # preço
+            q = sp.Symbol('q')  # quantidade
+            symbols = {name: sp.Symbol(name) for name in parameters}
+
+            cost_expr = ExpressionParser.to_sympy(cost_function, {**symbols, 'q': q})  # C(q)
+            demand = ExpressionParser.to_sympy(demand_function, {**symbols, 'p': p})   # Q(p)
+
+            profit = p * demand - cost_expr.subs(q, demand)
+            profit_derivative = sp.diff(profit, p)
+            second_derivative = sp.diff(profit_derivative, p)
+            gradient = sp.fraction(sp.together(profit_derivative))[0]
+
+            template = dict(parameters=parameters, profit=profit, second_derivative=second_derivative)
+
+            try:
+                template['gradient_coefficients'] = tuple(sp.Poly(gradient, p).all_coeffs())
+            except sp.PolynomialError:
+                pass
+
+            if method != 'numeric':
+                try:
+                    solutions = sp.solve(gradient, p)
+                except NotImplementedError:
+                    solutions = []
+
+                if solutions and not any(solution.has(sp.RootOf) for solution in solutions):
+                    return ScenarioTemplate(method='closed_form', critical_points=tuple(solutions), **template)
+
+                if method == 'closed_form':
+                    raise ValueError("Não há forma fechada para os pontos críticos deste template")
+
+            if 'gradient_coefficients' not in template:
+                raise ValueError("O lucro não é racional em p: sem forma fechada nem solução numérica vetorizada")
+
+            return ScenarioTemplate(method='numeric', **template)
+
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Erro ao calcular cenários: {str(e)}")
+
+    @staticmethod
+    def cached(key: ScenarioKey) -> Optional[CompiledScenario]:
+        with ScenarioEngine._lock:
+            compiled = ScenarioEngine._compiled.get(key)
+            if compiled is not None:
+                ScenarioEngine._compiled.move_to_end(key)
+            return compiled
+
+    @staticmethod
+    def lambdify(key: ScenarioKey, template: ScenarioTemplate) -> CompiledScenario:
+        # funções numpy montadas no processo da API a partir da derivação; guardadas por template
+        p = sp.Symbol('p')
+        symbols = [sp.Symbol(name) for name in template.parameters]
+        arguments = [p, *symbols]
+
+        compiled = CompiledScenario(
+            parameters=template.parameters,
+            method=template.method,
+            profit=sp.lambdify(arguments, template.profit, 'numpy'),
+            second_derivative=sp.lambdify(arguments, template.second_derivative, 'numpy'),
+            critical_points=tuple(sp.lambdify(symbols, point, 'numpy') for point in template.critical_points),
+            gradient_coefficients=tuple(sp.lambdify(symbols, c, 'numpy') for c in template.gradient_coefficients or ()),
+        )
+
+        with ScenarioEngine._lock:
+            ScenarioEngine._compiled[key] = compiled
+            ScenarioEngine._compiled.move_to_end(key)
+            while len(ScenarioEngine._compiled) > Settings.SCENARIO_CACHE_SIZE:
+                ScenarioEngine._compiled.popitem(last=False)
+
+        return compiled
+
+    @staticmethod
+    def compile(cost_function: str, demand_function: str, parameters: tuple[str, ...], method: str = 'auto') -> CompiledScenario:
+        # derivação no próprio processo, para chamadas diretas (benchmarks); a API usa derive no pool
+        key = (cost_function, demand_function, parameters, method)
+        return ScenarioEngine.cached(key) or ScenarioEngine.lambdify(key, ScenarioEngine.derive(*key))
+
+    @staticmethod
+    def clear() -> None:
+        with ScenarioEngine._lock:
+            ScenarioEngine._compiled.clear()
+
+    @staticmethod
+    def _closed_form_candidates(compiled: CompiledScenario, values: list[np.ndarray], size: int) -> np.ndarray:
+        # avaliado em complexo: fórmulas como a de Cardano passam por valores complexos mesmo com raízes reais
+        complex_values = [v.astype(complex) for v in values]
+        with np.errstate(all='ignore'):
+            roots = np.stack([
+                np.broadcast_to(point(*complex_values), (size,)) for point in compiled.critical_points
+            ], axis=1)
+
+        real = np.abs(roots.imag) <= ScenarioEngine.IMAGINARY_TOLERANCE * np.maximum(1.0, np.abs(roots.real))
+        return np.where(real, roots.real, np.nan)
+
+    @staticmethod
+    def _numeric_candidates(compiled: CompiledScenario, values: list[np.ndarray], size: int) -> np.ndarray:
+        with np.errstate(all='ignore'):
+            coefficients = np.stack([
+                np.broadcast_to(np.asarray(c(*values), dtype=float), (size,)) for c in compiled.gradient_coefficients
+            ], axis=1)
+
+        # combinações em que o termo líder zera (ex.: e=0 em e*q**3) caem de grau:
+        # desloca os coeficientes para a esquerda, o que só acrescenta raízes em p=0, descartadas depois
+        coefficients[~np.isfinite(coefficients)] = 0.0
+        scale = np.max(np.abs(coefficients), axis=1, keepdims=True)
+        nonzero = np.abs(coefficients) > ScenarioEngine.LEADING_TOLERANCE * np.where(scale == 0, 1.0, scale)
+        shift = np.where(np.any(nonzero, axis=1), np.argmax(nonzero, axis=1), coefficients.shape[1])
+        index = np.arange(coefficients.shape[1]) + shift[:, None]
+        coefficients = np.where(
+            index < coefficients.shape[1],
+            np.take_along_axis(coefficients, np.minimum(index, coefficients.shape[1] - 1), axis=1),
+            0.0
+        )
+
+        degree = coefficients.shape[1] - 1
+        if degree < 1:
+            return np.full((size, 1), np.nan)
+
+        # matrizes companheiras em lote: um único eigvals para todas as combinações
+        leading = coefficients[:, :1]
+        usable = np.abs(leading[:, 0]) > 0
+        normalized = -coefficients[:, 1:] / np.where(leading == 0, 1.0, leading)
+
+        companion = np.zeros((size, degree, degree))
+        companion[:, 0, :] = normalized
+        if degree > 1:
+            companion[:, np.arange(1, degree), np.arange(degree - 1)] = 1.0
+
+        companion[~np.all(np.isfinite(companion), axis=(1, 2))] = 0.0
+        roots = np.linalg.eigvals(companion)
+
+        real = np.abs(roots.imag) <= ScenarioEngine.IMAGINARY_TOLERANCE * np.maximum(1.0, np.abs(roots.real))
+        candidates = np.where(real, roots.real, np.nan)
+        candidates[~usable] = np.nan
+        return candidates
+
+    @staticmethod
+    def evaluate(compiled: CompiledScenario, values: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+        size = values[0].size if values else 1
+
+        if compiled.method == 'closed_form':
+            candidates = ScenarioEngine._closed_form_candidates(compiled, values, size)
+            # combinações degeneradas da forma fechada (divisão por zero) vão para as raízes numéricas
+            degenerate = ~np.any(np.isfinite(candidates), axis=1)
+            if compiled.gradient_coefficients and np.any(degenerate):
+                fallback = ScenarioEngine._numeric_candidates(compiled, [v[degenerate] for v in values], int(degenerate.sum()))
+                width = max(candidates.shape[1], fallback.shape[1])
+                candidates = np.pad(candidates, ((0, 0), (0, width - candidates.shape[1])), constant_values=np.nan)
+                candidates[degenerate] = np.pad(fallback, ((0, 0), (0, width - fallback.shape[1])), constant_values=np.nan)
+        else:
+            candidates = ScenarioEngine._numeric_candidates(compiled, values, size)
+
+        columns = [v[:, None] for v in values]
+        with np.errstate(all='ignore'):
+            profit = np.broadcast_to(compiled.profit(candidates, *columns), candidates.shape)
+            second_derivative = np.broadcast_to(compiled.second_derivative(candidates, *columns), candidates.shape)
+
+        valid = np.isfinite(candidates) & (candidates > 0) & np.isfinite(profit)
+        maxima = valid & (second_derivative < 0)
+
+        # só máximos locais contam: sem nenhum, o melhor ponto crítico pode ser um mínimo e a combinação fica
+        # inviável (NaN), como o OptimizationCalc, que nesse caso recusa o lucro ilimitado ou cai na borda do intervalo
+        score = np.where(maxima, profit, -np.inf)
+        best = np.argmax(score, axis=1)
+        rows = np.arange(size)
+
+        feasible = np.isfinite(score[rows, best])
+        optimal_price = np.where(feasible, candidates[rows, best], np.nan)
+        max_profit = np.where(feasible, profit[rows, best], np.nan)
+
+        return optimal_price, max_profit
+
+    @staticmethod
+    def run(request: ScenarioRequest, compiled: Optional[CompiledScenario] = None, batch_size: Optional[int] = None) -> ScenarioResponse:
+        start = time.perf_counter()
+        batch_size = batch_size or Settings.SCENARIO_BATCH_SIZE
+
+        try:
+            parameters = tuple(request.parameters)
+            compiled = compiled or ScenarioEngine.compile(*ScenarioEngine.key(request))
+
+            arrays = [np.asarray(request.parameters[name], dtype=float) for name in parameters]
+            count = arrays[0].size if arrays else 1
+
+            optimal_price = np.empty(count)
+            max_profit = np.empty(count)
+
+            for offset in range(0, count, batch_size):
+                batch = [values[offset:offset + batch_size] for values in arrays]
+                prices, profits = ScenarioEngine.evaluate(compiled, batch)
+                optimal_price[offset:offset + batch_size] = prices
+                max_profit[offset:offset + batch_size] = profits
+
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Erro ao calcular cenários: {str(e)}")
+
+        return ScenarioResponse(
+            count=count,
+            feasible=int(np.count_nonzero(np.isfinite(optimal_price))),
+            method=compiled.method,
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+            series={
+                'optimal_price': b64encode(optimal_price.astype('<f4').tobytes()).decode(),
+                'max_profit': b64encode(max_profit.astype('<f4').tobytes()).decode(),
+            }
+        )
@@ -0,0 +1,61 @@
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault('PG_URL', 'sqlite+aiosqlite:///:memory:')
+os.environ.setdefault('SECRET_KEY', 'bench-secret')
+os.environ.setdefault('ALGORITHM', 'HS256')
+
+from app.core.settings import Settings
+from app.services.auth_service import AuthService
+from app.services.token_cache import token_cache
+
+
+def per_call_us(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Overhead de autenticação por requisição')
+    parser.add_argument('--repeat', type=int, default=20000)
+    args = parser.parse_args()
+
+    token = AuthService.build_JWT('6f1c0a52-3c4e-4d8f-9b0e-1d2a3b4c5d6e', 'bench').access_token
+    loop = asyncio.new_event_loop()
+
+    def validate():
+        return loop.run_until_complete(AuthService.validate_user_auth(token))
+
+    def uncached():
+        token_cache.clear()
+        return validate()
+
+    print(f"{'path':<28}{'us/call':>10}")
+    for backend in ('jose', 'pyjwt'):
+        Settings.JWT_BACKEND = backend
+        print(f"{'decode ' + backend:<28}{per_call_us(uncached, args.repeat):>10.1f}")
+
+    validate()
+    print(f"{'cached':<28}{per_call_us(validate, args.repeat):>10.1f}")
+
+    # antes: dependência síncrona, despachada ao threadpool do anyio a cada requisição
+    from anyio import to_thread
+    from app.core.security import decode_token
+
+    async def threadpool_hop():
+        for _ in range(args.repeat // 10):
+            await to_thread.run_sync(decode_token, token)
+
+    start = time.perf_counter()
+    loop.run_until_complete(threadpool_hop())
+    hop = (time.perf_counter() - start) / (args.repeat // 10) * 1e6
+    print(f"{'threadpool hop + decode':<28}{hop:>10.1f}")
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
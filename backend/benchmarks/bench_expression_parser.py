@@ -0,0 +1,102 @@
+import argparse
+import re
+import sys
+import time
+import sympy as sp
+from sympy.parsing.sympy_parser import parse_expr
+from app.services.expression_parser import ExpressionParser
+from benchmarks.corpus import CORPUS
+
+# entradas que o validador por regex deixava passar e só falhavam (ou viravam outra coisa) no sympy
+MALFORMED = ['2 5*q', 'q**', '()q + 1', '(q)(q)', 'Q + 1', '*q', 'q++', '1..5*q']
+
+
+def regex_validator(function: str, variable: str) -> None:
+    # validador anterior, mantido aqui só como referência de custo
+    v_clean = function.replace(' ', '')
+    if not v_clean:
+        raise ValueError("A função não pode estar vazia")
+    if variable not in v_clean.lower():
+        raise ValueError(f"A função deve conter a variável '{variable}'")
+    if not re.match(rf'^[0-9{variable}\+\-\*/\(\)\.\s\*\*]+$', v_clean, re.IGNORECASE):
+        raise ValueError("A função contém caracteres inválidos")
+    if v_clean.count('(') != v_clean.count(')'):
+        raise ValueError("Parênteses desbalanceados na função")
+
+
+def parser_validator(function: str, variable: str) -> None:
+    ExpressionParser.check_names(ExpressionParser.parse(function), (variable,), required=variable)
+
+
+def timed(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara o parser de expressões com parse_expr e com os validadores por regex')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    symbols = {'q': sp.Symbol('q'), 'p': sp.Symbol('p')}
+    functions = [(case['cost'], 'q') for case in CORPUS] + [(case['demand'], 'p') for case in CORPUS]
+
+    mismatches = 0
+    for function, variable in functions:
+        local = {variable: symbols[variable]}
+        if sp.srepr(parse_expr(function, local_dict=local)) != sp.srepr(ExpressionParser.to_sympy(function, local)):
+            mismatches += 1
+            print(f"MISMATCH {function!r}")
+
+    def parse_all():
+        for function, variable in functions:
+            parse_expr(function, local_dict={variable: symbols[variable]})
+
+    def build_cold():
+        ExpressionParser.parse.cache_clear()
+        for function, variable in functions:
+            ExpressionParser.to_sympy(function, {variable: symbols[variable]})
+
+    def validate(validator):
+        def run():
+            for function, variable in functions:
+                validator(function, variable)
+        return run
+
+    def validate_cold():
+        ExpressionParser.parse.cache_clear()
+        validate(parser_validator)()
+
+    rows = [
+        ('parse_expr', timed(parse_all, args.repeat)),
+        ('to_sympy (cold)', timed(build_cold, args.repeat)),
+        ('regex validator', timed(validate(regex_validator), args.repeat)),
+        ('parser (cold)', timed(validate_cold, args.repeat)),
+        ('parser (cached)', timed(validate(parser_validator), args.repeat)),
+    ]
+
+    print(f"{len(functions)} expressões por rodada")
+    print(f"{'step':<20}{'us/expr':>12}")
+    for label, elapsed in rows:
+        print(f"{label:<20}{elapsed / len(functions) * 1e6:>12.2f}")
+
+    # o parser recusa na validação o que antes passava pela regex e falhava (ou mudava de sentido) adiante
+    caught = 0
+    for function in MALFORMED:
+        try:
+            regex_validator(function, 'q')
+        except ValueError:
+            continue
+        try:
+            parser_validator(function, 'q')
+        except ValueError:
+            caught += 1
+    print(f"malformed accepted by regex and rejected by parser: {caught}/{len(MALFORMED)}  mismatches={mismatches}")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
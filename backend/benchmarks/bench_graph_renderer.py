@@ -0,0 +1,103 @@
+import argparse
+import time
+from io import BytesIO
+import numpy as np
+import sympy as sp
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from sympy.parsing.sympy_parser import parse_expr
+from app.schemas import OptimizationRequest
+from app.services.compiled_model import compiled_models
+from app.services.optimization_calc import OptimizationCalc
+
+CASES = [
+    ('linear', '100 + 50*q', '200 - 2*p'),
+    ('quadratic', '50 + 3*q + 0.01*q**2', '800 - 1.5*p'),
+    ('rational', '5 + 2*q', '2000/(p + 10)**2'),
+]
+
+
+def legacy_pyplot_render(dto, optimization) -> BytesIO:
+    # renderizador anterior, baseado no estado global do pyplot
+    p = sp.Symbol('p')
+    q = sp.Symbol('q')
+    cost_expr = parse_expr(dto.cost_function, local_dict={'q': q})
+    demand = parse_expr(dto.demand_function, local_dict={'p': p})
+    cost = cost_expr.subs(q, demand)
+    revenue = p * demand
+    profit = revenue - cost
+
+    cost_func = sp.lambdify(p, cost, 'numpy')
+    revenue_func = sp.lambdify(p, revenue, 'numpy')
+    profit_func = sp.lambdify(p, profit, 'numpy')
+
+    x_range = np.linspace(0, optimization.optimal_price * 2, 1000)
+
+    plt.figure(figsize=(12, 8))
+    plt.plot(x_range, cost_func(x_range), label='Custo', color='red', linewidth=2)
+    plt.plot(x_range, revenue_func(x_range), label='Receita', color='green', linewidth=2)
+    plt.plot(x_range, profit_func(x_range), label='Lucro', color='blue', linewidth=2)
+    plt.scatter([optimization.optimal_price], [optimization.max_profit], color='gold', s=200, zorder=5,
+                label=f'Ponto Ótimo ({optimization.optimal_price:.2f}, {optimization.max_profit:.2f})',
+                edgecolors='black', linewidth=2)
+    plt.axvline(x=optimization.optimal_price, color='gray', linestyle='--', alpha=0.7)
+    plt.axhline(y=optimization.max_profit, color='gray', linestyle='--', alpha=0.7)
+    plt.xlabel('Preço (x)', fontsize=12, fontweight='bold')
+    plt.ylabel('Valor ($)', fontsize=12, fontweight='bold')
+    plt.title('Otimização de Preço - Análise de Custo, Receita e Lucro', fontsize=14, fontweight='bold')
+    plt.legend(fontsize=10, loc='best')
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+
+    img_buffer = BytesIO()
+    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
+    img_buffer.seek(0)
+    plt.close()
+    return img_buffer
+
+
+def measure(render, repeat: int) -> tuple[float, int]:
+    render()  # aquecimento
+    start = time.perf_counter()
+    for _ in range(repeat):
+        size = len(render().getvalue())
+    return (time.perf_counter() - start) / repeat * 1000, size
+
+
+def series_error(dto, optimization, blob: bytes) -> float:
+    # maior desvio do lucro interpolado entre os pontos da série em relação à curva densa, em % da amplitude
+    price, _, _, profit = np.frombuffer(blob, dtype='<f4').reshape(4, -1).astype(float)
+    dense_price = np.linspace(0, optimization.optimal_price * 2, 20001)
+    dense_profit = compiled_models.get(dto.cost_function, dto.demand_function).numeric_functions[2](dense_price)
+    deviation = np.abs(np.interp(dense_price, price, profit) - dense_profit)
+    return float(np.nanmax(deviation) / np.ptp(dense_profit[np.isfinite(dense_profit)]) * 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara o renderizador pyplot com o GraphRenderer e a série downsampled')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'case':<12}{'variant':<16}{'ms':>10}{'bytes':>10}")
+    for name, cost, demand in CASES:
+        dto = OptimizationRequest(optimization_name=name, cost_function=cost, demand_function=demand)
+        optimization = OptimizationCalc.calculate_optimal_price(dto)
+
+        variants = {
+            'pyplot': lambda: legacy_pyplot_render(dto, optimization),
+            'figure_png': lambda: OptimizationCalc.generate_graph_image(dto, optimization),
+            'figure_svg': lambda: OptimizationCalc.generate_graph_image(dto, optimization, image_format='svg'),
+            'preview_png': lambda: OptimizationCalc.generate_graph_image(dto, optimization, preview=True),
+            'series': lambda: BytesIO(OptimizationCalc.generate_graph_series(dto, optimization)),
+        }
+        for variant, render in variants.items():
+            elapsed, size = measure(render, args.repeat)
+            print(f"{name:<12}{variant:<16}{elapsed:>10.1f}{size:>10}")
+
+        blob = OptimizationCalc.generate_graph_series(dto, optimization)
+        print(f"{name:<12}{'series error':<16}{series_error(dto, optimization, blob):>9.3f}%")
+
+
+if __name__ == '__main__':
+    main()
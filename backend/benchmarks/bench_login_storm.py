@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+WORK_DIR = tempfile.mkdtemp(prefix='bench_login_')
+os.environ.setdefault('PG_URL', f'sqlite+aiosqlite:///{WORK_DIR}/bench.db')
+os.environ.setdefault('SECRET_KEY', 'bench-secret-key-with-at-least-32-bytes')
+os.environ.setdefault('ALGORITHM', 'HS256')
+
+import httpx
+from benchmarks.stats import summarize
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe_lag(stop: asyncio.Event, lags: list[float]) -> None:
+    # atraso do event loop: quanto um sleep curto passa do prazo pedido
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(max(loop.time() - start - PROBE_INTERVAL, 0.0))
+
+
+async def storm(client: httpx.AsyncClient, logins: int) -> dict:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_lag(stop, lags))
+    await asyncio.sleep(0.05)
+
+    async def login():
+        response = await client.post('/auth/login', json={'login': 'storm', 'password': 'storm-password'})
+        return response.status_code
+
+    start = time.perf_counter()
+    statuses = await asyncio.gather(*[login() for _ in range(logins)])
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    return {
+        'elapsed_s': elapsed,
+        'ok': statuses.count(200),
+        'rejected_503': statuses.count(503),
+        'loop_lag': summarize(lags),
+    }
+
+
+async def main(logins: int):
+    from app.core import executors
+    from app.core.database.connection import engine
+    from app.main import app
+    from app.models import Base
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=120) as client:
+            await client.post('/auth/register', json={'username': 'storm', 'email': 'storm@example.com', 'password': 'storm-password'})
+
+            pooled = executors.get_password_pool()
+            results = {}
+            # antes: hash inline no event loop (PASSWORD_HASH_WORKERS=0); depois: pool limitado
+            for label, pool in (('inline', executors.BoundedExecutor(0, 0, 'password')), ('pool', pooled)):
+                executors._password_pool = pool
+                results[label] = await storm(client, logins)
+            executors._password_pool = pooled
+
+    await engine.dispose()
+
+    print(f"{'mode':<8}{'logins/s':>10}{'ok':>6}{'503':>6}{'lag p50 ms':>12}{'lag p99 ms':>12}{'lag max ms':>12}")
+    for label, result in results.items():
+        lag = result['loop_lag']
+        print(f"{label:<8}{logins / result['elapsed_s']:>10.1f}{result['ok']:>6}{result['rejected_503']:>6}"
+              f"{lag['p50_ms']:>12.1f}{lag['p99_ms']:>12.1f}{lag['max_ms']:>12.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Latência do event loop durante rajadas de login')
+    parser.add_argument('--logins', type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
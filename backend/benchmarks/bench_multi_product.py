@@ -0,0 +1,88 @@
+import argparse
+import sys
+import time
+import numpy as np
+from app.schemas import MultiProductRequest, OptimizationRequest
+from app.services.multi_product_engine import MultiProductEngine
+from app.services.optimization_calc import OptimizationCalc
+
+
+def linear_products(count: int, seed: int) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    products = []
+    for i in range(count):
+        a, b, c = rng.uniform(200, 1000), rng.uniform(0.5, 5), rng.uniform(1, 20)
+        products.append({
+            'name': f'product_{i}',
+            'cost_function': f'{c:.3f}*q + {c * 10:.2f}',
+            'demand_function': f'{a:.2f} - {b:.3f}*p',
+        })
+    return products
+
+
+def closed_form(products: list[dict], limit: float) -> tuple[float, np.ndarray]:
+    # Q_i = a_i - b_i p, C_i = c_i Q + F_i: p_i(λ) = (a_i/b_i + c_i + λ) / 2 até Q_i zerar em p = a_i/b_i,
+    # então a soma das quantidades é linear por partes e decrescente em λ
+    c = np.array([float(product['cost_function'].split('*')[0]) for product in products])
+    a = np.array([float(product['demand_function'].split(' - ')[0]) for product in products])
+    b = np.array([float(product['demand_function'].split(' - ')[1].split('*')[0]) for product in products])
+
+    def prices(shadow_price: float) -> np.ndarray:
+        return np.minimum((a / b + c + shadow_price) / 2, a / b)
+
+    low, high = 0.0, float(np.max(a / b))
+    if np.sum(a - b * prices(low)) <= limit:
+        return low, prices(low)
+    for _ in range(200):
+        middle = (low + high) / 2
+        if np.sum(a - b * prices(middle)) > limit:
+            low = middle
+        else:
+            high = middle
+    return high, prices(high)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Otimizador multiproduto contra a solução analítica e o OptimizationCalc por produto')
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--capacity', type=float, default=0.6, help='fração da quantidade irrestrita disponível')
+    parser.add_argument('--sample', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tolerance', type=float, default=1e-4)
+    args = parser.parse_args()
+
+    products = linear_products(args.count, args.seed)
+    unconstrained = MultiProductEngine.solve(MultiProductRequest(products=products))
+    limit = sum(product.quantity for product in unconstrained.products) * args.capacity
+    request = MultiProductRequest(products=products, constraints=[{'kind': 'quantity', 'limit': limit}])
+
+    MultiProductEngine.clear()
+    for label in ('cold', 'warm'):
+        start = time.perf_counter()
+        response = MultiProductEngine.solve(request)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<12}{args.count:>9} products {elapsed * 1000:>10.1f} ms  templates={response.templates}")
+
+    shadow_price, prices = closed_form(products, limit)
+    solved = np.array([product.optimal_price for product in response.products])
+    constraint = response.constraints[0]
+    mismatches = int(np.sum(np.abs(solved - prices) > args.tolerance * np.maximum(1.0, prices)))
+    print(f"shadow price {constraint.shadow_price:.6f} (analytic {shadow_price:.6f})  usage {constraint.usage:.3f} / {limit:.3f}  mismatches={mismatches}")
+
+    # sem restrições o resultado de cada produto deve coincidir com o otimizador de um produto
+    start = time.perf_counter()
+    for i in range(args.sample):
+        product = products[i]
+        reference = OptimizationCalc.calculate_optimal_price(OptimizationRequest(optimization_name=product['name'], **{
+            key: product[key] for key in ('cost_function', 'demand_function')
+        }))
+        if abs(unconstrained.products[i].optimal_price - reference.optimal_price) > args.tolerance * max(1.0, reference.optimal_price):
+            mismatches += 1
+    elapsed = time.perf_counter() - start
+    print(f"{'per-request':<12}{args.sample:>9} products {elapsed * 1000:>10.1f} ms  mismatches={mismatches}")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
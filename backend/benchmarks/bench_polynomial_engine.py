@@ -0,0 +1,49 @@
+import argparse
+import sys
+import time
+from app.schemas import OptimizationRequest
+from app.services.optimization_calc import OptimizationCalc
+
+CASES = [
+    ('linear', '100 + 50*q', '200 - 2*p'),
+    ('quadratic', '50 + 3*q + 0.01*q**2', '800 - 1.5*p'),
+    ('cubic_cost', '20 + 2*q + 0.001*q**3', '300 - 3*p'),
+    ('high_degree', '10 + q + 0.0001*q**4', '(50 - p/2)**2'),
+    ('rational', '5 + 2*q', '2000/(p + 10)**2'),
+    ('rational_mixed', '100 + 4*q + 0.02*q**2', '500/(p + 5) + 20 - p/10'),
+]
+
+
+def run(engine: str, dto: OptimizationRequest, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = OptimizationCalc.calculate_optimal_price(dto, engine=engine)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara o motor polinomial com o sympy.solve')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=1e-6)
+    args = parser.parse_args()
+
+    mismatches = 0
+    print(f"{'case':<16}{'sympy ms':>12}{'poly ms':>12}{'speedup':>10}  match")
+    for name, cost, demand in CASES:
+        dto = OptimizationRequest(optimization_name=name, cost_function=cost, demand_function=demand)
+        reference, sympy_time = run('sympy', dto, args.repeat)
+        fast, poly_time = run('polynomial', dto, args.repeat)
+
+        scale = max(1.0, abs(reference.max_profit))
+        match = (
+            abs(reference.optimal_price - fast.optimal_price) <= args.tolerance * max(1.0, abs(reference.optimal_price))
+            and abs(reference.max_profit - fast.max_profit) <= args.tolerance * scale
+        )
+        mismatches += not match
+        print(f"{name:<16}{sympy_time * 1000:>12.2f}{poly_time * 1000:>12.2f}{sympy_time / poly_time:>9.1f}x  {'ok' if match else 'MISMATCH'}")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
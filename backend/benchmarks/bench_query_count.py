@@ -0,0 +1,75 @@
+import asyncio
+import os
+import tempfile
+import uuid
+
+WORK_DIR = tempfile.mkdtemp(prefix='bench_query_count_')
+os.environ.setdefault('PG_URL', f'sqlite+aiosqlite:///{WORK_DIR}/bench.db')
+os.environ.setdefault('UPLOAD_BACKEND', 'memory')
+os.environ.setdefault('GRAPH_STORE_DIR', f'{WORK_DIR}/graphs')
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.core.database.connection import async_session, engine
+from app.main import app
+from app.models import Base, User
+from app.services.auth_service import AuthService
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+async def create_schema() -> uuid.UUID:
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+    user_id = uuid.uuid4()
+    async with async_session() as session:
+        session.add(User(id=user_id, username='bench', email='bench@example.com', password='-'))
+        await session.commit()
+
+    await engine.dispose()
+    return user_id
+
+
+def main():
+    user_id = asyncio.run(create_schema())
+    app.dependency_overrides[AuthService.validate_user_auth] = lambda: user_id
+
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, 'before_cursor_execute', counter)
+
+    body = {'optimization_name': 'bench', 'cost_function': '100 + 50*q', 'demand_function': '200 - 2*p'}
+    # o último campo reenvia o ETag da resposta anterior em If-None-Match
+    requests = [
+        ('POST /optimizations/', 'post', '/optimizations/', body, False),
+        ('GET /optimizations/{name}', 'get', '/optimizations/bench', None, False),
+        ('GET /optimizations/{name} (cached)', 'get', '/optimizations/bench', None, False),
+        ('GET /optimizations/{name} (If-None-Match)', 'get', '/optimizations/bench', None, True),
+        ('GET /optimizations/', 'get', '/optimizations/', None, False),
+        ('PUT /optimizations/{name} (rename)', 'put', '/optimizations/bench', {**body, 'optimization_name': 'renamed'}, False),
+        ('PUT /optimizations/{name} (functions)', 'put', '/optimizations/renamed', {**body, 'optimization_name': 'renamed', 'demand_function': '300 - 2*p'}, False),
+        ('GET /optimizations/{name} (after update)', 'get', '/optimizations/renamed', None, False),
+        ('GET /optimizations/{name}/graph', 'get', '/optimizations/renamed/graph', None, False),
+        ('POST /optimizations/ (duplicate)', 'post', '/optimizations/', {**body, 'optimization_name': 'renamed'}, False),
+    ]
+
+    print(f"{'endpoint':<46}{'status':>8}{'queries':>9}")
+    with TestClient(app) as client:
+        etag = None
+        for label, method, url, payload, revalidate in requests:
+            counter.count = 0
+            headers = {'If-None-Match': etag} if revalidate and etag else None
+            response = client.request(method, url, json=payload, headers=headers)
+            etag = response.headers.get('etag', etag)
+            print(f"{label:<46}{response.status_code:>8}{counter.count:>9}")
+
+if __name__ == '__main__':
+    main()
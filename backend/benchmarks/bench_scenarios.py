@@ -0,0 +1,85 @@
+import argparse
+import sys
+import time
+from base64 import b64decode
+import numpy as np
+from app.schemas import OptimizationRequest, ScenarioRequest
+from app.services.optimization_calc import OptimizationCalc
+from app.services.scenario_engine import ScenarioEngine
+
+COST_TEMPLATE = 'a*q + b'
+DEMAND_TEMPLATE = 'c - d*p'
+
+# demanda crescente: o único ponto crítico é um mínimo do lucro, e a combinação deve sair inviável
+UNBOUNDED_CASE = ('a*q', 'c + d*p', {'a': [50.0], 'c': [10.0], 'd': [1.0]})
+
+
+def parameter_sets(count: int, seed: int) -> dict[str, list[float]]:
+    rng = np.random.default_rng(seed)
+    return {
+        'a': rng.uniform(1, 20, count).round(3).tolist(),
+        'b': rng.uniform(0, 500, count).round(3).tolist(),
+        'c': rng.uniform(200, 1000, count).round(3).tolist(),
+        'd': rng.uniform(0.5, 5, count).round(3).tolist(),
+    }
+
+
+def decode(series: str) -> np.ndarray:
+    return np.frombuffer(b64decode(series), dtype='<f4')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vazão do motor de cenários contra o OptimizationCalc por combinação')
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--sample', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tolerance', type=float, default=1e-4)
+    args = parser.parse_args()
+
+    parameters = parameter_sets(args.count, args.seed)
+
+    results = {}
+    for method in ('closed_form', 'numeric'):
+        request = ScenarioRequest(cost_function=COST_TEMPLATE, demand_function=DEMAND_TEMPLATE, parameters=parameters, method=method)
+        ScenarioEngine.clear()
+
+        start = time.perf_counter()
+        response = ScenarioEngine.run(request)
+        elapsed = time.perf_counter() - start
+
+        results[method] = decode(response.series['optimal_price']), decode(response.series['max_profit'])
+        print(f"{method:<12}{args.count:>9} sets {elapsed * 1000:>10.1f} ms {args.count / elapsed:>12.0f} sets/s  feasible={response.feasible}")
+
+    start = time.perf_counter()
+    mismatches = 0
+    for i in range(args.sample):
+        values = {name: values[i] for name, values in parameters.items()}
+        dto = OptimizationRequest(
+            optimization_name=f'scenario_{i}',
+            cost_function=f"{values['a']}*q + {values['b']}",
+            demand_function=f"{values['c']} - {values['d']}*p"
+        )
+        reference = OptimizationCalc.calculate_optimal_price(dto)
+
+        for prices, profits in results.values():
+            scale = max(1.0, abs(reference.max_profit))
+            if abs(prices[i] - reference.optimal_price) > args.tolerance * max(1.0, reference.optimal_price) \
+                    or abs(profits[i] - reference.max_profit) > args.tolerance * scale:
+                mismatches += 1
+    elapsed = time.perf_counter() - start
+    print(f"{'per-request':<12}{args.sample:>9} sets {elapsed * 1000:>10.1f} ms {args.sample / elapsed:>12.0f} sets/s  mismatches={mismatches}")
+
+    cost_function, demand_function, values = UNBOUNDED_CASE
+    for method in ('closed_form', 'numeric'):
+        response = ScenarioEngine.run(ScenarioRequest(
+            cost_function=cost_function, demand_function=demand_function, parameters=values, method=method
+        ))
+        if response.feasible or np.any(np.isfinite(decode(response.series['optimal_price']))):
+            mismatches += 1
+            print(f"MISMATCH {method}: {cost_function} / {demand_function} should be infeasible")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
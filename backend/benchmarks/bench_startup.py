@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# cada medição roda num interpretador novo: importações e caches começam frios
+IMPORT_SNIPPET = '''
+import time
+start = time.perf_counter()
+import app.main
+print(time.perf_counter() - start)
+'''
+
+FIRST_REQUEST_SNIPPET = '''
+import asyncio, json, time
+import httpx
+from benchmarks.load import _create_schema
+
+async def main():
+    start = time.perf_counter()
+    from app.main import app
+    from app.services.auth_service import AuthService
+    imported = time.perf_counter() - start
+
+    user_id = await _create_schema()
+    app.dependency_overrides[AuthService.validate_user_auth] = lambda: user_id
+
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        startup = time.perf_counter() - start
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=120) as client:
+            timings = {}
+            for label, method, url, body in (
+                ('first_create', 'POST', '/optimizations/', {'optimization_name': 'first', 'cost_function': '20 + 2*q + 0.001*q**3', 'demand_function': '300 - 3*p'}),
+                ('first_graph', 'GET', '/optimizations/first/graph', None),
+                ('second_create', 'POST', '/optimizations/', {'optimization_name': 'second', 'cost_function': '50 + 3*q + 0.01*q**2', 'demand_function': '800 - 1.5*p'}),
+            ):
+                start = time.perf_counter()
+                response = await client.request(method, url, json=body)
+                timings[label] = time.perf_counter() - start
+                assert response.status_code < 400, response.text
+
+    from app.core.database.connection import engine
+    await engine.dispose()
+    print(json.dumps({'import': imported, 'startup': startup, **timings}))
+
+asyncio.run(main())
+'''
+
+
+def run_snippet(snippet: str, env: dict) -> str:
+    result = subprocess.run([sys.executable, '-W', 'ignore', '-c', snippet], env=env, capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo de importação, startup e primeira requisição')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_startup_')
+    env = {
+        **os.environ,
+        'PG_URL': f'sqlite+aiosqlite:///{work_dir}/bench.db',
+        'UPLOAD_BACKEND': 'memory',
+        'GRAPH_STORE_DIR': f'{work_dir}/graphs',
+    }
+
+    imports = [float(run_snippet(IMPORT_SNIPPET, env)) for _ in range(args.repeat)]
+    print(f'import app.main: {statistics.median(imports) * 1000:.0f} ms (mediana de {args.repeat})')
+
+    print(f"{'warmup':<8}{'startup ms':>12}{'1st create ms':>15}{'1st graph ms':>14}{'2nd create ms':>15}")
+    for warmup in ('false', 'true'):
+        runs = [json.loads(run_snippet(FIRST_REQUEST_SNIPPET, {**env, 'WARMUP_ON_STARTUP': warmup})) for _ in range(args.repeat)]
+        median = {key: statistics.median(run[key] for run in runs) * 1000 for key in runs[0]}
+        print(f"{warmup:<8}{median['startup']:>12.0f}{median['first_create']:>15.0f}{median['first_graph']:>14.0f}{median['second_create']:>15.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+# pares custo/demanda usados por todos os benchmarks da suíte
+# kind: 'representative' para o tráfego típico, 'worst_case' para entradas perto dos limites estáticos
+CORPUS = [
+    {'name': 'linear', 'kind': 'representative', 'cost': '100 + 50*q', 'demand': '200 - 2*p'},
+    {'name': 'quadratic', 'kind': 'representative', 'cost': '50 + 3*q + 0.01*q**2', 'demand': '800 - 1.5*p'},
+    {'name': 'cubic_cost', 'kind': 'representative', 'cost': '20 + 2*q + 0.001*q**3', 'demand': '300 - 3*p'},
+    {'name': 'rational', 'kind': 'representative', 'cost': '5 + 2*q', 'demand': '2000/(p + 10)**2'},
+    {'name': 'rational_mixed', 'kind': 'representative', 'cost': '100 + 4*q + 0.02*q**2', 'demand': '500/(p + 5) + 20 - p/10'},
+    {'name': 'fractional_power', 'kind': 'representative', 'cost': '100 + 5*q + 0.01*q**1.5', 'demand': '200 - 2*p**1.1'},
+    {'name': 'high_degree', 'kind': 'worst_case', 'cost': '10 + q + 0.0001*q**4', 'demand': '(50 - p/2)**2'},
+    {'name': 'degree_limit', 'kind': 'worst_case', 'cost': '10 + q + (q/1000)**10', 'demand': '(100 - p)**5/10**8'},
+    {'name': 'nested_rational', 'kind': 'worst_case', 'cost': '1 + q/(1 + q/(10 + q))', 'demand': '1000/(1 + p/(10 + p)) - p'},
+    {'name': 'many_terms', 'kind': 'worst_case', 'cost': ' + '.join(f'{i}*q**{i % 4}' for i in range(1, 30)), 'demand': '900 - 3*p'},
+]
+
+
+def cases(kind: str = None) -> list[dict]:
+    return [case for case in CORPUS if kind is None or case['kind'] == kind]
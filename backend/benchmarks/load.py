@@ -0,0 +1,90 @@
+import asyncio
+import itertools
+import time
+import uuid
+from collections import defaultdict
+import httpx
+from benchmarks.corpus import cases
+from benchmarks.stats import summarize
+
+
+async def _create_schema() -> uuid.UUID:
+    from app.core.database.connection import async_session, engine
+    from app.models import Base, User
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+    user_id = uuid.uuid4()
+    async with async_session() as session:
+        session.add(User(id=user_id, username='bench', email='bench@example.com', password='-'))
+        await session.commit()
+    return user_id
+
+
+async def run_load(requests: int = 500, concurrency: int = 16) -> dict:
+    from app.main import app
+    from app.services.auth_service import AuthService
+
+    user_id = await _create_schema()
+    app.dependency_overrides[AuthService.validate_user_auth] = lambda: user_id
+
+    corpus = cases('representative')
+    sequence = itertools.count()
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    created: list[str] = []
+
+    def next_request() -> tuple[str, str, str, dict]:
+        # mistura de leitura pesada: 1 criação para 4 leituras
+        index = next(sequence)
+        if index % 5 == 0 or not created:
+            case = corpus[index % len(corpus)]
+            name = f"{case['name']}-{index}"
+            body = {'optimization_name': name, 'cost_function': case['cost'], 'demand_function': case['demand']}
+            return 'create', 'POST', '/optimizations/', body
+        name = created[index % len(created)]
+        return [
+            ('get', 'GET', f'/optimizations/{name}', None),
+            ('list', 'GET', '/optimizations/?limit=50', None),
+            ('graph', 'GET', f'/optimizations/{name}/graph', None),
+            ('get', 'GET', f'/optimizations/{name}', None),
+        ][index % 4]
+
+    async def worker(client: httpx.AsyncClient, budget: list[int]) -> None:
+        while budget[0] > 0:
+            budget[0] -= 1
+            label, method, url, body = next_request()
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies[label].append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[label] += 1
+            elif label == 'create':
+                created.append(body['optimization_name'])
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=60) as client:
+            # aquecimento: sobe os workers do solver antes de medir
+            await client.post('/optimizations/', json={'optimization_name': 'warmup', 'cost_function': 'q', 'demand_function': '10 - p'})
+            budget = [requests]
+            start = time.perf_counter()
+            await asyncio.gather(*[worker(client, budget) for _ in range(concurrency)])
+            elapsed = time.perf_counter() - start
+
+    app.dependency_overrides.clear()
+    # fecha as conexões do pool: com aiosqlite cada uma segura uma thread não-daemon
+    from app.core.database.connection import engine
+    await engine.dispose()
+
+    every = [value for values in latencies.values() for value in values]
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'elapsed_s': elapsed,
+        'throughput_rps': requests / elapsed,
+        'overall': summarize(every),
+        'endpoints': {label: {**summarize(values), 'errors': errors[label]} for label, values in latencies.items()},
+    }
@@ -0,0 +1,47 @@
+import time
+from app.schemas import OptimizationInfo, OptimizationRequest
+from app.services.compiled_model import compiled_models
+from app.services.optimization_calc import OptimizationCalc
+from benchmarks.corpus import CORPUS
+from benchmarks.stats import summarize
+
+
+def _measure(func, repeat: int, before=None) -> tuple[list[float], object]:
+    latencies = []
+    result = None
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        result = func()
+        latencies.append(time.perf_counter() - start)
+    return latencies, result
+
+
+def run_micro(repeat: int = 20, render_repeat: int = 5) -> dict:
+    results = {}
+    for case in CORPUS:
+        dto = OptimizationRequest(optimization_name=case['name'], cost_function=case['cost'], demand_function=case['demand'])
+        entry = {'kind': case['kind']}
+
+        try:
+            # frio: sem modelo compilado em cache, inclui parse e lambdify
+            cold, info = _measure(lambda: OptimizationCalc.calculate_optimal_price(dto), max(1, repeat // 4), compiled_models.clear)
+            warm, info = _measure(lambda: OptimizationCalc.calculate_optimal_price(dto), repeat)
+        except ValueError as error:
+            results[case['name']] = {**entry, 'error': str(error)}
+            continue
+
+        optimization = OptimizationInfo(optimal_price=info.optimal_price, max_profit=info.max_profit)
+        png, _ = _measure(lambda: OptimizationCalc.generate_graph_image(dto, optimization), render_repeat)
+        preview, _ = _measure(lambda: OptimizationCalc.generate_graph_image(dto, optimization, preview=True), render_repeat)
+
+        results[case['name']] = {
+            **entry,
+            'optimal_price': info.optimal_price,
+            'calculate_cold': summarize(cold),
+            'calculate_warm': summarize(warm),
+            'render_png': summarize(png),
+            'render_preview': summarize(preview),
+        }
+    return results
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+WORK_DIR = tempfile.mkdtemp(prefix='bench_suite_')
+os.environ.setdefault('PG_URL', f'sqlite+aiosqlite:///{WORK_DIR}/bench.db')
+os.environ.setdefault('UPLOAD_BACKEND', 'memory')
+os.environ.setdefault('GRAPH_STORE_DIR', f'{WORK_DIR}/graphs')
+
+COMPARED_SUFFIXES = ('p50_ms', 'p95_ms', 'p99_ms')
+HIGHER_IS_BETTER = ('throughput_rps',)
+
+
+def flatten(data: dict, prefix: str = '') -> dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        path = f'{prefix}.{key}' if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[dict]:
+    current_flat = flatten(current['results'])
+    baseline_flat = flatten(baseline['results'])
+    regressions = []
+
+    for path, before in baseline_flat.items():
+        after = current_flat.get(path)
+        if after is None or before <= 0:
+            continue
+
+        if path.endswith(COMPARED_SUFFIXES):
+            change = (after - before) / before
+        elif path.endswith(HIGHER_IS_BETTER):
+            change = (before - after) / before
+        else:
+            continue
+
+        if change > threshold:
+            regressions.append({'metric': path, 'baseline': before, 'current': after, 'regression_pct': change * 100})
+
+    return sorted(regressions, key=lambda item: item['regression_pct'], reverse=True)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Suíte de benchmarks do pipeline de otimização')
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--skip-load', action='store_true')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='JSON de uma execução anterior usada como baseline')
+    parser.add_argument('--threshold', type=float, default=0.15, help='regressão relativa tolerada (0.15 = 15%%)')
+    args = parser.parse_args()
+
+    from benchmarks.load import run_load
+    from benchmarks.micro import run_micro
+    from benchmarks.stats import peak_rss_mb
+
+    results = {}
+    if not args.skip_micro:
+        results['micro'] = run_micro(repeat=args.repeat)
+    if not args.skip_load:
+        results['load'] = asyncio.run(run_load(requests=args.requests, concurrency=args.concurrency))
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'peak_rss': peak_rss_mb(),
+        'results': results,
+    }
+
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    print(f'resultados gravados em {args.output}')
+
+    if 'load' in results:
+        load = results['load']
+        print(f"load: {load['throughput_rps']:.1f} req/s, p50 {load['overall']['p50_ms']:.1f} ms, "
+              f"p95 {load['overall']['p95_ms']:.1f} ms, p99 {load['overall']['p99_ms']:.1f} ms")
+    print(f"peak RSS: {report['peak_rss'].get('self_mb', 0):.1f} MB")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(report, baseline, args.threshold)
+        for item in regressions:
+            print(f"REGRESSION {item['metric']}: {item['baseline']:.2f} -> {item['current']:.2f} (+{item['regression_pct']:.1f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f'sem regressões acima de {args.threshold:.0%} em relação a {args.compare}')
+
+
+if __name__ == '__main__':
+    main()
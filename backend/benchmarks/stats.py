@@ -0,0 +1,34 @@
+import sys
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def summarize(latencies: list[float]) -> dict:
+    # latências em segundos, relatório em milissegundos
+    if not latencies:
+        return {'count': 0}
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'count': int(values.size),
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'max_ms': float(values.max()),
+    }
+
+
+def peak_rss_mb() -> dict:
+    if resource is None:
+        return {}
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    scale = 1 / (1024 * 1024) if sys.platform == 'darwin' else 1 / 1024
+    return {
+        'self_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        'children_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
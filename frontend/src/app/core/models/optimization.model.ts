@@ -13,6 +13,21 @@ export interface OptimizationResponse {
   graph_image_url: string;
 }
 
+export interface OptimizationSummary {
+  optimization_name: string;
+  cost_function: string;
+  demand_function: string;
+  optimal_price: number | null;
+  max_profit: number | null;
+  status: string;
+  created_at: string;
+}
+
+export interface OptimizationPage {
+  items: OptimizationSummary[];
+  next_cursor: string | null;
+}
+
 export interface StandardOutput {
   status_code: number;
   detail: string;
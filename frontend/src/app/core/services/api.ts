@@ -16,6 +16,10 @@ export class ApiService {
     return this.http.get<T>(`${this.baseUrl}/${endpoint}`)
   }
 
+  getBlob(endpoint:string){
+    return this.http.get(`${this.baseUrl}/${endpoint}`, { responseType: 'blob' })
+  }
+
   post<T>(endpoint:string, body:any){
     return this.http.post<T>(`${this.baseUrl}/${endpoint}`, body)
   }
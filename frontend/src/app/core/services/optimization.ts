@@ -1,6 +1,7 @@
 import { Injectable } from '@angular/core';
 import { ApiService } from './api';
 import { 
+  OptimizationPage,
   OptimizationRequest, 
   OptimizationResponse, 
   StandardOutput 
@@ -21,12 +22,17 @@ export class OptimizationService {
     return this.api.get<OptimizationResponse>(`optimizations/${optimizationName}`);
   }
 
+  getGraph(graphImageUrl: string) {
+    return this.api.getBlob(graphImageUrl.replace(/^\//, ''));
+  }
+
   updateOptimization(optimizationName: string, request: OptimizationRequest) {
     return this.api.put<StandardOutput>(`optimizations/${optimizationName}`, request);
   }
 
-  listOptimizations() {
-    return this.api.get<OptimizationRequest[]>('optimizations/');
+  listOptimizations(cursor: string | null = null, limit = 50) {
+    const query = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+    return this.api.get<OptimizationPage>(`optimizations/?limit=${limit}&order=desc${query}`);
   }
 
 }
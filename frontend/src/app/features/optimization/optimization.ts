@@ -9,7 +9,7 @@ import { Card } from '../../shared/components/card/card';
 import { LoadingSpinner } from '../../shared/components/loading-spinner/loading-spinner';
 import { OptimizationService } from '../../core/services/optimization';
 import { AuthService } from '../../core/services/auth';
-import { OptimizationRequest, OptimizationResponse } from '../../core/models/optimization.model';
+import { OptimizationPage, OptimizationResponse, OptimizationSummary } from '../../core/models/optimization.model';
 
 @Component({
   selector: 'app-optimization',
@@ -19,11 +19,14 @@ import { OptimizationRequest, OptimizationResponse } from '../../core/models/opt
 })
 export class Optimization implements OnInit {
   optimizationForm!: FormGroup;
-  optimizations: OptimizationRequest[] = [];
+  optimizations: OptimizationSummary[] = [];
+  nextCursor: string | null = null;
   selectedOptimizationName: string | null = null;
   currentResult: OptimizationResponse | null = null;
+  graphImageSrc: string | null = null;
   isLoading = false;
   isLoadingList = false;
+  isLoadingMore = false;
   errorMessage = '';
 
   constructor(
@@ -45,10 +48,12 @@ export class Optimization implements OnInit {
   }
 
   async loadOptimizations(): Promise<void> {
+    // Só a primeira página (mais recentes primeiro); as demais vêm sob demanda em loadMoreOptimizations
     this.isLoadingList = true;
     try {
-      const data = await firstValueFrom(this.optimizationService.listOptimizations());
-      this.optimizations = data;
+      const page: OptimizationPage = await firstValueFrom(this.optimizationService.listOptimizations());
+      this.optimizations = page.items;
+      this.nextCursor = page.next_cursor;
       this.isLoadingList = false;
       this.cdr.detectChanges();
     } catch (error) {
@@ -58,6 +63,23 @@ export class Optimization implements OnInit {
     }
   }
 
+  async loadMoreOptimizations(): Promise<void> {
+    if (!this.nextCursor || this.isLoadingMore) {
+      return;
+    }
+
+    this.isLoadingMore = true;
+    try {
+      const page: OptimizationPage = await firstValueFrom(this.optimizationService.listOptimizations(this.nextCursor));
+      this.optimizations = [...this.optimizations, ...page.items];
+      this.nextCursor = page.next_cursor;
+    } catch (error) {
+      console.error('Erro ao carregar mais otimizações:', error);
+    }
+    this.isLoadingMore = false;
+    this.cdr.detectChanges();
+  }
+
   async onOptimizationSelect(event: Event): Promise<void> {
     const select = event.target as HTMLSelectElement;
     const value = select.value;
@@ -65,6 +87,7 @@ export class Optimization implements OnInit {
     if (value === 'new') {
       this.selectedOptimizationName = null;
       this.currentResult = null;
+      this.setGraphImageSrc(null);
       this.optimizationForm.reset();
       this.cdr.detectChanges();
     } else {
@@ -81,6 +104,7 @@ export class Optimization implements OnInit {
         });
         
         this.currentResult = result;
+        await this.loadGraph(result);
         this.cdr.detectChanges();
         console.log('Produto carregado:', result.optimization_name);
       } catch (error) {
@@ -128,6 +152,7 @@ export class Optimization implements OnInit {
       );
       
       this.currentResult = detailedResult;
+      await this.loadGraph(detailedResult);
       this.isLoading = false;
       this.cdr.detectChanges();
       console.log('Otimização processada com sucesso');
@@ -162,6 +187,29 @@ export class Optimization implements OnInit {
     }
   }
 
+  async loadGraph(result: OptimizationResponse): Promise<void> {
+    if (!result.graph_image_url) {
+      this.setGraphImageSrc(null);
+      return;
+    }
+
+    try {
+      // O gráfico é servido pelo backend com autenticação, então é baixado como blob
+      const blob = await firstValueFrom(this.optimizationService.getGraph(result.graph_image_url));
+      this.setGraphImageSrc(URL.createObjectURL(blob));
+    } catch (error) {
+      console.error('Erro ao carregar gráfico:', error);
+      this.setGraphImageSrc(null);
+    }
+  }
+
+  private setGraphImageSrc(src: string | null): void {
+    if (this.graphImageSrc) {
+      URL.revokeObjectURL(this.graphImageSrc);
+    }
+    this.graphImageSrc = src;
+  }
+
   logout(): void {
     this.authService.logout();
     this.router.navigate(['/login']);